@@ -1,5 +1,6 @@
 from app.services.author_services import (
     retrieve_single_author, 
+    retrieve_author_version,
     retrieve_authors_from_db, 
     add_author_to_database,
     edit_author_info,
@@ -12,40 +13,63 @@ from app.services.user_services import (
     register_user,
     retrieve_all_users
 )
+from app.services.count_services import CountMode
 from app.services.book_services import (
+    parse_fields,
     get_book_recommendations,
+    retrieve_similar_books,
     retrieve_single_book, 
+    retrieve_book_version,
     retrieve_books_from_db, 
+    retrieve_books_after_cursor,
     add_book_to_db, 
     delete_book_from_db,
     edit_book_info,
     retrieve_book_by_search_input,
     register_liked_book,
     remove_liked_book,
-    retrieve_liked_books_for_user
+    retrieve_liked_books_for_user,
+    retrieve_liked_status,
+    apply_liked_book_operations
 )
 from app.services.token_services import create_access_token
-from app.llm_workflow.workflow import assistant
+from app.services.import_services import run_catalog_import, get_import_status
+from app.services.export_services import export_books
+from app.services.vector_sync import get_vector_sync_stats
+from app.services.semantic_search import search_books_semantically
+from app.services.warm_up import get_readiness, get_warm_up_status, parse_subsystems, required_subsystems, start_warm_up, warm_up
+from app.services.response_cache import cached_response, get_cache_stats, get_catalog_version_async, invalidate_response_cache, params_digest
+from app.services.catalog_events import subscribe
+from app.services import async_book_services, async_author_services, async_user_services
+from app.llm_workflow.assistant import get_assistant
 
 from typing import Optional
 
 from app.schemas.login_info import Login
-from app.schemas.author import Author, AuthorUpdateCurrent
+from app.schemas.author import Author, AuthorUpdateCurrent, AuthorResponse
 from app.schemas.book import BookUpdateCurrent
-from app.schemas.user import User, UserUpdateCurrent
-from app.schemas.book import Book
+from app.schemas.user import User, UserUpdateCurrent, UserResponse, UserList, LoginResponse
+from app.schemas.book import Book, LikedStatusRequest, BulkLikeRequest, BookPage, BookSearchPage, BookResponse, LikedBooksPage, RecommendationsPage, SimilarBooksPage, SemanticSearchPage
 from app.schemas.query import UserMessage
+from app.schemas.catalog import CatalogImportRequest
 
-from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES, RECOMMENDATIONS_LIMIT
+from app.database.connector import get_pool_stats, dispose_engines, dispose_async_engines
+from app.utils.run_service import run_service
 from app.utils.get_current_user import get_current_user
+from app.utils.etag import make_etag, row_etag, etag_matches, not_modified
+from app.utils.json_response import FastJSONResponse
 
-from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi import BackgroundTasks, Depends, FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from typing import Annotated
-from datetime import timedelta
+from datetime import datetime, timedelta
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# Book writes made through this worker bump the shared catalog version.
+subscribe(invalidate_response_cache)
 
 app.add_middleware(
     CORSMiddleware,
@@ -61,65 +85,228 @@ def read_root(current_user: Annotated[dict, Depends(get_current_user)]):
         return HTTPException(status_code=403, detail="Invalid Authorization")
     return {"Hello": "World"}
 
-@app.get("/books")
-def get_books_without_login(
-        start: int=Query(...), 
-        end: int=Query(...), 
-        order_by: Optional[str] = Query(None)
+def check_fields(fields):
+    # An unknown field name is a bad request, not a missing page.
+    try:
+        parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def fetch_books(start, end, cursor, limit, order_by, count_mode, fields=None, email=None):
+    # start/end keep the original offset paging; without them pages are read by cursor.
+    if start is not None:
+        end = end if end is not None else start + limit
+        return await run_service(
+            retrieve_books_from_db, async_book_services.retrieve_books_from_db, 
+            start=start, end=end, order_by=order_by, email=email, count_mode=count_mode, fields=fields
+        )
+    return await run_service(
+        retrieve_books_after_cursor, async_book_services.retrieve_books_after_cursor, 
+        cursor=cursor, limit=limit, order_by=order_by, email=email, count_mode=count_mode, fields=fields
+    )
+
+@app.get("/books", response_model=BookPage)
+async def get_books_without_login(
+        start: Optional[int] = Query(None), 
+        end: Optional[int] = Query(None), 
+        cursor: Optional[str] = Query(None),
+        limit: int = Query(10, ge=1, le=100),
+        order_by: Optional[str] = Query(None),
+        count_mode: CountMode = Query("cached"),
+        fields: Optional[str] = Query(None),
+        if_none_match: Optional[str] = Header(None)
     ):
-    
-    success, message, books, total_count = retrieve_books_from_db(start=start, end=end, order_by=order_by)
+    check_fields(fields)
+    params = {
+        "start": start, "end": end, "cursor": cursor, "limit": limit, 
+        "order_by": order_by, "count_mode": count_mode, "fields": fields
+    }
+    version = await get_catalog_version_async(ranking=order_by == "trending")
+    etag = make_etag("books", version, params_digest(params)) if version else None
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    async def compute():
+        success, message, books, total_count, count_exact, next_cursor = await fetch_books(
+            start, end, cursor, limit, order_by, count_mode, fields
+        )
+        if not success:
+            return False, message
+        return True, {"message": message, "books": books, "count": total_count, "count_exact": count_exact, "next_cursor": next_cursor}
+
+    success, content = await cached_response("books", params, compute, version)
     if not success:
-        raise HTTPException(status_code=401, detail=message)
-    return {"message": message, "books": books, "count": total_count}
+        raise HTTPException(status_code=401, detail=content)
+    return FastJSONResponse(content, headers={"ETag": etag} if etag else None)
 
-@app.get("/books/users")
-def get_books_with_login(
+@app.get("/books/users", response_model=BookPage)
+async def get_books_with_login(
         current_user: Annotated[dict, Depends(get_current_user)], 
-        start: int=Query(...), 
-        end: int=Query(...), 
-        order_by: Optional[str] = Query(None)
+        start: Optional[int] = Query(None), 
+        end: Optional[int] = Query(None), 
+        cursor: Optional[str] = Query(None),
+        limit: int = Query(10, ge=1, le=100),
+        order_by: Optional[str] = Query(None),
+        count_mode: CountMode = Query("cached"),
+        fields: Optional[str] = Query(None)
     ):
     if not current_user:
         return HTTPException(status_code=403, detail="Invalid Authorization")
-    success, message, books, total_count = retrieve_books_from_db(start=start, end=end, order_by=order_by, email=current_user["email"])
+    check_fields(fields)
+    success, message, books, total_count, count_exact, next_cursor = await fetch_books(
+        start, end, cursor, limit, order_by, count_mode, fields, email=current_user["email"]
+    )
     if not success:
         raise HTTPException(status_code=401, detail=message)
-    return {"message": message, "books": books, "count": total_count}
+    return FastJSONResponse({"message": message, "books": books, "count": total_count, "count_exact": count_exact, "next_cursor": next_cursor})
+
+#@ADMIN ONLY
+@app.get("/books/export")
+def export_catalog(
+        current_user: Annotated[dict, Depends(get_current_user)],
+        file_format: str = Query("ndjson"),
+        since: Optional[datetime] = Query(None),
+        compress: bool = Query(False)
+    ):
+    if not current_user or current_user["role"] != 1:
+        raise HTTPException(status_code=403, detail="Not Authorized")
+    success, message, export = export_books(file_format, since, compress)
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    return StreamingResponse(
+        export["content"],
+        media_type=export["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{export["filename"]}"'}
+    )
+
+@app.get("/books/semantic-search", response_model=SemanticSearchPage)
+def semantic_search_books(
+        query: str,
+        k: int = Query(default=10, ge=1, le=100),
+        genre: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        min_rating: Optional[float] = None,
+        diversity: float = Query(default=0.0, ge=0.0, le=1.0),
+        fields: Optional[str] = "card"
+    ):
+    check_fields(fields)
+    success, message, books = search_books_semantically(query, k, genre, year_from, year_to, min_rating, diversity, fields)
+    if not success:
+        raise HTTPException(status_code=404, detail=message)
+    return FastJSONResponse({"message": message, "books": books})
 
-@app.get("/books/{book_id}")
-def get_book(book_id: int, current_user: Annotated[dict, Depends(get_current_user)]):
+@app.get("/books/{book_id}", response_model=BookResponse)
+async def get_book(
+        book_id: int, 
+        current_user: Annotated[dict, Depends(get_current_user)], 
+        if_none_match: Optional[str] = Header(None)
+    ):
     if not current_user:
         return HTTPException(status_code=403, detail="Invalid Authorization")
-    success, message, book = retrieve_single_book(book_id)
+    if if_none_match:
+        success, message, updated_at = await run_service(retrieve_book_version, async_book_services.retrieve_book_version, book_id)
+        if success and etag_matches(if_none_match, row_etag("book", book_id, updated_at)):
+            return not_modified(row_etag("book", book_id, updated_at))
+    success, message, book = await run_service(retrieve_single_book, async_book_services.retrieve_single_book, book_id)
     if not success:
         raise HTTPException(status_code=404, detail=message)
-    return {"message": message, "book": book}
+    return FastJSONResponse({"message": message, "book": book}, headers={"ETag": row_etag("book", book_id, book["updated_at"])})
 
-@app.get("/books/by-search-input/{search_input}")
-def search_books_without_login(search_input: str, start: int = 1, end: int = 10):
-    success, message, books, total_count = retrieve_book_by_search_input(search_input, start, end)
+@app.get("/books/{book_id}/similar", response_model=SimilarBooksPage)
+def get_similar_books(
+        book_id: str,
+        limit: int = Query(default=RECOMMENDATIONS_LIMIT, ge=1, le=100),
+        fields: Optional[str] = "card"
+    ):
+    check_fields(fields)
+    success, message, books = retrieve_similar_books(book_id, limit, fields)
     if not success:
         raise HTTPException(status_code=404, detail=message)
-    return {"message": message, "books": books, "count": total_count}
+    return FastJSONResponse({"message": message, "books": books})
+
+@app.get("/books/by-search-input/{search_input}", response_model=BookSearchPage)
+async def search_books_without_login(
+        search_input: str, 
+        start: int = 1, 
+        end: int = 10, 
+        count_mode: CountMode = "estimated", 
+        search_mode: str = "full_text",
+        fields: Optional[str] = None,
+        if_none_match: Optional[str] = Header(None)
+    ):
+    check_fields(fields)
+    params = {
+        "search_input": search_input, "start": start, "end": end, 
+        "count_mode": count_mode, "search_mode": search_mode, "fields": fields
+    }
+    version = await get_catalog_version_async()
+    etag = make_etag("books-search", version, params_digest(params)) if version else None
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    async def compute():
+        success, message, books, total_count, count_exact = await run_service(
+            retrieve_book_by_search_input, async_book_services.retrieve_book_by_search_input, 
+            search_input, start, end, count_mode=count_mode, search_mode=search_mode, fields=fields
+        )
+        if not success:
+            return False, message
+        return True, {"message": message, "books": books, "count": total_count, "count_exact": count_exact}
+
+    success, content = await cached_response("books-search", params, compute, version)
+    if not success:
+        raise HTTPException(status_code=404, detail=content)
+    return FastJSONResponse(content, headers={"ETag": etag} if etag else None)
 
-@app.get("/books/users/by-search-input/{search_input}")
-def search_books_with_login(current_user: Annotated[dict, Depends(get_current_user)], search_input: str, start: int = 1, end: int = 10):
+@app.get("/books/users/by-search-input/{search_input}", response_model=BookSearchPage)
+async def search_books_with_login(
+        current_user: Annotated[dict, Depends(get_current_user)], 
+        search_input: str, 
+        start: int = 1, 
+        end: int = 10, 
+        count_mode: CountMode = "estimated", 
+        search_mode: str = "full_text",
+        fields: Optional[str] = None
+    ):
     if not current_user:
         return HTTPException(status_code=403, detail="Invalid Authorization")
-    success, message, books, total_count = retrieve_book_by_search_input(search_input, start, end, current_user["email"])
+    check_fields(fields)
+    success, message, books, total_count, count_exact = await run_service(
+        retrieve_book_by_search_input, async_book_services.retrieve_book_by_search_input, 
+        search_input, start, end, current_user["email"], count_mode=count_mode, search_mode=search_mode, fields=fields
+    )
     if not success:
         raise HTTPException(status_code=404, detail=message)
-    return {"message": message, "books": books, "count": total_count}
+    return FastJSONResponse({"message": message, "books": books, "count": total_count, "count_exact": count_exact})
 
-@app.get("/books/users/liked-books")
-def get_liked_books(current_user: Annotated[dict, Depends(get_current_user)], start: int, end: int):
+@app.get("/books/users/liked-books", response_model=LikedBooksPage)
+async def get_liked_books(
+        current_user: Annotated[dict, Depends(get_current_user)], 
+        start: int, 
+        end: int, 
+        fields: Optional[str] = None
+    ):
     if not current_user:
         return HTTPException(status_code=403, detail="Invalid Authorization")
-    success, message, liked_books, total_count = retrieve_liked_books_for_user(current_user["email"], start, end)
+    check_fields(fields)
+    success, message, liked_books, total_count = await run_service(
+        retrieve_liked_books_for_user, async_book_services.retrieve_liked_books_for_user, current_user["email"], start, end, fields
+    )
     if not success:
         raise HTTPException(status_code=404, detail=message)
-    return {"message": message, "liked_books": liked_books, "count": total_count}
+    return FastJSONResponse({"message": message, "liked_books": liked_books, "count": total_count})
+
+@app.post("/books/liked-status")
+async def get_liked_status(request: LikedStatusRequest, current_user: Annotated[dict, Depends(get_current_user)]):
+    if not current_user:
+        return HTTPException(status_code=403, detail="Invalid Authorization")
+    success, message, liked = await run_service(
+        retrieve_liked_status, async_book_services.retrieve_liked_status, current_user["email"], request.book_ids
+    )
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    return {"message": message, "liked": liked}
 
 @app.post("/books/like/{book_id}")
 def add_liked_book(book_id: str, current_user: Annotated[dict, Depends(get_current_user)]):
@@ -130,6 +317,15 @@ def add_liked_book(book_id: str, current_user: Annotated[dict, Depends(get_curre
         raise HTTPException(status_code=404, detail=message)
     return {"message": message}
 
+@app.post("/books/likes/bulk")
+def bulk_update_liked_books(request: BulkLikeRequest, current_user: Annotated[dict, Depends(get_current_user)]):
+    if not current_user:
+        return HTTPException(status_code=403, detail="Invalid Authorization")
+    success, message, results = apply_liked_book_operations(current_user["email"], request.operations)
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    return {"message": message, "results": results}
+
 @app.delete("/books/remove-like/{book_id}")
 def delete_liked_book(book_id: str, current_user: Annotated[dict, Depends(get_current_user)]):
     if not current_user:
@@ -171,17 +367,21 @@ def delete_book_route(book_id: int, current_user: Annotated[dict, Depends(get_cu
 
 # HERE YOU WORK
 @app.get("/authors")
-def get_authors(current_user: Annotated[dict, Depends(get_current_user)]):
+async def get_authors(current_user: Annotated[dict, Depends(get_current_user)]):
     if not current_user:
         return HTTPException(status_code=403, detail="Invalid Authorization")
-    return retrieve_authors_from_db()
-
-@app.get("/authors/{author_id}")
-def get_author(author_id: int):
-    success, message, author = retrieve_single_author(author_id)
+    return await run_service(retrieve_authors_from_db, async_author_services.retrieve_authors_from_db)
+
+@app.get("/authors/{author_id}", response_model=AuthorResponse)
+async def get_author(author_id: int, if_none_match: Optional[str] = Header(None)):
+    if if_none_match:
+        success, message, updated_at = await run_service(retrieve_author_version, async_author_services.retrieve_author_version, author_id)
+        if success and etag_matches(if_none_match, row_etag("author", author_id, updated_at)):
+            return not_modified(row_etag("author", author_id, updated_at))
+    success, message, author = await run_service(retrieve_single_author, async_author_services.retrieve_single_author, author_id)
     if not success:
         raise HTTPException(status_code=400, detail=message)
-    return {"message": message, "author": author}
+    return FastJSONResponse({"message": message, "author": author}, headers={"ETag": row_etag("author", author_id, author["updated_at"])})
 
 #@ADMIN ONLY
 @app.post("/authors")
@@ -220,12 +420,16 @@ def add_user(user: User):
         raise HTTPException(status_code=400, detail=message)
     return {"message": message, "user": user.email}
 
-@app.post("/users/login")
+@app.post("/users/login", response_model=LoginResponse)
 async def auth_user(login_data: Login):
-    auth, message = authenticate_user(login_data.username, login_data.password)
+    auth, message = await run_service(
+        authenticate_user, async_user_services.authenticate_user, login_data.username, login_data.password
+    )
     if not auth:
-        return HTTPException(status_code=401, detail=message)
-    success, message, user_info = retrieve_single_user(login_data.username)
+        raise HTTPException(status_code=401, detail=message)
+    success, message, user_info = await run_service(
+        retrieve_single_user, async_user_services.retrieve_single_user, login_data.username
+    )
     if not success:
         raise HTTPException(status_code=400, detail=message)
 
@@ -240,19 +444,19 @@ async def auth_user(login_data: Login):
         "user_info": user_info
     }
 
-@app.get("/users")
+@app.get("/users", response_model=UserList)
 def get_user(current_user: Annotated[dict, Depends(get_current_user)]):
     if not current_user or current_user["role"] != 1:
-        return HTTPException(status_code=403, detail="Invalid Authorization")
+        raise HTTPException(status_code=403, detail="Invalid Authorization")
     success, message, all_users = retrieve_all_users()
     if not success:
         raise HTTPException(status_code=400, detail=message)
     return {"message": message, "users": all_users}
 
-@app.get("/users/me")
+@app.get("/users/me", response_model=UserResponse)
 def get_user(current_user: Annotated[dict, Depends(get_current_user)]):
     if not current_user:
-        return HTTPException(status_code=403, detail="Invalid Authorization")
+        raise HTTPException(status_code=403, detail="Invalid Authorization")
     return {"user": current_user}
 
 @app.put("/users/me")
@@ -270,26 +474,120 @@ async def update_user(user_update: UserUpdateCurrent, current_user: Annotated[di
     )
     return {"message": message, "token": access_token}
 
-@app.get("/recommendations")
-def get_recommendations(current_user: Annotated[dict, Depends(get_current_user)]):
+@app.get("/recommendations", response_model=RecommendationsPage)
+def get_recommendations(
+        current_user: Annotated[dict, Depends(get_current_user)],
+        limit: int = Query(default=RECOMMENDATIONS_LIMIT, ge=1, le=100),
+        fields: Optional[str] = "card",
+        mode: str = "collaborative"
+    ):
     if not current_user:
         return HTTPException(status_code=403, detail="Invalid Authorization")
+    check_fields(fields)
     email = current_user["email"]
-    success, message, book_recommendations = get_book_recommendations(email)
+    success, message, book_recommendations, source = get_book_recommendations(email, limit, fields, mode)
     if not success:
         raise HTTPException(status_code=400, detail=message)
-    return {"message": message, "book_recommendations": book_recommendations}
+    return FastJSONResponse({"message": message, "book_recommendations": book_recommendations, "source": source})
 
 @app.post("/llm_recommendation")
 def get_response(message: UserMessage):
-    inputs = {"query": message.user_message}
-    response_generator = assistant.invoke(inputs)
-    return {"llm_response": response_generator["response"]}
-
+    inputs = {"query": message.user_message, "session_id": message.session_id}
+    response_generator = get_assistant().invoke(inputs)
+    return {"llm_response": response_generator["response"], "session_id": message.session_id}
+
+
+@app.post("/llm_recommendation/stream")
+async def stream_response(message: UserMessage):
+    # Imported here so LangChain still loads on first use.
+    from app.llm_workflow.streaming import stream_assistant
+    return StreamingResponse(
+        stream_assistant({"query": message.user_message, "session_id": message.session_id}),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/healthcheck")
 def health_check():
     return True
 
+@app.get("/readiness")
+def readiness():
+    ready, report = get_readiness()
+    return FastJSONResponse(report, status_code=200 if ready else 503)
+
+#@ADMIN ONLY
+@app.get("/admin/pool-stats")
+def pool_stats(current_user: Annotated[dict, Depends(get_current_user)]):
+    if not current_user or current_user["role"] != 1:
+        raise HTTPException(status_code=403, detail="Not Authorized")
+    return {"pools": get_pool_stats()}
+
+#@ADMIN ONLY
+@app.get("/admin/cache-stats")
+def cache_stats(current_user: Annotated[dict, Depends(get_current_user)]):
+    if not current_user or current_user["role"] != 1:
+        raise HTTPException(status_code=403, detail="Not Authorized")
+    return {"cache": get_cache_stats()}
+
+#@ADMIN ONLY
+@app.get("/admin/vector-sync")
+def vector_sync_stats(current_user: Annotated[dict, Depends(get_current_user)]):
+    if not current_user or current_user["role"] != 1:
+        raise HTTPException(status_code=403, detail="Not Authorized")
+    return {"vector_sync": get_vector_sync_stats()}
+
+#@ADMIN ONLY
+@app.post("/admin/catalog/import")
+def start_catalog_import(
+        request: CatalogImportRequest, 
+        background_tasks: BackgroundTasks, 
+        current_user: Annotated[dict, Depends(get_current_user)]
+    ):
+    if not current_user or current_user["role"] != 1:
+        raise HTTPException(status_code=403, detail="Not Authorized")
+    if get_import_status()["status"] == "running":
+        raise HTTPException(status_code=409, detail="An import is already running")
+    background_tasks.add_task(
+        run_catalog_import, request.path, request.file_format, request.chunk_size, request.resume
+    )
+    return {"message": "Catalog import started", "path": request.path}
+
+#@ADMIN ONLY
+@app.get("/admin/catalog/import")
+def catalog_import_status(current_user: Annotated[dict, Depends(get_current_user)]):
+    if not current_user or current_user["role"] != 1:
+        raise HTTPException(status_code=403, detail="Not Authorized")
+    return {"import": get_import_status()}
+
+#@ADMIN ONLY
+@app.post("/admin/warm-up")
+def start_admin_warm_up(
+        background_tasks: BackgroundTasks,
+        current_user: Annotated[dict, Depends(get_current_user)],
+        subsystems: str = "all"
+    ):
+    if not current_user or current_user["role"] != 1:
+        raise HTTPException(status_code=403, detail="Not Authorized")
+    try:
+        names = parse_subsystems(subsystems)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if get_warm_up_status()["status"] == "running":
+        raise HTTPException(status_code=409, detail="A warm-up is already running")
+    background_tasks.add_task(warm_up, names)
+    return {"message": "Warm-up started", "subsystems": names}
+
+@app.on_event("startup")
+def start_background_warm_up():
+    # Runs beside request handling, so /healthcheck and /books answer immediately.
+    if required_subsystems:
+        start_warm_up(required_subsystems)
+
+@app.on_event("shutdown")
+async def close_database_pools():
+    dispose_engines()
+    await dispose_async_engines()
+
 
 
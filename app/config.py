@@ -6,3 +6,78 @@ load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY', default="hassan's_super_secret_key_that_nobody_will_decode")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1
+
+# A full SQLAlchemy URL overrides the individual Postgres settings below.
+DATABASE_URL = os.getenv('DATABASE_URL')
+DB_USERNAME = os.getenv('DB_USERNAME', default="postgres")
+DB_PASSWORD = os.getenv('DB_PASSWORD', default="password")
+DB_HOST = os.getenv('DB_HOST', default="127.0.0.1")
+DB_PORT = os.getenv('DB_PORT', default="5432")
+DB_NAME = os.getenv('DB_NAME', default="test")
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', default="5"))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', default="10"))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', default="30"))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', default="1800"))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', default="true").lower() in ("1", "true", "yes")
+
+DB_ASYNC_MODE = os.getenv('DB_ASYNC_MODE', default="false").lower() in ("1", "true", "yes")
+
+FUZZY_SIMILARITY_THRESHOLD = float(os.getenv('FUZZY_SIMILARITY_THRESHOLD', default="0.5"))
+# Book ids per /books/liked-status request and operations per /books/likes/bulk request.
+MAX_BULK_LIKE_OPERATIONS = int(os.getenv('MAX_BULK_LIKE_OPERATIONS', default="1000"))
+
+# memory: per-process LRU with a TTL; redis: shared through CACHE_URL; none: disabled.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default="memory").lower()
+CACHE_URL = os.getenv('CACHE_URL', default="redis://127.0.0.1:6379/0")
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', default="300"))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', default="1024"))
+# Totals kept for count_mode=cached, one per distinct query (searches included).
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv('COUNT_CACHE_MAX_ENTRIES', default="1024"))
+# Seconds a process reuses the catalog version it read; writes from other processes
+# show up in its cache keys and ETags after at most this long.
+CATALOG_VERSION_TTL = float(os.getenv('CATALOG_VERSION_TTL', default="1"))
+
+# Trending: Bayesian-average rating with POPULARITY_PRIOR_VOTES pseudo-votes at the
+# catalog mean, plus POPULARITY_LIKE_WEIGHT * ln(1 + likes). Scores are refreshed
+# POPULARITY_REFRESH_DELAY seconds after a burst of writes.
+POPULARITY_PRIOR_VOTES = int(os.getenv('POPULARITY_PRIOR_VOTES', default="100"))
+POPULARITY_LIKE_WEIGHT = float(os.getenv('POPULARITY_LIKE_WEIGHT', default="0.25"))
+POPULARITY_REFRESH_DELAY = float(os.getenv('POPULARITY_REFRESH_DELAY', default="30"))
+
+# Item-to-item recommendations: app.utils.build_recommendations writes the top
+# RECOMMENDER_NEIGHBOURS similar books per liked book to RECOMMENDER_MODEL_PATH.
+RECOMMENDER_MODEL_PATH = os.getenv('RECOMMENDER_MODEL_PATH', default="item_neighbours.npz")
+RECOMMENDER_NEIGHBOURS = int(os.getenv('RECOMMENDER_NEIGHBOURS', default="50"))
+RECOMMENDATIONS_LIMIT = int(os.getenv('RECOMMENDATIONS_LIMIT', default="10"))
+# Books kept per genre for preference-based recommendations.
+GENRE_TOP_N = int(os.getenv('GENRE_TOP_N', default="200"))
+
+# Chroma store holding the book embeddings (also used by /books/{book_id}/similar).
+CHROMA_PERSIST_DIRECTORY = os.getenv('CHROMA_PERSIST_DIRECTORY', default="./chroma_db")
+CHROMA_COLLECTION_NAME = os.getenv('CHROMA_COLLECTION_NAME', default="langchain")
+EMBEDDING_MODEL_NAME = os.getenv('EMBEDDING_MODEL_NAME', default="all-MiniLM-L6-v2")
+# Embedding processes used by app.utils.build_vector_index.
+VECTOR_INDEX_WORKERS = int(os.getenv('VECTOR_INDEX_WORKERS', default=str(min(4, os.cpu_count() or 1))))
+# Book writes reach the collection in batches of up to VECTOR_SYNC_BATCH_SIZE, collected
+# for VECTOR_SYNC_DELAY seconds.
+VECTOR_SYNC_DELAY = float(os.getenv('VECTOR_SYNC_DELAY', default="2"))
+VECTOR_SYNC_BATCH_SIZE = int(os.getenv('VECTOR_SYNC_BATCH_SIZE', default="256"))
+# Events touching more books than this (catalog import chunks) are left to
+# app.utils.build_vector_index instead of being embedded inside the API process.
+VECTOR_SYNC_MAX_EVENT_BOOKS = int(os.getenv('VECTOR_SYNC_MAX_EVENT_BOOKS', default="1000"))
+# Memory for the chat retriever's query-embedding and result caches, split between them.
+RETRIEVAL_CACHE_MAX_BYTES = int(os.getenv('RETRIEVAL_CACHE_MAX_BYTES', default=str(32 * 1024 * 1024)))
+# Candidates each pass of /books/semantic-search contributes to the rank fusion.
+SEMANTIC_SEARCH_CANDIDATES = int(os.getenv('SEMANTIC_SEARCH_CANDIDATES', default="50"))
+# Subsystems loaded in the background at startup ("all" or a comma-separated list of
+# embeddings, vector_store, llm, assistant, book_embeddings, item_neighbours,
+# genre_rankings); /readiness waits for them. Anything not listed loads on first use.
+WARM_UP = os.getenv('WARM_UP', default="")
+# Chat history sent to the model: at most HISTORY_MAX_MESSAGES recent messages of the
+# session, trimmed further to about HISTORY_TOKEN_BUDGET tokens. The newest windows of up
+# to HISTORY_CACHED_SESSIONS sessions are kept in memory (0 disables the cache) and
+# checked against the session's newest message id before use.
+HISTORY_MAX_MESSAGES = int(os.getenv('HISTORY_MAX_MESSAGES', default="20"))
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', default="2000"))
+HISTORY_CACHED_SESSIONS = int(os.getenv('HISTORY_CACHED_SESSIONS', default="1024"))
@@ -1,9 +1,204 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from app.config import (
+    DATABASE_URL,
+    DB_USERNAME,
+    DB_PASSWORD,
+    DB_HOST,
+    DB_PORT,
+    DB_NAME,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
 
-def connect_to_db(username="postgres", password="password", host="127.0.0.1", port="5432", db_name="test"):
-    DATABASE_URL = f"postgresql+psycopg2://{username}:{password}@{host}:{port}/{db_name}"
-    engine = create_engine(DATABASE_URL)
-    Session = sessionmaker(bind=engine)
+class PoolStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, waited, timed_out=False):
+        with self.lock:
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if timed_out:
+                self.timeouts += 1
+
+    def increment(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self.lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "total_wait_seconds": round(self.total_wait, 6),
+                "avg_wait_seconds": round(self.total_wait / waits, 6) if waits else 0.0,
+                "max_wait_seconds": round(self.max_wait, 6),
+            }
+
+class InstrumentedQueuePool(QueuePool):
+    # QueuePool._do_get is where a checkout blocks when every connection is in use,
+    # so timing it gives the real time spent waiting on the pool.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - started)
+        return connection
+
+_registry_lock = threading.Lock()
+_engines = {}
+_async_engines = {}
+
+def build_database_url(username=None, password=None, host=None, port=None, db_name=None, driver="psycopg2"):
+    return "postgresql+{}://{}:{}@{}:{}/{}".format(
+        driver,
+        username or DB_USERNAME,
+        password or DB_PASSWORD,
+        host or DB_HOST,
+        port or DB_PORT,
+        db_name or DB_NAME,
+    )
+
+def _attach_pool_listeners(engine):
+    # engine.pool is looked up on every event because dispose() swaps in a fresh pool.
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        engine.pool.stats.increment("connects")
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        engine.pool.stats.increment("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        engine.pool.stats.increment("checkins")
+
+def get_engine(database_url=None):
+    database_url = database_url or DATABASE_URL or build_database_url()
+    engine_entry = _engines.get(database_url)
+    if engine_entry is not None:
+        return engine_entry
+    with _registry_lock:
+        engine_entry = _engines.get(database_url)
+        if engine_entry is None:
+            engine = create_engine(
+                database_url,
+                poolclass=InstrumentedQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=DB_POOL_PRE_PING,
+            )
+            _attach_pool_listeners(engine)
+            engine_entry = (engine, sessionmaker(bind=engine))
+            _engines[database_url] = engine_entry
+        return engine_entry
+
+def connect_to_db(username=None, password=None, host=None, port=None, db_name=None):
+    if DATABASE_URL and not any((username, password, host, port, db_name)):
+        engine, Session = get_engine(DATABASE_URL)
+    else:
+        engine, Session = get_engine(build_database_url(username, password, host, port, db_name))
     session = Session()
-    return engine, session
\ No newline at end of file
+    return engine, session
+
+def async_database_url():
+    if DATABASE_URL:
+        url = make_url(DATABASE_URL)
+        # Only Postgres URLs are moved onto asyncpg; other backends must name an async driver themselves.
+        if url.get_backend_name() == "postgresql":
+            url = url.set(drivername="postgresql+asyncpg")
+        return url.render_as_string(hide_password=False)
+    return build_database_url(driver="asyncpg")
+
+def get_async_engine(database_url=None):
+    database_url = database_url or async_database_url()
+    engine_entry = _async_engines.get(database_url)
+    if engine_entry is not None:
+        return engine_entry
+    with _registry_lock:
+        engine_entry = _async_engines.get(database_url)
+        if engine_entry is None:
+            engine = create_async_engine(
+                database_url,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=DB_POOL_PRE_PING,
+            )
+            engine_entry = (engine, async_sessionmaker(bind=engine, expire_on_commit=False))
+            _async_engines[database_url] = engine_entry
+        return engine_entry
+
+def connect_to_db_async(username=None, password=None, host=None, port=None, db_name=None):
+    if DATABASE_URL and not any((username, password, host, port, db_name)):
+        engine, AsyncSession = get_async_engine(async_database_url())
+    else:
+        engine, AsyncSession = get_async_engine(build_database_url(username, password, host, port, db_name, driver="asyncpg"))
+    session = AsyncSession()
+    return engine, session
+
+def get_pool_stats():
+    stats = []
+    for engine, _ in list(_engines.values()):
+        pool = engine.pool
+        stats.append({
+            "database": engine.url.render_as_string(hide_password=True),
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            **pool.stats.snapshot(),
+        })
+    for engine, _ in list(_async_engines.values()):
+        pool = engine.pool
+        stats.append({
+            "database": engine.url.render_as_string(hide_password=True),
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": DB_MAX_OVERFLOW,
+        })
+    return stats
+
+def dispose_engines():
+    with _registry_lock:
+        for engine, _ in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+async def dispose_async_engines():
+    with _registry_lock:
+        engines = [engine for engine, _ in _async_engines.values()]
+        _async_engines.clear()
+    for engine in engines:
+        await engine.dispose()
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, String, Integer, Text
+from sqlalchemy import Column, String, Integer, Text, DateTime, Index, func
 from app.database.schemas.base import Base
 
 class Author(Base):
     __tablename__ = 'authors'
     author_id = Column('author_id', Integer, primary_key=True, autoincrement=True)
     name = Column('name', String(500))
-    biography = Column('biography', Text)
\ No newline at end of file
+    biography = Column('biography', Text)
+    updated_at = Column('updated_at', DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+Index("ix_authors_name", Author.name)
@@ -1,6 +1,4 @@
 from sqlalchemy.orm import declarative_base
-from app.database.connector import connect_to_db
 
-engine, session = connect_to_db()
+# Models only need the metadata; engines are created by connect_to_db on first use.
 Base = declarative_base()
-
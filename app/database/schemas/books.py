@@ -1,6 +1,14 @@
-from sqlalchemy import Column, String, Integer, Text, Numeric
+from sqlalchemy import Column, String, Integer, Text, Numeric, Float, DateTime, Index, Computed, DDL, event, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from app.database.schemas.base import Base
 
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(author_name, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(genre, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
+
 class Book(Base):
     __tablename__ = 'books'
     book_id = Column("book_id", String(10), primary_key=True)
@@ -14,4 +22,28 @@ class Book(Base):
     rating = Column("rating", Numeric)
     num_pages = Column("num_pages", Numeric)
     ratings_count = Column("ratings_count", Numeric)
-    
\ No newline at end of file
+    # Trending score, maintained by app/services/popularity_services.py.
+    popularity_score = Column("popularity_score", Float)
+    search_vector = Column("search_vector", TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True))
+    updated_at = Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+def sort_key(column):
+    # NULLs sort as 0 so keyset cursors always compare against concrete values.
+    # The literal is inlined so the planner can match the expression indexes below.
+    return func.coalesce(column, literal_column("0"))
+
+Index("ix_books_popularity", sort_key(Book.popularity_score), Book.book_id)
+# Refills of the per-genre top lists (app/services/genre_rankings.py).
+Index("ix_books_genre_popularity", Book.genre, sort_key(Book.popularity_score).desc(), Book.book_id)
+Index("ix_books_year", sort_key(Book.year), Book.book_id)
+Index("ix_books_rating", sort_key(Book.rating), Book.book_id)
+Index("ix_books_updated_at", Book.updated_at, Book.book_id)
+Index("ix_books_search_vector", Book.search_vector, postgresql_using="gin")
+Index("ix_books_title_trgm", Book.title, postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"})
+Index("ix_books_author_name_trgm", Book.author_name, postgresql_using="gin", postgresql_ops={"author_name": "gin_trgm_ops"})
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger, String
+from app.database.schemas.base import Base
+
+class CatalogVersion(Base):
+    # A single row, bumped on every catalog write by any process (API workers, CLI
+    # imports, the popularity cron).
+    __tablename__ = 'catalog_version'
+    id = Column("id", Integer, primary_key=True)
+    version = Column("version", BigInteger, nullable=False, default=0)
+    # Bumped when only popularity scores changed; only trending pages depend on it.
+    ranking_version = Column("ranking_version", BigInteger, nullable=False, default=0, server_default="0")
+    # Set when the row is created, so versions restarting after a rebuilt database
+    # never repeat an old tag.
+    epoch = Column("epoch", String(8), nullable=False)
@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Text, Integer, String
+from sqlalchemy import Column, Text, Integer, String, Index
 from app.database.schemas.base import Base
 
+DEFAULT_SESSION_ID = "default"
+
 class MessageHistory(Base):
     __tablename__ = 'message_history'
     id =  Column('id', Integer, primary_key=True, autoincrement=True)
+    # Conversation the message belongs to; rows written before sessions existed share "default".
+    session_id = Column('session_id', String(64), nullable=False, server_default=DEFAULT_SESSION_ID)
     messages = Column('messages', Text)
-    role = Column('role', String(7))
\ No newline at end of file
+    role = Column('role', String(7))
+
+# Last-N reads of one conversation: WHERE session_id = ? ORDER BY id DESC LIMIT N.
+Index("ix_message_history_session", MessageHistory.session_id, MessageHistory.id)
@@ -0,0 +1,19 @@
+import threading
+
+# The chat graph pulls in LangChain, LangGraph and the model clients, so it is only
+# imported when the assistant is first used (or warmed up).
+
+_assistant = None
+_assistant_lock = threading.Lock()
+
+def get_assistant():
+    global _assistant
+    if _assistant is None:
+        with _assistant_lock:
+            if _assistant is None:
+                from app.llm_workflow.workflow import assistant
+                _assistant = assistant
+    return _assistant
+
+def assistant_loaded():
+    return _assistant is not None
@@ -1,22 +1,24 @@
+import threading
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_ollama import OllamaLLM
-from langchain.callbacks.base import BaseCallbackHandler
-from langchain.callbacks.manager import CallbackManager
-
-class StreamingGeneratorCallbackHandler(BaseCallbackHandler):
-    def __init__(self):
-        self.tokens = []
-
-    def on_llm_new_token(self, token: str, *, chunk= None, run_id, parent_run_id = None, **kwargs):
-        self.tokens.append(token)
-
-callback_handler = StreamingGeneratorCallbackHandler()
-callback_manager = CallbackManager([callback_handler])
-
-model = OllamaLLM(model="llama3.1:8b", callback_manager=callback_manager, temperature=0)
 
 prompt = ChatPromptTemplate.from_messages(
     [MessagesPlaceholder(variable_name="system_message"), MessagesPlaceholder(variable_name="human_messages")]
 )
 
-chain = prompt| model
\ No newline at end of file
+# The Ollama client is built on first use.
+_chain = None
+_chain_lock = threading.Lock()
+
+def get_chain():
+    global _chain
+    if _chain is None:
+        with _chain_lock:
+            if _chain is None:
+                from langchain_ollama import OllamaLLM
+                # Callbacks (e.g. token streaming) are passed per request through the run config.
+                model = OllamaLLM(model="llama3.1:8b", temperature=0)
+                _chain = prompt | model
+    return _chain
+
+def chain_loaded():
+    return _chain is not None
@@ -0,0 +1,116 @@
+import hashlib
+import re
+import sys
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from app.config import RETRIEVAL_CACHE_MAX_BYTES
+from app.llm_workflow.vector_store import get_embeddings, get_vectorstore
+from app.services.response_cache import CacheStats
+from app.services.similarity_services import collection_mtime
+
+# Caches in front of the Chroma retriever used by the chat assistant:
+#   normalised query -> query embedding   (skips the embedding model)
+#   query embedding  -> top-k document ids (skips the vector search)
+# Both are LRUs bounded by the bytes they hold. Cached ids are dropped whenever the
+# collection changes on disk; embeddings only depend on the model, so they are kept.
+
+DEFAULT_K = 4
+
+def normalise_query(query: str):
+    # Case, punctuation and spacing differences map to the same entry.
+    text = unicodedata.normalize("NFKC", query or "").casefold()
+    return " ".join(re.sub(r"[^\w']+", " ", text).split())
+
+class SizedLRU:
+    def __init__(self, max_bytes: int):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats = CacheStats()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats.increment("misses")
+                return None
+            self.entries.move_to_end(key)
+        self.stats.increment("hits")
+        return entry[0]
+
+    def set(self, key, value, size: int):
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes and self.entries:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+                self.stats.increment("evictions")
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+        self.stats.increment("invalidations")
+
+    def snapshot(self):
+        return {"entries": len(self.entries), "bytes": self.size, **self.stats.snapshot()}
+
+class CachedRetriever:
+    def __init__(self, get_embeddings, get_store, max_bytes=RETRIEVAL_CACHE_MAX_BYTES):
+        # Factories rather than instances: the model and the store load on first use.
+        self.get_embeddings = get_embeddings
+        self.get_store = get_store
+        self.query_embeddings = SizedLRU(max_bytes // 2)
+        self.results = SizedLRU(max_bytes // 2)
+        self.version = None
+        self.version_lock = threading.Lock()
+
+    def check_version(self):
+        version = collection_mtime()
+        with self.version_lock:
+            if version != self.version:
+                if self.version is not None:
+                    self.results.clear()
+                self.version = version
+
+    def embed(self, query: str):
+        key = normalise_query(query)
+        embedding = self.query_embeddings.get(key)
+        if embedding is None:
+            embedding = np.asarray(self.get_embeddings().embed_query(query), dtype=np.float32)
+            self.query_embeddings.set(key, embedding, embedding.nbytes + sys.getsizeof(key))
+        return embedding
+
+    def invoke(self, query: str, k: int = DEFAULT_K):
+        from langchain_core.documents import Document
+        self.check_version()
+        embedding = self.embed(query)
+        key = (hashlib.sha1(embedding.tobytes()).hexdigest(), k)
+        document_ids = self.results.get(key)
+        collection = self.get_store()._collection
+        if document_ids is None:
+            found = collection.query(query_embeddings=[embedding.tolist()], n_results=k, include=["documents", "metadatas"])
+            # Chroma can return more than n_results after deletes; keep the best k.
+            document_ids = found["ids"][0][:k]
+            self.results.set(key, document_ids, sum(sys.getsizeof(document_id) for document_id in document_ids) + 64)
+            return [
+                Document(page_content=document, metadata=metadata or {})
+                for document, metadata in zip(found["documents"][0][:k], found["metadatas"][0][:k])
+            ]
+        found = collection.get(ids=document_ids, include=["documents", "metadatas"])
+        by_id = {document_id: (document, metadata) for document_id, document, metadata in zip(found["ids"], found["documents"], found["metadatas"])}
+        return [
+            Document(page_content=by_id[document_id][0], metadata=by_id[document_id][1] or {})
+            for document_id in document_ids if document_id in by_id
+        ]
+
+    def snapshot(self):
+        return {"query_embeddings": self.query_embeddings.snapshot(), "results": self.results.snapshot()}
+
+cached_retriever = CachedRetriever(get_embeddings, get_vectorstore)
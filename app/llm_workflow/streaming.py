@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import orjson
+from langchain_core.callbacks import BaseCallbackHandler
+from app.llm_workflow.assistant import get_assistant
+
+# Server-Sent Events for the assistant. Each request gets its own callback handler
+# and queue: the graph runs in a worker thread, tokens are handed to the event loop
+# as the model produces them, and a client disconnect stops the generation.
+
+# Runs tagged with this (intent classification) are routing, not part of the answer.
+INTERNAL_TAG = "internal"
+
+class StreamCancelled(Exception):
+    pass
+
+class TokenQueueHandler(BaseCallbackHandler):
+    # Raising from a handler only aborts the run when raise_error is set.
+    raise_error = True
+
+    def __init__(self, loop, events: asyncio.Queue):
+        self.loop = loop
+        self.events = events
+        self.cancelled = threading.Event()
+        self.internal_runs = set()
+
+    def put(self, event, data=None):
+        self.loop.call_soon_threadsafe(self.events.put_nowait, (event, data))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, tags=None, **kwargs):
+        if INTERNAL_TAG in (tags or ()):
+            self.internal_runs.add(run_id)
+
+    def on_llm_new_token(self, token: str, *, run_id, **kwargs):
+        if self.cancelled.is_set():
+            raise StreamCancelled()
+        if token and run_id not in self.internal_runs:
+            self.put("token", {"token": token})
+
+def format_event(event: str, data):
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+async def stream_assistant(inputs):
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    handler = TokenQueueHandler(loop, events)
+
+    def run():
+        try:
+            result = get_assistant().invoke(inputs, config={"callbacks": [handler]})
+            handler.put("done", {"response": result.get("response"), "intent": result.get("intent"), "session_id": inputs["session_id"]})
+        except StreamCancelled:
+            pass
+        except Exception as e:
+            print(e)
+            handler.put("error", {"detail": str(e)})
+        finally:
+            handler.put(None)
+
+    loop.run_in_executor(None, run)
+    try:
+        while True:
+            event, data = await events.get()
+            if event is None:
+                break
+            yield format_event(event, data)
+    finally:
+        # Reached on normal completion and when the response is cancelled because the
+        # client went away; the next token the model sends then aborts the run.
+        handler.cancelled.set()
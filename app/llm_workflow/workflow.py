@@ -9,8 +9,9 @@ from app.llm_workflow.llm_utils import (
     ADD_BOOK_SYSTEM_PROMPT,
     parse_db_output
 )
-from app.llm_workflow.llm import chain
-from app.llm_workflow.vector_store import base_retriever
+from app.llm_workflow.llm import get_chain
+from app.llm_workflow.streaming import INTERNAL_TAG
+from app.llm_workflow.retrieval_cache import cached_retriever
 from langchain_core.messages import (
     SystemMessage, 
     HumanMessage, 
@@ -18,86 +19,84 @@ from langchain_core.messages import (
 from app.services.llm_services import get_message_history, append_to_history
 from app.database.schemas.books import Book
 from app.database.connector import connect_to_db
+from app.services.catalog_events import publish, BOOK_ADDED
 
 class StateSchema(TypedDict):
     response: Optional[str]
     query: Optional[str]
     intent: Optional[str]
+    session_id: str
+    # The session's recent messages, read once by get_intent for every node of the run.
+    history: Optional[list]
 
 workflow = StateGraph(StateSchema)
 
+def get_session_id(state):
+    # Callers always pass one; there is no shared fallback conversation.
+    return state['session_id']
+
 def get_intent_node(state):
     query = state.get('query', '').strip()
-    success, history = get_message_history(limit=None)
+    success, history = get_message_history(get_session_id(state))
     if not success:
         history = []
     model_input = {
         "system_message": [SystemMessage(content=INTENT_SYSTEM_PROMPT)],
         "human_messages": history + [HumanMessage(content=query)]
     }
-    output = chain.invoke(model_input)
-    append_to_history(query, 'human')
-    append_to_history(output, 'ai')
-    return {"intent": output}
+    output = get_chain().invoke(model_input, config={"tags": [INTERNAL_TAG]})
+    # Only the answering node records the exchange; the classification is not part of it.
+    return {"intent": output, "history": history}
 
 def greeting_node(state):
     query = state.get('query', '').strip()
-    success, history = get_message_history(limit=None)
-    if not success:
-        history = []
+    history = state.get('history') or []
     model_input = {
         "system_message": [SystemMessage(content=GREETING_SYSTEM_PROMPT)],
         "human_messages": history + [HumanMessage(content=query)]
     }
-    output = chain.invoke(model_input)
-    append_to_history(query, 'human')
-    append_to_history(output, 'ai')
+    output = get_chain().invoke(model_input)
+    append_to_history(get_session_id(state), [(query, 'human'), (output, 'ai')])
     return {"response": output}
 
 def book_recommendation_node(state):
     query = state.get('query', '').strip()
-    query_with_context = query + f" Here is some context. Choose ONLY from the following books {parse_db_output(base_retriever.invoke(query))}"
+    context = parse_db_output(cached_retriever.invoke(query))
+    query_with_context = query + f" Here is some context. Choose ONLY from the following books {context}"
     print("*"*50)
-    print(parse_db_output(base_retriever.invoke(query)))
+    print(context)
     print("*"*50)
-    success, history = get_message_history(limit=None)
-    if not success:
-        history = []
+    history = state.get('history') or []
     model_input = {
         "system_message": [SystemMessage(content=RECOMMENDATION_SYSTEM_PROMPT)],
         "human_messages": history + [HumanMessage(content=query_with_context)]
     }
-    output = chain.invoke(model_input)
-    append_to_history(query_with_context, 'human')
-    append_to_history(output, 'ai')
+    output = get_chain().invoke(model_input)
+    # The retrieved context is not stored: the answer already lists the chosen books,
+    # and the context would take most of the history's token budget.
+    append_to_history(get_session_id(state), [(query, 'human'), (output, 'ai')])
     return {"response": output}
 
 def book_chat_node(state):
     query = state.get('query', '').strip()
-    success, history = get_message_history(limit=None)
-    if not success:
-        history = []
+    history = state.get('history') or []
     model_input = {
         "system_message": [SystemMessage(content=CHAT_SYSTEM_PROMPT)],
         "human_messages": history + [HumanMessage(content=query)]
     }
-    output = chain.invoke(model_input)
-    append_to_history(query, 'human')
-    append_to_history(output, 'ai')
+    output = get_chain().invoke(model_input)
+    append_to_history(get_session_id(state), [(query, 'human'), (output, 'ai')])
     return {"response": output}
 
 def book_summary_node(state):
     query = state.get('query', '').strip()
-    success, history = get_message_history(limit=None)
-    if not success:
-        history = []
+    history = state.get('history') or []
     model_input = {
         "system_message": [SystemMessage(content=SUMMARY_SYSTEM_PROMPT)],
         "human_messages": history + [HumanMessage(content=query)]
     }
-    output = chain.invoke(model_input)
-    append_to_history(query, 'human')
-    append_to_history(output, 'ai')
+    output = get_chain().invoke(model_input)
+    append_to_history(get_session_id(state), [(query, 'human'), (output, 'ai')])
     return {"response": output}
 
 def insert_book_in_db(book: dict):
@@ -119,6 +118,7 @@ def insert_book_in_db(book: dict):
         session.add(to_add)
         session.commit()
         book_id = to_add.book_id
+        publish(BOOK_ADDED, [book_id])
         return True, "Book added Successfully", book_id
     except Exception as e:
         session.rollback()
@@ -128,14 +128,12 @@ def insert_book_in_db(book: dict):
 
 def add_book_node(state):
     query = state.get('query', '').strip()
-    success, history = get_message_history(limit=None)
-    if not success:
-        history = []
+    history = state.get('history') or []
     model_input = {
         "system_message": [SystemMessage(content=ADD_BOOK_SYSTEM_PROMPT)],
         "human_messages": history + [HumanMessage(content=query)]
     }
-    output = chain.invoke(model_input)
+    output = get_chain().invoke(model_input)
     try:
         book = eval(output)
         print(book)
@@ -147,8 +145,7 @@ def add_book_node(state):
     except Exception as e:
         print(e)
 
-    append_to_history(query, 'human')
-    append_to_history(output, 'ai')
+    append_to_history(get_session_id(state), [(query, 'human'), (output, 'ai')])
     return {"response": output}
 
 def node_transition(state):
@@ -194,7 +191,7 @@ if __name__ == "__main__":
         if user_input.lower() in ["quit", "exit", "q"]:
             print("Goodbye!")
             break
-        inputs = {"query": user_input}
+        inputs = {"query": user_input, "session_id": "cli"}
         for event in assistant.stream(inputs, stream_mode="values"):
             if event.get('response', '') != '':
                 print("*"*50)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
 
@@ -9,3 +10,13 @@ class Author(BaseModel):
 class AuthorUpdateCurrent(BaseModel):
     name: Optional[str] = None
     biography: Optional[str] = None
+
+class AuthorOut(BaseModel):
+    author_id: int
+    name: Optional[str] = None
+    biography: Optional[str] = None
+    updated_at: datetime
+
+class AuthorResponse(BaseModel):
+    message: str
+    author: AuthorOut
@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+from app.config import MAX_BULK_LIKE_OPERATIONS
 
 class Book(BaseModel):
     book_id: str
@@ -7,7 +9,7 @@ class Book(BaseModel):
     subtitle: str
     thumbnail: str
     author_id: int
-    author_name: int
+    author_name: str
     genre: str
     description: str
     year: int
@@ -21,10 +23,81 @@ class BookUpdateCurrent(BaseModel):
     subtitle: Optional[str] = None
     thumbnail: Optional[str] = None
     author_id: Optional[int] = None
-    author_name: Optional[int] = None
+    author_name: Optional[str] = None
     genre: Optional[str] = None
     description: Optional[str] = None
     year: Optional[int] = None
     rating: Optional[float] = None
     num_pages: Optional[int] = None
-    ratings_count: Optional[int] = None
\ No newline at end of file
+    ratings_count: Optional[int] = None
+
+class LikedStatusRequest(BaseModel):
+    book_ids: List[str] = Field(max_length=MAX_BULK_LIKE_OPERATIONS)
+
+class LikeOperation(BaseModel):
+    book_id: str
+    action: Literal["like", "unlike"]
+
+class BulkLikeRequest(BaseModel):
+    operations: List[LikeOperation] = Field(max_length=MAX_BULK_LIKE_OPERATIONS)
+
+# The read routes return FastJSONResponse directly, so the page models below document
+# the OpenAPI schema but are not applied to responses; the endpoint tests validate
+# responses against them instead.
+class BookFields(BaseModel):
+    book_id: str
+    title: Optional[str] = None
+    author_name: Optional[str] = None
+    subtitle: Optional[str] = None
+    thumbnail: Optional[str] = None
+    genre: Optional[str] = None
+    description: Optional[str] = None
+    year: Optional[int] = None
+    average_rating: Optional[float] = None
+    num_pages: Optional[int] = None
+    ratings_count: Optional[int] = None
+
+class BookOut(BookFields):
+    # List routes return only the requested fields (see `fields=`); book_id is always present.
+    description_snippet: Optional[str] = None
+    liked: int = 0
+
+class BookDetail(BookFields):
+    updated_at: datetime
+
+class BookResponse(BaseModel):
+    message: str
+    book: BookDetail
+
+class BookSearchPage(BaseModel):
+    message: str
+    books: List[BookOut]
+    count: Optional[int] = None
+    count_exact: Optional[bool] = None
+
+class BookPage(BookSearchPage):
+    next_cursor: Optional[str] = None
+
+class LikedBooksPage(BaseModel):
+    message: str
+    liked_books: List[BookOut]
+    count: int
+
+
+class RecommendationsPage(BaseModel):
+    message: str
+    book_recommendations: List[BookOut]
+    # liked_books (neighbours of the user's likes), because_you_liked, preferences or trending
+    source: str
+
+class SimilarBooksPage(BaseModel):
+    message: str
+    books: List[BookOut]
+
+class ScoredBookOut(BookOut):
+    # Reciprocal rank fusion score of the full-text and embedding rankings.
+    score: float
+
+class SemanticSearchPage(BaseModel):
+    message: str
+    books: List[ScoredBookOut]
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class CatalogImportRequest(BaseModel):
+    path: str
+    file_format: Optional[str] = None
+    chunk_size: int = 50000
+    resume: bool = True
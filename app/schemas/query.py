@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+import uuid
+from pydantic import BaseModel, Field
 
 class UserMessage(BaseModel):
-    user_message: str
\ No newline at end of file
+    user_message: str
+    # Conversation to continue. Without one the request starts a new conversation under
+    # a generated id, returned in the response, so separate clients never share a history.
+    session_id: str = Field(default_factory=lambda: uuid.uuid4().hex, min_length=1, max_length=64)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 class User(BaseModel):
     fname: str
@@ -14,3 +14,21 @@ class UserUpdateCurrent(BaseModel):
     password: Optional[str] = None
 
 
+
+class UserOut(BaseModel):
+    email: str
+    fname: Optional[str] = None
+    lname: Optional[str] = None
+    role: int
+
+class UserResponse(BaseModel):
+    user: UserOut
+
+class UserList(BaseModel):
+    message: str
+    users: List[UserOut]
+
+class LoginResponse(BaseModel):
+    access_token: str
+    token_type: str
+    user_info: UserOut
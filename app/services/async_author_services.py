@@ -0,0 +1,42 @@
+from app.database.connector import get_async_engine
+from app.services.author_services import (
+    build_single_author_stmt,
+    build_authors_stmt,
+    build_author_version_stmt,
+    parse_author,
+)
+
+async def retrieve_single_author(id):
+    try:
+        engine, _ = get_async_engine()
+        async with engine.connect() as conn:
+            results = await conn.execute(build_single_author_stmt(id))
+            output = results.fetchone()
+            if output:
+                return True, "Author successfully retrieved", parse_author(output)
+            else:
+                return False, "Author could not be retrieved", None
+    except Exception as e:
+        return False, e, None
+
+async def retrieve_author_version(id):
+    try:
+        engine, _ = get_async_engine()
+        async with engine.connect() as conn:
+            updated_at = (await conn.execute(build_author_version_stmt(id))).scalar()
+            if updated_at:
+                return True, "Author version retrieved", updated_at
+            else:
+                return False, "Author could not be retrieved", None
+    except Exception as e:
+        return False, e, None
+
+async def retrieve_authors_from_db(page: int = 1, per_page: int = 10):
+    try:
+        engine, _ = get_async_engine()
+        async with engine.connect() as conn:
+            results = await conn.execute(build_authors_stmt(page, per_page))
+            authors = [parse_author(result) for result in results.fetchall()]
+        return True, "Authors successfully retrieved", authors
+    except Exception as e:
+        return False, e, None
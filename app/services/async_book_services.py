@@ -0,0 +1,127 @@
+from sqlalchemy import literal_column
+from app.database.connector import get_async_engine
+from app.services.count_services import fetch_page_with_count_async
+from app.services.book_services import (
+    build_books_stmt,
+    build_books_keyset_stmt,
+    next_page_cursor,
+    books_source_stmt,
+    books_cache_key,
+    search_cache_key,
+    build_search_stmt,
+    set_fuzzy_threshold,
+    build_single_book_stmt,
+    build_book_version_stmt,
+    build_liked_books_stmt,
+    build_liked_status_stmt,
+    liked_column,
+    parse_fields,
+    project_page,
+    parse_output,
+    parse_single_book,
+    parse_liked_status,
+)
+
+async def retrieve_liked_books_for_user(email: str, start: int = 0, end: int = 12, fields=None):
+    try:
+        engine, _ = get_async_engine()
+        keys = parse_fields(fields)
+        stmt = build_liked_books_stmt(email)
+        page_stmt = project_page(stmt, keys, literal_column("1").label("liked")).offset(start).limit(end - start)
+        async with engine.connect() as conn:
+            results, total_count, _ = await fetch_page_with_count_async(conn, stmt, page_stmt, "window")
+        if total_count:
+            return True, "Books retrieved successfully", parse_output(results, keys), total_count
+        else:
+            return False, "No liked books found for the user", None, 0
+    except Exception as e:
+        return False, str(e), None, 0
+
+async def retrieve_liked_status(email: str, book_ids):
+    try:
+        engine, _ = get_async_engine()
+        async with engine.connect() as conn:
+            results = (await conn.execute(build_liked_status_stmt(email, book_ids))).scalars().all()
+        return True, "Liked status retrieved successfully", parse_liked_status(book_ids, results)
+    except Exception as e:
+        return False, str(e), None
+
+async def retrieve_book_by_search_input(
+        search_input: str, 
+        start: int = 0, 
+        end: int = 10, 
+        email=None, 
+        count_mode="estimated", 
+        search_mode="full_text",
+        fields=None
+    ):
+    try:
+        engine, _ = get_async_engine()
+        keys = parse_fields(fields)
+        stmt = build_search_stmt(search_input, search_mode)
+        async with engine.connect() as conn:
+            if search_mode == "fuzzy":
+                await set_fuzzy_threshold(conn)
+            page_stmt = project_page(stmt, keys, liked_column(email)).offset(start).limit(end - start)
+            results, total_count, count_exact = await fetch_page_with_count_async(
+                conn, stmt, page_stmt, count_mode, search_cache_key(search_input, search_mode)
+            )
+        parsed_results = parse_output(results, keys)
+
+        if len(parsed_results) > 0:
+            return True, "Books retrieved successfully", parsed_results, total_count, count_exact
+        else:
+            return False, "Could not retrieve books", None, 0, True
+    except Exception as e:
+        return False, str(e), None, 0, None
+
+async def retrieve_single_book(id):
+    try:
+        engine, _ = get_async_engine()
+        async with engine.connect() as conn:
+            results = await conn.execute(build_single_book_stmt(id))
+            output = results.fetchone()
+            if output:
+                return True, "Book retreived successfully", parse_single_book(output)
+            else:
+                return False, "Error ocurred", None
+    except Exception as e:
+        return False, e, None
+
+async def retrieve_book_version(id):
+    try:
+        engine, _ = get_async_engine()
+        async with engine.connect() as conn:
+            updated_at = (await conn.execute(build_book_version_stmt(id))).scalar()
+            if updated_at:
+                return True, "Book version retrieved", updated_at
+            else:
+                return False, "Error ocurred", None
+    except Exception as e:
+        return False, e, None
+
+async def fetch_books_page(stmt, limit: int, order_by=None, email=None, count_mode="cached", fields=None):
+    engine, _ = get_async_engine()
+    keys = parse_fields(fields)
+    page_stmt = project_page(stmt, keys, liked_column(email), order_by)
+    async with engine.connect() as conn:
+        results, total_count, count_exact = await fetch_page_with_count_async(
+            conn, books_source_stmt, page_stmt, count_mode, books_cache_key
+        )
+    next_cursor = next_page_cursor(results, limit, order_by)
+    parsed_results = parse_output(results, keys)
+    return True, "Books retrieved successfully", parsed_results, total_count, count_exact, next_cursor
+
+async def retrieve_books_from_db(start: int = 1, end: int = 10, order_by=None, email=None, count_mode="cached", fields=None):
+    try:
+        stmt = build_books_stmt(start, end, order_by)
+        return await fetch_books_page(stmt, end - start, order_by, email, count_mode, fields)
+    except Exception as e:
+        return False, str(e), None, 0, None, None
+
+async def retrieve_books_after_cursor(cursor=None, limit: int = 10, order_by=None, email=None, count_mode="cached", fields=None):
+    try:
+        stmt = build_books_keyset_stmt(cursor, limit, order_by)
+        return await fetch_books_page(stmt, limit, order_by, email, count_mode, fields)
+    except Exception as e:
+        return False, str(e), None, 0, None, None
@@ -0,0 +1,32 @@
+from sqlalchemy import select
+from app.database.connector import get_async_engine
+from app.database.schemas.user import User
+from app.services.user_services import build_single_user_stmt, parse_user
+from app.utils.hash import deterministic_hash
+
+async def retrieve_single_user(id):
+    try:
+        engine, _ = get_async_engine()
+        async with engine.connect() as conn:
+            results = await conn.execute(build_single_user_stmt(id))
+            output = results.fetchone()
+            if output is not None:
+                return True, "User retrieved sucessfully", parse_user(output)
+            else:
+                return False, "User not found", None
+    except Exception as e:
+        return False, e, None
+
+async def authenticate_user(email, password):
+    try:
+        engine, _ = get_async_engine()
+        async with engine.connect() as conn:
+            results = await conn.execute(select(User.hashed_pw).where(User.email == email))
+            output = results.fetchone()
+            if output is None:
+                return False, "User not registered"
+            if output[0] == deterministic_hash(password):
+                return True, "Login successful"
+            return False, "Wrong password"
+    except Exception as e:
+        return False, e
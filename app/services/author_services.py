@@ -6,15 +6,28 @@ from app.schemas.author import Author as pydantic_author
 from app.schemas.author import AuthorUpdateCurrent
 
 
+def build_single_author_stmt(id):
+    return select(Author.author_id, Author.name, Author.biography, Author.updated_at).where(Author.author_id == id)
+
+def build_authors_stmt(page: int = 1, per_page: int = 10):
+    offset = (page - 1) * per_page
+    return select(Author.author_id, Author.name, Author.biography, Author.updated_at).offset(offset).limit(per_page)
+
+def build_author_version_stmt(id):
+    return select(Author.updated_at).where(Author.author_id == id)
+
+def parse_author(output):
+    return {"author_id": output[0], "name": output[1], "biography": output[2], "updated_at": output[3]}
+
 def retrieve_single_author(id):
     try:
         engine, session = connect_to_db()
-        stmt = select(Author.author_id, Author.name, Author.biography).where(Author.author_id == id)
+        stmt = build_single_author_stmt(id)
         with engine.connect() as conn:
             results = conn.execute(stmt)
             output = results.fetchone()
             if output:
-                author = {"author_id": output[0], "name": output[1], "biography": output[2]}
+                author = parse_author(output)
                 return True, "Author successfully retrieved", author
             else:
                 return False, "Author could not be retrieved", None
@@ -23,14 +36,27 @@ def retrieve_single_author(id):
     finally:
         session.close()
 
+def retrieve_author_version(id):
+    try:
+        engine, session = connect_to_db()
+        with engine.connect() as conn:
+            updated_at = conn.execute(build_author_version_stmt(id)).scalar()
+            if updated_at:
+                return True, "Author version retrieved", updated_at
+            else:
+                return False, "Author could not be retrieved", None
+    except Exception as e:
+        return False, e, None
+    finally:
+        session.close()
+
 def retrieve_authors_from_db(page: int = 1, per_page: int = 10):
     try:
         engine, session = connect_to_db()
-        offset = (page - 1) * per_page
-        stmt = select(Author.author_id, Author.name, Author.biography).offset(offset).limit(per_page)
+        stmt = build_authors_stmt(page, per_page)
         with engine.connect() as conn:
             results = conn.execute(stmt)
-            authors = [{"author_id": result[0], "name": result[1], "biography": result[2]} for result in results.fetchall()]
+            authors = [parse_author(result) for result in results.fetchall()]
         return True, "Authors successfully retrieved", authors
     except Exception as e:
         return False, e, None
@@ -1,53 +1,201 @@
-from sqlalchemy import select, delete, insert, update, desc, asc, func, or_
+import base64
+import json
+import re
+from decimal import Decimal
+from sqlalchemy import select, delete, update, desc, asc, func, or_, tuple_, exists, case, cast, literal, literal_column, text, Float, Integer, Numeric, String
 from app.database.connector import connect_to_db
-from app.database.schemas.books import Book
+from app.database.schemas.books import Book, sort_key
 from app.database.schemas.preferences import Preferences
 from app.database.schemas.book_author import BookAuthor
 from app.database.schemas.liked_books import LikedBooks
 from app.database.schemas.user import User
-from app.database.schemas.author import Author
 from app.services.author_services import retrieve_single_author
 from app.schemas.book import BookUpdateCurrent
+from app.services.catalog_events import publish, BOOK_ADDED, BOOK_UPDATED, BOOK_DELETED
+from app.services.count_services import fetch_page_with_count
+from app.services.fuzzy_index import ensure_fuzzy_index
+from app.services.popularity_services import schedule_popularity_refresh
+from app.services.recommendation_services import get_item_neighbours
+from app.services.similarity_services import get_book_embeddings
+from app.services.genre_rankings import ensure_genre_rankings, normalise_genres
+from app.config import FUZZY_SIMILARITY_THRESHOLD, RECOMMENDATIONS_LIMIT
 from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+book_columns = [
+    Book.book_id,
+    Book.title,
+    Book.author_name,
+    Book.subtitle,
+    Book.thumbnail,
+    Book.genre,
+    Book.description,
+    Book.year,
+    # psycopg2 returns Numeric as Decimal, which is slow to build and to encode;
+    # casting in SQL hands back plain floats and ints.
+    cast(Book.rating, Float).label("rating"),
+    cast(Book.num_pages, Integer).label("num_pages"),
+    cast(Book.ratings_count, Integer).label("ratings_count"),
+]
+book_output_keys = [
+    "book_id", "title", "author_name", "subtitle", "thumbnail", "genre",
+    "description", "year", "average_rating", "num_pages", "ratings_count", "liked"
+]
+book_detail_keys = book_output_keys[:-1] + ["updated_at"]
+
+# Sparse fieldsets for the list endpoints: `fields` is a comma-separated list of these
+# keys and/or named field sets, and only the matching columns are selected.
+DESCRIPTION_SNIPPET_LENGTH = 200
+book_fields = {
+    "book_id": Book.book_id,
+    "title": Book.title,
+    "author_name": Book.author_name,
+    "subtitle": Book.subtitle,
+    "thumbnail": Book.thumbnail,
+    "genre": Book.genre,
+    "description": Book.description,
+    "description_snippet": func.left(Book.description, DESCRIPTION_SNIPPET_LENGTH),
+    "year": Book.year,
+    "average_rating": cast(Book.rating, Float),
+    "num_pages": cast(Book.num_pages, Integer),
+    "ratings_count": cast(Book.ratings_count, Integer),
+}
+book_field_sets = {
+    "full": book_output_keys,
+    "card": ["book_id", "title", "author_name", "thumbnail", "average_rating", "liked"],
+}
+
+def parse_fields(fields=None):
+    if not fields:
+        return book_output_keys
+    keys = ["book_id"]
+    for name in (name.strip() for name in fields.split(",")):
+        if not name:
+            continue
+        if name in book_field_sets:
+            keys.extend(book_field_sets[name])
+        elif name in book_fields or name == "liked":
+            keys.append(name)
+        else:
+            raise ValueError(f"Unknown field {name!r}, expected any of {', '.join([*book_fields, 'liked', *book_field_sets])}")
+    return list(dict.fromkeys(keys))
+
+def liked_column(email=None):
+    # Correlated EXISTS served by the liked_books (email, book_id) primary key, so the
+    # flag comes back with the page instead of from a second query.
+    if email is None:
+        return literal_column("0").label("liked")
+    return case(
+        (exists().where(LikedBooks.email == email, LikedBooks.book_id == Book.book_id), 1),
+        else_=0
+    ).label("liked")
+
+# Every ordering ends in book_id so pages are stable and can be resumed from a cursor.
+keyset_map = {
+    None: (asc, []),
+    "trending": (desc, [Book.popularity_score]),
+    "publish_year_asc": (asc, [Book.year]),
+    "publish_year_desc": (desc, [Book.year]),
+    "average_rating_asc": (asc, [Book.rating]),
+    "average_rating_desc": (desc, [Book.rating])
+}
 
 order_by_map = {
-    "trending": [desc(Book.rating), desc(Book.ratings_count)],
-    "publish_year_asc": [asc(Book.year)],
-    "publish_year_desc": [desc(Book.year)],
-    "average_rating_asc": [asc(Book.rating)],
-    "average_rating_desc": [desc(Book.rating)]
+    key: [direction(sort_key(column)) for column in columns] + [direction(Book.book_id)]
+    for key, (direction, columns) in keyset_map.items()
 }
-def retrieve_liked_books_for_user(email: str, start: int = 0, end: int = 12):
-    engine, session = connect_to_db()
+
+def encode_cursor(row, order_by):
+    direction, columns = keyset_map[order_by]
+    values = [getattr(row, column.key) or 0 for column in columns] + [row.book_id]
+    values = [str(value) if isinstance(value, (Decimal, float)) else value for value in values]
+    payload = json.dumps({"o": order_by, "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, order_by):
     try:
-        success, message, liked_books_ids = retrieve_liked_books(email)
-        if success:
-            if liked_books_ids:
-                stmt = session.query(Book).filter(Book.book_id.in_(liked_books_ids))
-                parsed_results = [{
-                    "book_id": row.book_id,
-                    "title": row.title,
-                    "author_name": row.author_name,
-                    "subtitle": row.subtitle,
-                    "thumbnail": row.thumbnail,
-                    "genre": row.genre,
-                    "description": row.description,
-                    "year": row.year,
-                    "average_rating": row.rating,
-                    "num_pages": row.num_pages,
-                    "ratings_count": row.ratings_count,
-                    "liked": 1
-                } for row in stmt.offset(start).limit(end - start)]
-                return True, "Books retrieved successfully", parsed_results, stmt.count()
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        direction, columns = keyset_map[order_by]
+        if payload["o"] != order_by or len(payload["k"]) != len(columns) + 1:
+            raise ValueError
+        values = []
+        for column, value in zip(columns + [Book.book_id], payload["k"]):
+            if isinstance(column.type, Float):
+                values.append(float(value))
+            elif isinstance(column.type, Numeric):
+                values.append(Decimal(str(value)))
+            elif isinstance(column.type, Integer):
+                values.append(int(value))
             else:
-                return False, "No liked books found for the user", None, 0
+                values.append(str(value))
+        return values
+    except (ValueError, KeyError, TypeError, ArithmeticError):
+        raise ValueError("Invalid cursor for this order_by")
+
+def build_keyset_condition(cursor: str, order_by):
+    direction, columns = keyset_map[order_by]
+    keys = tuple_(*[sort_key(column) for column in columns], Book.book_id)
+    values = tuple_(*decode_cursor(cursor, order_by))
+    if direction is desc:
+        return keys < values
+    return keys > values
+
+def project_page(stmt, keys, liked, order_by=None):
+    # The requested fields come first, in order, so parse_output can zip them with keys;
+    # the sort values a cursor is built from ride along after them when not requested.
+    columns = [liked if key == "liked" else book_fields[key].label(key) for key in keys]
+    sort_columns = keyset_map[order_by][1] if order_by in keyset_map else []
+    columns.extend(column for column in sort_columns + [Book.book_id] if column.key not in keys)
+    return stmt.with_only_columns(*columns)
+
+def next_page_cursor(results, limit: int, order_by):
+    if not results or len(results) < limit:
+        return None
+    return encode_cursor(results[-1], order_by)
+def build_liked_books_stmt(email: str):
+    return (
+        select(*book_columns, literal_column("1").label("liked"))
+        .join(LikedBooks, LikedBooks.book_id == Book.book_id)
+        .where(LikedBooks.email == email)
+        .order_by(Book.book_id)
+    )
+
+def retrieve_liked_books_for_user(email: str, start: int = 0, end: int = 12, fields=None):
+    engine, session = connect_to_db()
+    try:
+        keys = parse_fields(fields)
+        stmt = build_liked_books_stmt(email)
+        page_stmt = project_page(stmt, keys, literal_column("1").label("liked")).offset(start).limit(end - start)
+        with engine.connect() as conn:
+            results, total_count, _ = fetch_page_with_count(conn, stmt, page_stmt, "window")
+        if total_count:
+            return True, "Books retrieved successfully", parse_output(results, keys), total_count
         else:
-            return False, message, None, 0
+            return False, "No liked books found for the user", None, 0
     except Exception as e:
         return False, str(e), None, 0
     finally:
         session.close()
 
+def build_liked_status_stmt(email: str, book_ids):
+    return select(LikedBooks.book_id).where(LikedBooks.email == email, LikedBooks.book_id.in_(book_ids))
+
+def parse_liked_status(book_ids, liked_book_ids):
+    liked_book_ids = set(liked_book_ids)
+    return {book_id: book_id in liked_book_ids for book_id in book_ids}
+
+def retrieve_liked_status(email: str, book_ids):
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            results = conn.execute(build_liked_status_stmt(email, book_ids)).scalars().all()
+        return True, "Liked status retrieved successfully", parse_liked_status(book_ids, results)
+    except Exception as e:
+        return False, str(e), None
+    finally:
+        session.close()
+
 
 
 
@@ -55,10 +203,11 @@ def register_liked_book(book_id: str, email: str):
     engine, session = connect_to_db()
     try:
         with engine.connect() as conn:
-            stmt = insert(LikedBooks).values(email=email, book_id=book_id)
+            stmt = pg_insert(LikedBooks).values(email=email, book_id=book_id).on_conflict_do_nothing()
             conn.execute(stmt)
             conn.commit()
-            return True, "Liked Book Added Successfully"
+        schedule_popularity_refresh([book_id])
+        return True, "Liked Book Added Successfully"
     except Exception as e:
         print(e)
         return False, str(e)
@@ -72,17 +221,69 @@ def remove_liked_book(book_id: str, email: str):
             stmt = delete(LikedBooks).where(LikedBooks.email==email, LikedBooks.book_id == book_id)
             conn.execute(stmt)
             conn.commit()
-            return True, "Liked Book removed successfully"
+        schedule_popularity_refresh([book_id])
+        return True, "Liked Book removed successfully"
     except Exception as e:
         return False, str(e)
     finally:
         session.close()
 
+def collapse_like_operations(operations):
+    # The last operation on a book wins; earlier ones for the same book are reported
+    # as superseded rather than applied.
+    final_index = {operation.book_id: i for i, operation in enumerate(operations)}
+    likes = [op.book_id for i, op in enumerate(operations) if final_index[op.book_id] == i and op.action == "like"]
+    unlikes = [op.book_id for i, op in enumerate(operations) if final_index[op.book_id] == i and op.action == "unlike"]
+    return final_index, likes, unlikes
+
+def apply_liked_book_operations(email: str, operations):
+    final_index, likes, unlikes = collapse_like_operations(operations)
+    engine, session = connect_to_db()
+    try:
+        liked, unliked, existing = set(), set(), set()
+        with engine.begin() as conn:
+            if likes:
+                existing = set(conn.execute(select(Book.book_id).where(Book.book_id.in_(likes))).scalars())
+                rows = [{"email": email, "book_id": book_id} for book_id in likes if book_id in existing]
+                if rows:
+                    stmt = pg_insert(LikedBooks).values(rows).on_conflict_do_nothing().returning(LikedBooks.book_id)
+                    liked = set(conn.execute(stmt).scalars())
+            if unlikes:
+                stmt = (
+                    delete(LikedBooks)
+                    .where(LikedBooks.email == email, LikedBooks.book_id.in_(unlikes))
+                    .returning(LikedBooks.book_id)
+                )
+                unliked = set(conn.execute(stmt).scalars())
+        if liked or unliked:
+            schedule_popularity_refresh(liked | unliked)
+
+        results = []
+        for i, operation in enumerate(operations):
+            if final_index[operation.book_id] != i:
+                outcome = "superseded"
+            elif operation.action == "like":
+                if operation.book_id not in existing:
+                    outcome = "book_not_found"
+                else:
+                    outcome = "liked" if operation.book_id in liked else "already_liked"
+            else:
+                outcome = "unliked" if operation.book_id in unliked else "not_liked"
+            results.append({"book_id": operation.book_id, "action": operation.action, "outcome": outcome})
+        return True, "Liked books updated successfully", results
+    except Exception as e:
+        return False, str(e), None
+    finally:
+        session.close()
+
+def build_liked_book_ids_stmt(email: str):
+    return select(LikedBooks.book_id).where(LikedBooks.email==email)
+
 def retrieve_liked_books(email: str):
     engine, session = connect_to_db()
     try:
         with engine.connect() as conn:
-            stmt = select(LikedBooks.book_id).where(LikedBooks.email==email)
+            stmt = build_liked_book_ids_stmt(email)
             query = conn.execute(stmt)
             results = query.fetchall()
             if results:
@@ -95,117 +296,213 @@ def retrieve_liked_books(email: str):
     finally:
         session.close()
 
-def parse_output(db_output):
+def parse_output(db_output, keys=book_output_keys):
     if db_output is None:
         return None
-    books = [{
-                "book_id": result[0], 
-                "title": result[1], 
-                "author_name": result[2],
-                "subtitle": result[3],
-                "thumbnail": result[4],
-                "genre": result[5], 
-                "description": result[6], 
-                "year": result[7], 
-                "average_rating": result[8],
-                "num_pages": result[9],
-                "ratings_count": result[10],
-                "liked": 0
-            } for result in db_output]
-    
-    return books
+    # Rows start with the requested fields; anything after (cursor values, total_count) is dropped.
+    return [dict(zip(keys, result)) for result in db_output]
 
-def execute_search_query(stmt, count_stmt, engine):
-    with engine.connect() as conn:
-        total_count = conn.execute(count_stmt).scalar()
-        output = conn.execute(stmt)
-        results = output.fetchall()
-        return results, total_count
+MIN_FULL_TEXT_SEARCH_LENGTH = 3
 
-def retrieve_book_by_search_input(search_input: str, start: int = 0, end: int = 10, email=None):
-    try:
-        engine, session = connect_to_db()
-        search_input = search_input.lower().strip()
+def build_prefix_tsquery(search_input: str, operator: str = "&"):
+    terms = re.findall(r"\w+", search_input.lower())
+    return f" {operator} ".join(f"{term}:*" for term in terms)
 
-        result = session.query(Book).filter(
-            or_(
-                Book.title.ilike(f'%{search_input}%'),
-                Book.genre.ilike(f'%{search_input}%'),
-                Book.author_name.ilike(f'%{search_input}%')
-            )
+def build_ilike_search_stmt(search_input: str):
+    search_input = search_input.lower().strip()
+    return select(*book_columns).where(
+        or_(
+            Book.title.ilike(f'%{search_input}%'),
+            Book.genre.ilike(f'%{search_input}%'),
+            Book.author_name.ilike(f'%{search_input}%')
         )
+    ).order_by(Book.book_id)
+
+def build_full_text_search_stmt(search_input: str):
+    tsquery = func.to_tsquery(literal_column("'english'"), build_prefix_tsquery(search_input))
+    return (
+        select(*book_columns)
+        .where(Book.search_vector.bool_op("@@")(tsquery))
+        .order_by(desc(func.ts_rank(Book.search_vector, tsquery)), Book.book_id)
+    )
+
+SEARCH_MODES = ("full_text", "fuzzy")
+
+def build_fuzzy_search_stmt(search_input: str):
+    # term <% column is pg_trgm's indexable word-similarity match; the threshold is
+    # set per transaction by set_fuzzy_threshold.
+    term = literal(search_input.lower().strip(), String)
+    score = func.greatest(func.word_similarity(term, Book.title), func.word_similarity(term, Book.author_name))
+    return (
+        select(*book_columns)
+        .where(or_(term.bool_op("<%")(Book.title), term.bool_op("<%")(Book.author_name)))
+        .order_by(desc(score), Book.book_id)
+    )
+
+def set_fuzzy_threshold(conn, threshold: float = FUZZY_SIMILARITY_THRESHOLD):
+    return conn.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(threshold)}
+    )
+
+def build_search_stmt(search_input: str, search_mode: str = "full_text"):
+    if search_mode not in SEARCH_MODES:
+        raise ValueError(f"search_mode must be one of {', '.join(SEARCH_MODES)}")
+    if search_mode == "fuzzy":
+        return build_fuzzy_search_stmt(search_input)
+    # Very short inputs make prefix queries match most of the catalog, so they keep
+    # the substring match instead of the ranked full-text search.
+    if len(search_input.strip()) < MIN_FULL_TEXT_SEARCH_LENGTH or not build_prefix_tsquery(search_input):
+        return build_ilike_search_stmt(search_input)
+    return build_full_text_search_stmt(search_input)
+
+def search_fuzzy_index(conn, search_input: str, start: int, end: int, email=None, keys=book_output_keys):
+    matches = ensure_fuzzy_index(conn.engine).search(search_input, FUZZY_SIMILARITY_THRESHOLD)
+    page_ids = [book_id for book_id, score in matches[start:end]]
+    stmt = project_page(select(Book.book_id), keys, liked_column(email))
+    rows = conn.execute(stmt.where(Book.book_id.in_(page_ids))).fetchall()
+    rows_by_id = {row.book_id: row for row in rows}
+    return [rows_by_id[book_id] for book_id in page_ids if book_id in rows_by_id], len(matches), True
+
+def search_cache_key(search_input: str, search_mode: str = "full_text"):
+    return ("search", search_mode, search_input.lower().strip())
 
-        count_stmt = result.count()
-            
-        parsed_results = [{
-                "book_id": row.book_id,
-                "title": row.title,
-                "author_name": row.author_name,
-                "subtitle": row.subtitle,
-                "thumbnail": row.thumbnail,
-                "genre": row.genre,
-                "description": row.description,
-                "year": row.year,
-                "average_rating": row.rating,
-                "num_pages": row.num_pages,
-                "ratings_count": row.ratings_count,
-                "liked": 0
-            } for row in result.offset(start).limit(end - start)]
+def retrieve_book_by_search_input(
+        search_input: str, 
+        start: int = 0, 
+        end: int = 10, 
+        email=None, 
+        count_mode="estimated", 
+        search_mode="full_text",
+        fields=None
+    ):
+    try:
+        engine, session = connect_to_db()
+        keys = parse_fields(fields)
+        stmt = build_search_stmt(search_input, search_mode)
+        with engine.connect() as conn:
+            if search_mode == "fuzzy" and engine.dialect.name != "postgresql":
+                results, total_count, count_exact = search_fuzzy_index(conn, search_input, start, end, email, keys)
+            else:
+                if search_mode == "fuzzy":
+                    set_fuzzy_threshold(conn)
+                page_stmt = project_page(stmt, keys, liked_column(email)).offset(start).limit(end - start)
+                results, total_count, count_exact = fetch_page_with_count(
+                    conn, stmt, page_stmt, count_mode, search_cache_key(search_input, search_mode)
+                )
+        parsed_results = parse_output(results, keys)
         
         if len(parsed_results) > 0:
-            if email:
-                success, message, liked_books = retrieve_liked_books(email)
-                if success:
-                    for i, book in enumerate(parsed_results):
-                        if book["book_id"] in liked_books:
-                            parsed_results[i]["liked"] = 1
-                else:
-                    return False, message, None, None
-            return True, "Books retrieved successfully", parsed_results, count_stmt
+            return True, "Books retrieved successfully", parsed_results, total_count, count_exact
         else:
-            return False, "Could not retrieve books", None, 0
+            return False, "Could not retrieve books", None, 0, True
     except Exception as e:
-        return False, str(e), None, 0
+        return False, str(e), None, 0, None
     finally:
         session.close()
 
-def get_book_recommendations(email: str):
+def build_trending_fallback_stmt(email: str, exclude):
+    # Best-ranked books the user has not liked.
+    stmt = select(Book.book_id).where(
+        ~exists().where(LikedBooks.email == email, LikedBooks.book_id == Book.book_id)
+    )
+    if exclude:
+        stmt = stmt.where(Book.book_id.not_in(exclude))
+    return stmt.order_by(*order_by_map["trending"])
+
+def rank_preferred_books(conn, engine, email: str, limit: int, exclude):
+    preferences = conn.execute(select(Preferences.preference).where(Preferences.email == email)).scalars().all()
+    genres = list(dict.fromkeys(genre for preference in preferences for genre in normalise_genres(preference)))
+    if not genres:
+        return []
+    return ensure_genre_rankings(engine).merge(genres, limit, exclude)
+
+def fetch_books_in_order(conn, book_ids, keys, email=None):
+    if not book_ids:
+        return []
+    stmt = project_page(select(Book.book_id).where(Book.book_id.in_(book_ids)), keys, liked_column(email))
+    positions = {book_id: i for i, book_id in enumerate(book_ids)}
+    return sorted(parse_output(conn.execute(stmt).fetchall(), keys), key=lambda book: positions[book["book_id"]])
+
+def rank_recommendations(liked_book_ids, limit: int, mode: str):
+    if mode == "collaborative":
+        model = get_item_neighbours()
+        return [book_id for book_id, _ in model.recommend(liked_book_ids, limit)] if model else []
+    if mode == "because_you_liked":
+        embeddings = get_book_embeddings()
+        ranked = embeddings.similar_to_books(liked_book_ids, limit) if embeddings else None
+        return [book_id for book_id, _ in ranked or []]
+    raise ValueError(f"Unknown mode {mode!r}, expected collaborative or because_you_liked")
+
+def get_book_recommendations(email: str, limit: int = RECOMMENDATIONS_LIMIT, fields="card", mode="collaborative"):
+    engine, session = connect_to_db()
     try:
-        engine, session = connect_to_db()
-        stmt = select(Preferences.preference).where(Preferences.email == email)
+        keys = parse_fields(fields)
         with engine.connect() as conn:
-            results = conn.execute(stmt)
-            genres = list(map(lambda x: x[0], results.fetchall()))
-            if len(genres) == 0:
-                return False, "User has no preferences", None
-            stmt = select(Book.title).where(Book.genre.in_(genres)).limit(5)
-            results = conn.execute(stmt)
-            recommendations = list(map(lambda x: x[0], results.fetchall()))
+            liked_book_ids = conn.execute(select(LikedBooks.book_id).where(LikedBooks.email == email)).scalars().all()
+            recommendations = fetch_books_in_order(conn, rank_recommendations(liked_book_ids, limit, mode), keys, email)
+            source = ("liked_books" if mode == "collaborative" else mode) if recommendations else None
+            # Cold start, or too few neighbours: top up from the user's preferred genres,
+            # then from the trending list.
+            if len(recommendations) < limit:
+                exclude = set(liked_book_ids) | {book["book_id"] for book in recommendations}
+                preferred_ids = rank_preferred_books(conn, engine, email, limit - len(recommendations), exclude)
+                preferred = fetch_books_in_order(conn, preferred_ids, keys, email)
+                if preferred and source is None:
+                    source = "preferences"
+                recommendations.extend(preferred)
+            if len(recommendations) < limit:
+                exclude = [book["book_id"] for book in recommendations]
+                stmt = project_page(build_trending_fallback_stmt(email, exclude), keys, liked_column(email))
+                trending = parse_output(conn.execute(stmt.limit(limit - len(recommendations))).fetchall(), keys)
+                if trending and source is None:
+                    source = "trending"
+                recommendations.extend(trending)
             if len(recommendations) == 0:
-                return False, "No recommendations found", None
-            return True, "Recommendations successfully retrieved", recommendations
+                return False, "No recommendations found", None, None
+            return True, "Recommendations successfully retrieved", recommendations, source
     except Exception as e:
-        return False, e, None
+        return False, str(e), None, None
+    finally:
+        session.close()
+
+def retrieve_similar_books(book_id: str, limit: int = RECOMMENDATIONS_LIMIT, fields="card"):
+    engine, session = connect_to_db()
+    try:
+        keys = parse_fields(fields)
+        embeddings = get_book_embeddings()
+        if embeddings is None:
+            return False, "Book embeddings are not available", None
+        ranked = embeddings.similar_to_books([book_id], limit)
+        if ranked is None:
+            return False, "No embedding stored for this book", None
+        with engine.connect() as conn:
+            books = fetch_books_in_order(conn, [similar_id for similar_id, _ in ranked], keys)
+        return True, "Similar books retrieved successfully", books
+    except Exception as e:
+        return False, str(e), None
     finally:
         session.close()
 
 
+def build_single_book_stmt(id):
+    return select(*book_columns, Book.updated_at).where(Book.book_id == id)
+
+def build_book_version_stmt(id):
+    return select(Book.updated_at).where(Book.book_id == id)
+
+def parse_single_book(output):
+    return dict(zip(book_detail_keys, output))
+
 def retrieve_single_book(id):
     try:
         engine, session = connect_to_db()
-        stmt = select(Book).where(Book.book_id == id)
+        stmt = build_single_book_stmt(id)
         with engine.connect() as conn:
             results = conn.execute(stmt)
             output = results.fetchone()
             if output:
-                book = {
-                    "book_id": output[0], 
-                    "title": output[1], 
-                    "genre": output[2], 
-                    "description": output[3], 
-                    "year": output[4], 
-                    "author_id": output[5]
-                }
+                book = parse_single_book(output)
                 return True, "Book retreived successfully", book
             else:
                 return False, "Error ocurred", None
@@ -215,45 +512,78 @@ def retrieve_single_book(id):
     finally:
         session.close()    
 
-def retrieve_books_from_db(start: int = 1, end: int = 10, order_by=None, email=None):
+def retrieve_book_version(id):
     try:
         engine, session = connect_to_db()
-        if order_by != None:
-            stmt = select(Book).offset(start).limit(end - start).order_by(*order_by_map[order_by])
-        else:
-            stmt = select(Book).offset(start).limit(end - start)
-        count_stmt = select(func.count()).select_from(Book)
-        
-        results, total_count = execute_search_query(stmt, count_stmt, engine)
-        parsed_results = parse_output(results)
-
-        if email:
-            success, message, liked_books = retrieve_liked_books(email)
-            if success:
-                print(message)
-                for i, book in enumerate(parsed_results):
-                    if book["book_id"] in liked_books:
-                        parsed_results[i]["liked"] = 1
+        with engine.connect() as conn:
+            updated_at = conn.execute(build_book_version_stmt(id)).scalar()
+            if updated_at:
+                return True, "Book version retrieved", updated_at
             else:
-                return False, message, None, None
-        return True, "Books retrieved successfully", parsed_results, total_count
+                return False, "Error ocurred", None
     except Exception as e:
         print(e)
-        return False, str(e), None, 0
+        return False, e, None
+    finally:
+        session.close()
+
+books_source_stmt = select(*book_columns)
+books_cache_key = ("books",)
+
+def build_books_stmt(start: int = 1, end: int = 10, order_by=None):
+    return books_source_stmt.order_by(*order_by_map[order_by]).offset(start).limit(end - start)
+
+def build_books_keyset_stmt(cursor=None, limit: int = 10, order_by=None):
+    stmt = books_source_stmt.order_by(*order_by_map[order_by]).limit(limit)
+    if cursor:
+        stmt = stmt.where(build_keyset_condition(cursor, order_by))
+    return stmt
+
+def fetch_books_page(stmt, limit: int, order_by=None, email=None, count_mode="cached", fields=None):
+    engine, session = connect_to_db()
+    try:
+        keys = parse_fields(fields)
+        page_stmt = project_page(stmt, keys, liked_column(email), order_by)
+        with engine.connect() as conn:
+            results, total_count, count_exact = fetch_page_with_count(
+                conn, books_source_stmt, page_stmt, count_mode, books_cache_key
+            )
+        next_cursor = next_page_cursor(results, limit, order_by)
+        parsed_results = parse_output(results, keys)
+        return True, "Books retrieved successfully", parsed_results, total_count, count_exact, next_cursor
     finally:
         session.close()
 
+def retrieve_books_from_db(start: int = 1, end: int = 10, order_by=None, email=None, count_mode="cached", fields=None):
+    try:
+        stmt = build_books_stmt(start, end, order_by)
+        return fetch_books_page(stmt, end - start, order_by, email, count_mode, fields)
+    except Exception as e:
+        print(e)
+        return False, str(e), None, 0, None, None
+
+def retrieve_books_after_cursor(cursor=None, limit: int = 10, order_by=None, email=None, count_mode="cached", fields=None):
+    try:
+        stmt = build_books_keyset_stmt(cursor, limit, order_by)
+        return fetch_books_page(stmt, limit, order_by, email, count_mode, fields)
+    except Exception as e:
+        print(e)
+        return False, str(e), None, 0, None, None
+
 
 def delete_book_from_db(book_id):
     try:
         engine, session = connect_to_db()
         with session.begin():
+            session.execute(delete(BookAuthor).where(BookAuthor.book_id == book_id))
             stmt = delete(Book).where(Book.book_id == book_id)
             result = session.execute(stmt)
-            if result.rowcount > 0:
-                return True, "Book deleted successfully" 
-            else:
-                return False, "Book could not be deleted"
+            deleted = result.rowcount > 0
+        if deleted:
+            publish(BOOK_DELETED, [str(book_id)])
+            return True, "Book deleted successfully" 
+        else:
+            return False, "Book could not be deleted"
     except Exception as e:
         print(e)
         session.rollback()
@@ -267,11 +597,10 @@ def add_book_to_db(book: Book):
         return success, message, None
     
     to_add = Book(
-        book_id=book_id,
+        book_id=book.book_id,
         title=book.title, 
         subtitle=book.subtitle,
         thumbnail=book.thumbnail,
-        author_id=book.author_id,
         author_name=book.author_name,
         genre=book.genre, 
         description=book.description, 
@@ -284,8 +613,12 @@ def add_book_to_db(book: Book):
     engine, session = connect_to_db()
     try:
         session.add(to_add)
+        # books has no author column; the author is linked through books_and_authors.
+        session.flush()
+        session.add(BookAuthor(book_id=to_add.book_id, author_id=book.author_id))
         session.commit()
         book_id = to_add.book_id
+        publish(BOOK_ADDED, [book_id])
         return True, "Book added Successfully", book_id
     except Exception as e:
         session.rollback()
@@ -299,25 +632,20 @@ def edit_book_info(book_id: int, new_book: BookUpdateCurrent):
         return success, message
 
     if new_book.author_id is not None:
-        engine, session = connect_to_db()
-        stmt = select(Author.author_id).where(Author.author_id == new_book.author_id)
-        with engine.connect() as conn:
-            results = conn.execute(stmt)
-            output = results.fetchone()
-            if not output:
-                return False, "New author does not exist"
+        success, message, author = retrieve_single_author(new_book.author_id)
+        if not success:
+            return False, "New author does not exist"
     
     updated_book_data = {
         "book_id": new_book.book_id if new_book.book_id is not None else book['book_id'],
         "title": new_book.title if new_book.title is not None else book['title'],
         "subtitle": new_book.subtitle if new_book.subtitle is not None else book['subtitle'],
         "thumbnail": new_book.thumbnail if new_book.thumbnail is not None else book['thumbnail'],
-        "author_id": new_book.author_id if new_book.author_id is not None else book['author_id'],
         "author_name": new_book.author_name if new_book.author_name is not None else book['author_name'],
         "genre": new_book.genre if new_book.genre is not None else book['genre'],
         "description": new_book.description if new_book.description is not None else book['description'],
         "year": new_book.year if new_book.year is not None else book['year'],
-        "rating": new_book.rating if new_book.rating is not None else book['rating'],
+        "rating": new_book.rating if new_book.rating is not None else book['average_rating'],
         "num_pages": new_book.num_pages if new_book.num_pages is not None else book['num_pages'],
         "ratings_count": new_book.ratings_count if new_book.ratings_count is not None else book['ratings_count'],
     }
@@ -330,7 +658,6 @@ def edit_book_info(book_id: int, new_book: BookUpdateCurrent):
             title=updated_book_data["title"],
             subtitle=updated_book_data["subtitle"],
             thumbnail=updated_book_data["thumbnail"],
-            author_id=updated_book_data["author_id"],
             author_name=updated_book_data["author_name"],
             genre=updated_book_data["genre"],
             description=updated_book_data["description"],
@@ -345,7 +672,14 @@ def edit_book_info(book_id: int, new_book: BookUpdateCurrent):
     try:
         engine, session = connect_to_db()
         with session.begin():
+            # books_and_authors references book_id, so the links are moved around the
+            # update, onto the new author when one is given.
+            author_ids = session.execute(select(BookAuthor.author_id).where(BookAuthor.book_id == book_id)).scalars().all()
+            if new_book.author_id is not None:
+                author_ids = [new_book.author_id]
+            session.execute(delete(BookAuthor).where(BookAuthor.book_id == book_id))
             session.execute(stmt)
+            session.add_all([BookAuthor(book_id=updated_book_data["book_id"], author_id=author_id) for author_id in author_ids])
             session.commit()
     except Exception as e:
         session.rollback()
@@ -353,6 +687,7 @@ def edit_book_info(book_id: int, new_book: BookUpdateCurrent):
     finally:
         session.close()
 
+    publish(BOOK_UPDATED, {str(book_id), str(updated_book_data["book_id"])})
     return True, "Book information successfully updated"
 
 if __name__ == "__main__":
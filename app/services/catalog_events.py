@@ -0,0 +1,21 @@
+# Book write paths publish here after they commit; caches and indexes that derive
+# from the catalog subscribe instead of being called from every write function.
+
+BOOK_ADDED = "added"
+BOOK_UPDATED = "updated"
+BOOK_DELETED = "deleted"
+# popularity_score changed for these books (no book content did).
+BOOK_RANKING_UPDATED = "ranking"
+
+_listeners = []
+
+def subscribe(listener):
+    _listeners.append(listener)
+    return listener
+
+def publish(action: str, book_ids):
+    for listener in list(_listeners):
+        try:
+            listener(action, list(book_ids))
+        except Exception as e:
+            print(e)
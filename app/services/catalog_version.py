@@ -0,0 +1,85 @@
+import threading
+import time
+import uuid
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+from app.config import CATALOG_VERSION_TTL
+from app.database.connector import connect_to_db
+from app.database.schemas.catalog_version import CatalogVersion
+
+# The catalog version lives in the database so every process shares it: a write made
+# by one API worker, a CLI import or the popularity cron changes the version all
+# workers read for their cache keys and ETags. Popularity refreshes only bump
+# ranking_version, which is part of the tag of pages ordered by popularity_score.
+# Each process reuses the row it read for CATALOG_VERSION_TTL seconds, so cache hits
+# and 304s do not query the database; its own bumps are visible right away.
+
+CATALOG_VERSION_ROW = 1
+
+_memo = None
+_memo_lock = threading.Lock()
+
+def read_version(conn):
+    return conn.execute(
+        select(CatalogVersion.epoch, CatalogVersion.version, CatalogVersion.ranking_version).where(CatalogVersion.id == CATALOG_VERSION_ROW)
+    ).first()
+
+def create_version_row(conn):
+    try:
+        with conn.begin_nested():
+            conn.execute(insert(CatalogVersion).values(id=CATALOG_VERSION_ROW, version=0, ranking_version=0, epoch=uuid.uuid4().hex[:8]))
+    except IntegrityError:
+        # Another process created it first.
+        pass
+
+def format_tag(row, ranking):
+    if ranking:
+        return f"{row.epoch}.{row.version}.{row.ranking_version}"
+    return f"{row.epoch}.{row.version}"
+
+def peek_catalog_version_tag(ranking=False):
+    # The memoised tag, or None once it is older than CATALOG_VERSION_TTL. Never
+    # touches the database, so it is safe to call on the event loop.
+    with _memo_lock:
+        memo = _memo
+    if memo is None or memo[0] < time.monotonic():
+        return None
+    return format_tag(memo[1], ranking)
+
+def forget_catalog_version():
+    global _memo
+    with _memo_lock:
+        _memo = None
+
+def get_catalog_version_tag(ranking=False):
+    global _memo
+    tag = peek_catalog_version_tag(ranking)
+    if tag is not None:
+        return tag
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            row = read_version(conn)
+            if row is None:
+                create_version_row(conn)
+                conn.commit()
+                row = read_version(conn)
+        with _memo_lock:
+            _memo = (time.monotonic() + CATALOG_VERSION_TTL, row)
+        return format_tag(row, ranking)
+    finally:
+        session.close()
+
+def bump_catalog_version(ranking=False):
+    engine, session = connect_to_db()
+    try:
+        column = CatalogVersion.ranking_version if ranking else CatalogVersion.version
+        stmt = update(CatalogVersion).where(CatalogVersion.id == CATALOG_VERSION_ROW).values({column: column + 1})
+        with engine.begin() as conn:
+            if conn.execute(stmt).rowcount == 0:
+                create_version_row(conn)
+                conn.execute(stmt)
+    finally:
+        # The next read picks up this process's write instead of the memoised row.
+        forget_catalog_version()
+        session.close()
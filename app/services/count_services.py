@@ -0,0 +1,130 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Literal, get_args
+from sqlalchemy import select, func
+from starlette.concurrency import run_in_threadpool
+from app.config import COUNT_CACHE_MAX_ENTRIES
+from app.services.catalog_events import subscribe, BOOK_RANKING_UPDATED
+from app.services.catalog_version import get_catalog_version_tag, peek_catalog_version_tag
+
+# exact:     count(*) over the full query on every request
+# cached:    exact count, kept until the shared catalog version moves (a write by any
+#            process); at most COUNT_CACHE_MAX_ENTRIES totals, least recently used
+#            dropped first
+# estimated: the planner's row estimate from EXPLAIN, no scan at all; small estimates
+#            are replaced by an exact count since counting a few rows is cheap and
+#            the planner is least reliable there (e.g. prefix tsqueries)
+# window:    exact count(*) OVER () computed with the page in a single round-trip
+CountMode = Literal["exact", "cached", "estimated", "window"]
+COUNT_MODES = get_args(CountMode)
+
+EXACT_COUNT_BELOW_ESTIMATE = 1000
+
+# cache_key -> (catalog version tag, total)
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+@subscribe
+def invalidate_count_cache(action=None, book_ids=None):
+    # Entries already miss once the version moves; this only frees them early.
+    # Score changes never add or remove rows.
+    if action == BOOK_RANKING_UPDATED:
+        return
+    with _count_cache_lock:
+        _count_cache.clear()
+
+def build_count_stmt(source_stmt):
+    return select(func.count()).select_from(source_stmt.order_by(None).subquery())
+
+def build_window_stmt(page_stmt):
+    return page_stmt.add_columns(func.count().over().label("total_count"))
+
+def build_explain(source_stmt, dialect):
+    compiled = source_stmt.compile(dialect=dialect)
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    return "EXPLAIN (FORMAT JSON) " + str(compiled), params
+
+def parse_explain(output):
+    plan = output[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def check_count_mode(count_mode: str):
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"count_mode must be one of {', '.join(COUNT_MODES)}")
+
+def get_cached_count(cache_key, version):
+    with _count_cache_lock:
+        entry = _count_cache.get(cache_key)
+        if entry is None or entry[0] != version:
+            return None
+        _count_cache.move_to_end(cache_key)
+        return entry[1]
+
+def set_cached_count(cache_key, version, total_count):
+    with _count_cache_lock:
+        _count_cache[cache_key] = (version, total_count)
+        _count_cache.move_to_end(cache_key)
+        while len(_count_cache) > COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.popitem(last=False)
+
+def window_total(results):
+    if results:
+        return results[0].total_count
+    return None
+
+def fetch_page_with_count(conn, source_stmt, page_stmt, count_mode="exact", cache_key=None):
+    check_count_mode(count_mode)
+    if count_mode == "window":
+        results = conn.execute(build_window_stmt(page_stmt)).fetchall()
+        total_count = window_total(results)
+        if total_count is None:
+            # An empty page (e.g. past the end) carries no window value to read.
+            total_count = conn.execute(build_count_stmt(source_stmt)).scalar()
+        return results, total_count, True
+
+    results = conn.execute(page_stmt).fetchall()
+    if count_mode == "estimated":
+        sql, params = build_explain(source_stmt, conn.dialect)
+        estimate = parse_explain(conn.exec_driver_sql(sql, params).fetchone())
+        if estimate >= EXACT_COUNT_BELOW_ESTIMATE:
+            return results, estimate, False
+        count_mode = "exact"
+    if count_mode == "cached":
+        version = get_catalog_version_tag()
+        total_count = get_cached_count(cache_key, version)
+        if total_count is None:
+            total_count = conn.execute(build_count_stmt(source_stmt)).scalar()
+            set_cached_count(cache_key, version, total_count)
+        return results, total_count, True
+    return results, conn.execute(build_count_stmt(source_stmt)).scalar(), True
+
+async def fetch_page_with_count_async(conn, source_stmt, page_stmt, count_mode="exact", cache_key=None):
+    check_count_mode(count_mode)
+    if count_mode == "window":
+        results = (await conn.execute(build_window_stmt(page_stmt))).fetchall()
+        total_count = window_total(results)
+        if total_count is None:
+            total_count = (await conn.execute(build_count_stmt(source_stmt))).scalar()
+        return results, total_count, True
+
+    results = (await conn.execute(page_stmt)).fetchall()
+    if count_mode == "estimated":
+        sql, params = build_explain(source_stmt, conn.dialect)
+        estimate = parse_explain((await conn.exec_driver_sql(sql, params)).fetchone())
+        if estimate >= EXACT_COUNT_BELOW_ESTIMATE:
+            return results, estimate, False
+        count_mode = "exact"
+    if count_mode == "cached":
+        version = peek_catalog_version_tag() or await run_in_threadpool(get_catalog_version_tag)
+        total_count = get_cached_count(cache_key, version)
+        if total_count is None:
+            total_count = (await conn.execute(build_count_stmt(source_stmt))).scalar()
+            set_cached_count(cache_key, version, total_count)
+        return results, total_count, True
+    return results, (await conn.execute(build_count_stmt(source_stmt))).scalar(), True
@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_BATCH_SIZE = 2000
+
+export_columns = [
+    Book.book_id,
+    Book.title,
+    Book.author_name,
+    Book.subtitle,
+    Book.thumbnail,
+    Book.genre,
+    Book.description,
+    Book.year,
+    Book.rating,
+    Book.num_pages,
+    Book.ratings_count,
+    Book.updated_at,
+]
+export_keys = [column.key for column in export_columns]
+
+def build_export_stmt(since=None):
+    stmt = select(*export_columns)
+    if since is None:
+        return stmt.order_by(Book.book_id)
+    # >= rather than > so rows sharing the previous export's last timestamp are not lost;
+    # consumers upsert by book_id, so a repeated row is harmless.
+    return stmt.where(Book.updated_at >= since).order_by(Book.updated_at, Book.book_id)
+
+def export_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def ndjson_batch(rows):
+    return "".join(
+        json.dumps(dict(zip(export_keys, map(export_value, row)))) + "\n" for row in rows
+    )
+
+def csv_batch(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(export_keys)
+    writer.writerows([[export_value(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+def stream_export_rows(stmt, batch_size: int = EXPORT_BATCH_SIZE):
+    # The connection is opened when the response starts iterating, and stream_results
+    # makes psycopg2 use a named server-side cursor, so only one batch is held in memory.
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+            for rows in result.partitions():
+                yield rows
+    finally:
+        session.close()
+
+def stream_export(stmt, file_format: str, compress: bool = False):
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(text):
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    if file_format == "csv":
+        yield encode(csv_batch([], header=True))
+    for rows in stream_export_rows(stmt):
+        text = ndjson_batch(rows) if file_format == "ndjson" else csv_batch(rows)
+        chunk = encode(text)
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
+
+def export_books(file_format: str = "ndjson", since=None, compress: bool = False):
+    if file_format not in EXPORT_FORMATS:
+        return False, f"Invalid export format, expected one of {', '.join(EXPORT_FORMATS)}", None
+    export = {
+        "filename": f"catalog.{file_format}" + (".gz" if compress else ""),
+        "media_type": "application/gzip" if compress else EXPORT_MEDIA_TYPES[file_format],
+        "content": stream_export(build_export_stmt(since), file_format, compress),
+    }
+    return True, "Export started", export
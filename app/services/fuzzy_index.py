@@ -0,0 +1,112 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from sqlalchemy import select
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book
+from app.services.catalog_events import subscribe, BOOK_DELETED, BOOK_RANKING_UPDATED
+
+# In-process stand-in for pg_trgm on backends without it. Trigrams are built the
+# way pg_trgm builds them (lowercased words padded with two leading spaces and
+# one trailing space) and scored by how many of the query's trigrams a field
+# contains, which tracks word_similarity closely enough for typo tolerance.
+
+INDEXED_FIELDS = ("title", "author_name")
+
+def trigrams(text: str):
+    grams = set()
+    for word in re.findall(r"\w+", (text or "").lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+class NGramIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = defaultdict(set)
+        self.field_grams = {}
+        self.book_keys = defaultdict(list)
+
+    def __len__(self):
+        return len(self.book_keys)
+
+    def add(self, book_id: str, **fields):
+        with self.lock:
+            self.remove(book_id)
+            for field in INDEXED_FIELDS:
+                grams = frozenset(trigrams(fields.get(field)))
+                if not grams:
+                    continue
+                key = (book_id, field)
+                self.field_grams[key] = grams
+                self.book_keys[book_id].append(key)
+                for gram in grams:
+                    self.postings[gram].add(key)
+
+    def remove(self, book_id: str):
+        with self.lock:
+            for key in self.book_keys.pop(book_id, []):
+                for gram in self.field_grams.pop(key):
+                    posting = self.postings[gram]
+                    posting.discard(key)
+                    if not posting:
+                        del self.postings[gram]
+
+    def search(self, term: str, threshold: float = 0.5, limit=None):
+        query_grams = trigrams(term)
+        if not query_grams:
+            return []
+        required = max(1, math.ceil(threshold * len(query_grams)))
+        with self.lock:
+            # Prefix filtering: a field sharing `required` of the query's trigrams must
+            # contain at least one of its (len - required + 1) rarest ones, so only those
+            # posting lists are scanned for candidates.
+            ordered = sorted(query_grams, key=lambda gram: len(self.postings.get(gram, ())))
+            candidates = set()
+            for gram in ordered[:len(ordered) - required + 1]:
+                candidates.update(self.postings.get(gram, ()))
+
+            scores = {}
+            for key in candidates:
+                score = len(query_grams & self.field_grams[key]) / len(query_grams)
+                if score >= threshold and score > scores.get(key[0], 0):
+                    scores[key[0]] = score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+fuzzy_index = NGramIndex()
+_built = False
+_build_lock = threading.Lock()
+
+def _load_books(conn, stmt):
+    for row in conn.execution_options(stream_results=True, yield_per=5000).execute(stmt):
+        fuzzy_index.add(row.book_id, title=row.title, author_name=row.author_name)
+
+def ensure_fuzzy_index(engine):
+    global _built
+    if _built:
+        return fuzzy_index
+    with _build_lock:
+        if not _built:
+            with engine.connect() as conn:
+                _load_books(conn, select(Book.book_id, Book.title, Book.author_name))
+            _built = True
+    return fuzzy_index
+
+@subscribe
+def update_fuzzy_index(action, book_ids):
+    if not _built or not book_ids or action == BOOK_RANKING_UPDATED:
+        return
+    for book_id in book_ids:
+        fuzzy_index.remove(book_id)
+    if action == BOOK_DELETED:
+        return
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            # Rows that no longer exist (e.g. a renamed book_id) simply stay removed.
+            _load_books(conn, select(Book.book_id, Book.title, Book.author_name).where(Book.book_id.in_(book_ids)))
+    finally:
+        session.close()
@@ -0,0 +1,193 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+from sqlalchemy import select, desc
+from app.config import GENRE_TOP_N
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book, sort_key
+from app.services.catalog_events import subscribe, BOOK_DELETED, BOOK_RANKING_UPDATED
+from app.services.response_cache import get_catalog_version
+
+# Per-genre top-N lists behind preference recommendations. Genres are free text
+# and a value may hold several categories ("Fiction; Fantasy"), so values are split
+# and normalised before books are ranked under each of them by popularity_score.
+# Lists follow book writes and score refreshes through catalog events; a user's
+# genres are combined with a k-way merge. The lists are per process, so each build
+# records the shared catalog version it saw: when the version moves without an event
+# of this process (another worker, a CLI import, the popularity cron), the lists are
+# rebuilt on next use.
+
+GENRE_SEPARATORS = re.compile(r"[;|/]")
+IGNORED_GENRES = {"", "unknown"}
+# Events touching more books than this rebuild the lists from one scan.
+REBUILD_THRESHOLD = 10000
+
+def normalise_genres(value):
+    genres = []
+    for part in GENRE_SEPARATORS.split(str(value or "").lower()):
+        genre = " ".join(part.split()).strip(" .,")
+        if genre not in IGNORED_GENRES and genre not in genres:
+            genres.append(genre)
+    return genres
+
+class GenreRankings:
+    def __init__(self, size=GENRE_TOP_N):
+        self.lock = threading.RLock()
+        self.size = size
+        # genre -> [(-score, book_id)] ascending, i.e. best first
+        self.rankings = defaultdict(list)
+        # book_id -> (entry, genres whose list holds it)
+        self.book_entries = {}
+        # genre -> raw genre values that normalise to it, to refill a list from the database
+        self.raw_genres = defaultdict(set)
+        # genres with more books than fit in their list
+        self.overflowing = set()
+
+    def _forget(self, book_id, genre):
+        entry, genres = self.book_entries[book_id]
+        genres.discard(genre)
+        if not genres:
+            del self.book_entries[book_id]
+
+    def _track(self, book_id, entry, genre):
+        self.book_entries.setdefault(book_id, (entry, set()))[1].add(genre)
+
+    def add(self, book_id: str, genre, score):
+        entry = (-(score or 0.0), book_id)
+        with self.lock:
+            for name in normalise_genres(genre):
+                self.raw_genres[name].add(genre)
+                ranking = self.rankings[name]
+                if len(ranking) >= self.size and entry > ranking[-1]:
+                    self.overflowing.add(name)
+                    continue
+                bisect.insort(ranking, entry)
+                self._track(book_id, entry, name)
+                if len(ranking) > self.size:
+                    self._forget(ranking.pop()[1], name)
+                    self.overflowing.add(name)
+
+    def remove(self, book_id: str):
+        # Returns the genres whose list may now miss a book that did not fit before.
+        with self.lock:
+            entry, genres = self.book_entries.pop(book_id, (None, ()))
+            for name in genres:
+                ranking = self.rankings[name]
+                position = bisect.bisect_left(ranking, entry)
+                if position < len(ranking) and ranking[position] == entry:
+                    del ranking[position]
+            return [name for name in genres if name in self.overflowing]
+
+    def replace(self, genre: str, rows):
+        # rows: the genre's best (book_id, popularity_score) pairs, at most size of them
+        with self.lock:
+            for _, book_id in self.rankings.pop(genre, []):
+                self._forget(book_id, genre)
+            ranking = self.rankings[genre]
+            for book_id, score in rows:
+                entry = (-(score or 0.0), book_id)
+                ranking.append(entry)
+                self._track(book_id, entry, genre)
+            ranking.sort()
+            if len(ranking) < self.size:
+                self.overflowing.discard(genre)
+
+    def raw_values(self, genre: str):
+        with self.lock:
+            return list(self.raw_genres.get(genre, ()))
+
+    def merge(self, genres, limit: int, exclude=()):
+        # Lists are already sorted, so heapq.merge yields the best book across all of
+        # them one at a time; books seen in an earlier genre or excluded are skipped.
+        seen = set(exclude)
+        book_ids = []
+        with self.lock:
+            for _, book_id in heapq.merge(*[self.rankings.get(name, ()) for name in genres]):
+                if book_id in seen:
+                    continue
+                seen.add(book_id)
+                book_ids.append(book_id)
+                if len(book_ids) >= limit:
+                    break
+        return book_ids
+
+genre_rankings = GenreRankings()
+_built = False
+_built_version = None
+_build_lock = threading.Lock()
+
+def version_after(action, tag):
+    # The version tag once invalidate_response_cache has bumped it for this event. It
+    # is subscribed in api.py, after this module's listener, so it runs second.
+    if tag is None:
+        return None
+    epoch, version, ranking_version = tag.split(".")
+    if action == BOOK_RANKING_UPDATED:
+        return f"{epoch}.{version}.{int(ranking_version) + 1}"
+    return f"{epoch}.{int(version) + 1}.{ranking_version}"
+
+def _load_books(conn, rankings, stmt):
+    for row in conn.execution_options(stream_results=True, yield_per=5000).execute(stmt):
+        rankings.add(row.book_id, row.genre, row.popularity_score)
+
+def _rebuild(conn):
+    global genre_rankings
+    rankings = GenreRankings()
+    _load_books(conn, rankings, select(Book.book_id, Book.genre, Book.popularity_score))
+    genre_rankings = rankings
+
+def _refill_genres(conn, genres):
+    for genre in genres:
+        stmt = (
+            select(Book.book_id, Book.popularity_score)
+            .where(Book.genre.in_(genre_rankings.raw_values(genre)))
+            .order_by(desc(sort_key(Book.popularity_score)), Book.book_id)
+            .limit(genre_rankings.size)
+        )
+        genre_rankings.replace(genre, conn.execute(stmt).fetchall())
+
+def ensure_genre_rankings(engine):
+    global _built, _built_version
+    version = get_catalog_version(ranking=True)
+    if _built and (version is None or version == _built_version):
+        return genre_rankings
+    with _build_lock:
+        if not _built or (version is not None and version != _built_version):
+            with engine.connect() as conn:
+                _rebuild(conn)
+            _built_version = version
+            _built = True
+    return genre_rankings
+
+@subscribe
+def update_genre_rankings(action, book_ids):
+    global _built_version
+    if not _built or not book_ids:
+        return
+    engine, session = connect_to_db()
+    try:
+        with _build_lock, engine.connect() as conn:
+            version = get_catalog_version(ranking=True)
+            if version is None or version != _built_version:
+                # Another process wrote since the lists were built: leave them to the
+                # rebuild in ensure_genre_rankings.
+                _built_version = None
+                return
+            # The lists now follow this event, so they match the version after its
+            # bump; a write elsewhere in between is caught by ensure_genre_rankings.
+            _built_version = version_after(action, version)
+            if len(book_ids) > REBUILD_THRESHOLD:
+                _rebuild(conn)
+                return
+            truncated = set()
+            for book_id in book_ids:
+                truncated.update(genre_rankings.remove(book_id))
+            if action != BOOK_DELETED:
+                _load_books(conn, genre_rankings, select(Book.book_id, Book.genre, Book.popularity_score).where(Book.book_id.in_(book_ids)))
+            # A full list that lost a book cannot tell which unlisted book moves up,
+            # so it is reloaded from the database.
+            _refill_genres(conn, truncated)
+    finally:
+        session.close()
@@ -0,0 +1,240 @@
+import io
+import json
+import os
+import threading
+import time
+from app.database.connector import connect_to_db
+from app.services.catalog_events import publish, BOOK_UPDATED
+
+# Supplier feeds use the same columns as app/utils/books.csv.
+CATALOG_COLUMNS = [
+    "isbn10", "title", "subtitle", "authors", "categories", "thumbnail",
+    "description", "published_year", "average_rating", "num_pages", "ratings_count"
+]
+BOOK_COLUMNS = [
+    "book_id", "title", "author_name", "subtitle", "thumbnail", "genre",
+    "description", "year", "rating", "num_pages", "ratings_count"
+]
+DEFAULT_CHUNK_SIZE = 50000
+
+CREATE_STAGING_TABLES = """
+CREATE TEMP TABLE IF NOT EXISTS staging_books (
+    book_id text, title text, author_name text, subtitle text, thumbnail text, genre text,
+    description text, year integer, rating numeric, num_pages numeric, ratings_count numeric
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS staging_book_authors (book_id text, name text) ON COMMIT DELETE ROWS;
+"""
+
+UPSERT_BOOKS = """
+INSERT INTO books (book_id, title, author_name, subtitle, thumbnail, genre, description, year, rating, num_pages, ratings_count)
+SELECT DISTINCT ON (book_id) book_id, title, author_name, subtitle, thumbnail, genre, description, year, rating, num_pages, ratings_count
+FROM staging_books
+ON CONFLICT (book_id) DO UPDATE SET
+    title = EXCLUDED.title,
+    author_name = EXCLUDED.author_name,
+    subtitle = EXCLUDED.subtitle,
+    thumbnail = EXCLUDED.thumbnail,
+    genre = EXCLUDED.genre,
+    description = EXCLUDED.description,
+    year = EXCLUDED.year,
+    rating = EXCLUDED.rating,
+    num_pages = EXCLUDED.num_pages,
+    ratings_count = EXCLUDED.ratings_count,
+    updated_at = now()
+RETURNING book_id
+"""
+
+INSERT_AUTHORS = """
+INSERT INTO authors (name, biography)
+SELECT DISTINCT s.name, 'Unknown' FROM staging_book_authors s
+WHERE NOT EXISTS (SELECT 1 FROM authors a WHERE a.name = s.name)
+"""
+
+INSERT_BOOK_AUTHORS = """
+INSERT INTO books_and_authors (book_id, author_id)
+SELECT DISTINCT s.book_id, a.author_id
+FROM staging_book_authors s JOIN authors a ON a.name = s.name
+ON CONFLICT DO NOTHING
+"""
+
+import_lock = threading.Lock()
+import_status = {"status": "idle"}
+
+def detect_format(path: str):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".ndjson", ".jsonl", ".json"):
+        return "ndjson"
+    return "csv"
+
+def read_chunks(path: str, file_format: str, chunk_size: int):
+    # pandas is imported here rather than at module level, so importing the API does
+    # not pay for it; only imports use it.
+    import pandas as pd
+    dtype = {"isbn10": str, "isbn13": str}
+    if file_format == "ndjson":
+        return pd.read_json(path, lines=True, chunksize=chunk_size, dtype=dtype)
+    return pd.read_csv(path, chunksize=chunk_size, dtype=dtype)
+
+def clean_text(series, max_length=None, lower=True):
+    series = series.fillna("Unknown").astype(str)
+    if lower:
+        series = series.str.lower()
+    if max_length:
+        series = series.str.slice(0, max_length)
+    return series
+
+def normalise_chunk(frame):
+    import pandas as pd
+    # Same cleaning populate_database.py used to do row by row, done column-wise.
+    frame = frame.reindex(columns=CATALOG_COLUMNS)
+    frame = frame[frame["isbn10"].notna()]
+    book_ids = frame["isbn10"].astype(str).str.strip().str.slice(0, 10)
+    authors = frame["authors"].fillna("Unknown").astype(str).str.lower()
+
+    numeric = {}
+    for column in ("published_year", "average_rating", "num_pages", "ratings_count"):
+        values = pd.to_numeric(frame[column], errors="coerce")
+        numeric[column] = values.fillna(values.mean())
+
+    books = pd.DataFrame({
+        "book_id": book_ids,
+        "title": clean_text(frame["title"], 350),
+        "author_name": authors.str.split(";").str[0].str.strip(),
+        "subtitle": clean_text(frame["subtitle"], 350),
+        "thumbnail": clean_text(frame["thumbnail"], 300, lower=False),
+        "genre": clean_text(frame["categories"], 100),
+        "description": clean_text(frame["description"]),
+        "year": numeric["published_year"].round().astype("Int64"),
+        "rating": numeric["average_rating"],
+        "num_pages": numeric["num_pages"],
+        "ratings_count": numeric["ratings_count"],
+    }).drop_duplicates(subset="book_id", keep="last")
+
+    book_authors = (
+        pd.DataFrame({"book_id": book_ids, "name": authors.str.split(";")})
+        .explode("name")
+        .assign(name=lambda df: df["name"].str.strip().str.slice(0, 500))
+    )
+    book_authors = book_authors[book_authors["name"] != ""].drop_duplicates()
+    return books, book_authors
+
+def copy_frame(cursor, table: str, frame):
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, na_rep="")
+    buffer.seek(0)
+    columns = ", ".join(frame.columns)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer)
+
+def load_chunk(raw_connection, books, book_authors):
+    cursor = raw_connection.cursor()
+    try:
+        cursor.execute(CREATE_STAGING_TABLES)
+        copy_frame(cursor, "staging_books", books[BOOK_COLUMNS])
+        copy_frame(cursor, "staging_book_authors", book_authors[["book_id", "name"]])
+        cursor.execute(UPSERT_BOOKS)
+        book_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(INSERT_AUTHORS)
+        cursor.execute(INSERT_BOOK_AUTHORS)
+        raw_connection.commit()
+        return book_ids
+    except Exception:
+        raw_connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def source_signature(path: str):
+    stat = os.stat(path)
+    return {"source": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+def read_checkpoint(checkpoint_path: str, signature: dict):
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as f:
+        checkpoint = json.load(f)
+    if any(checkpoint.get(key) != value for key, value in signature.items()):
+        return None
+    return checkpoint
+
+def write_checkpoint(checkpoint_path: str, checkpoint: dict):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def import_catalog(
+        path: str,
+        file_format=None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        resume: bool = True,
+        checkpoint_path=None,
+        progress=print
+    ):
+    file_format = file_format or detect_format(path)
+    checkpoint_path = checkpoint_path or path + ".import-checkpoint.json"
+    signature = source_signature(path)
+    checkpoint = read_checkpoint(checkpoint_path, signature) if resume else None
+    if checkpoint is None:
+        checkpoint = {**signature, "chunk_size": chunk_size, "chunks_done": 0, "rows_done": 0}
+    chunk_size = checkpoint["chunk_size"]
+
+    report = {
+        "source": signature["source"],
+        "format": file_format,
+        "chunks_skipped": checkpoint["chunks_done"],
+        "chunks_loaded": 0,
+        "rows_loaded": 0,
+        "rows_per_sec": 0.0,
+    }
+    engine, session = connect_to_db()
+    raw_connection = engine.raw_connection()
+    started = time.perf_counter()
+    try:
+        for chunk_number, frame in enumerate(read_chunks(path, file_format, chunk_size)):
+            if chunk_number < checkpoint["chunks_done"]:
+                continue
+            books, book_authors = normalise_chunk(frame)
+            book_ids = load_chunk(raw_connection, books, book_authors)
+            publish(BOOK_UPDATED, book_ids)
+
+            checkpoint["chunks_done"] = chunk_number + 1
+            checkpoint["rows_done"] += len(books)
+            write_checkpoint(checkpoint_path, checkpoint)
+
+            report["chunks_loaded"] += 1
+            report["rows_loaded"] += len(books)
+            elapsed = time.perf_counter() - started
+            report["rows_per_sec"] = round(report["rows_loaded"] / elapsed, 1) if elapsed else 0.0
+            if progress:
+                progress(f"chunk {chunk_number + 1}: {report['rows_loaded']} rows, {report['rows_per_sec']} rows/sec")
+    finally:
+        raw_connection.close()
+        session.close()
+
+    # A finished import starts from scratch next time.
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+def run_catalog_import(path: str, file_format=None, chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = True):
+    if not import_lock.acquire(blocking=False):
+        return False, "An import is already running", None
+    try:
+        import_status.clear()
+        import_status.update({"status": "running", "source": path})
+        report = import_catalog(
+            path, file_format, chunk_size, resume,
+            progress=lambda message: import_status.update({"progress": message})
+        )
+        import_status.update({"status": "finished", **report})
+        return True, "Catalog imported successfully", report
+    except Exception as e:
+        print(e)
+        import_status.update({"status": "failed", "error": str(e)})
+        return False, str(e), None
+    finally:
+        import_lock.release()
+
+def get_import_status():
+    return dict(import_status)
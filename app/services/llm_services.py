@@ -1,45 +1,149 @@
-from sqlalchemy import select, insert
+import threading
+from collections import OrderedDict, deque
+from sqlalchemy import select, insert, func
+from app.config import HISTORY_MAX_MESSAGES, HISTORY_TOKEN_BUDGET, HISTORY_CACHED_SESSIONS
 from app.database.connector import connect_to_db
 from app.database.schemas.llm_message_hist import MessageHistory
 from langchain_core.messages import HumanMessage, AIMessage
 
+# Chat history is stored per session and read as a window of its latest messages, so
+# what a request reads and sends to the model does not grow with the table. The window
+# of recently active sessions is kept in a ring buffer together with the id of its
+# newest message. The buffer is per process, so before it is used the session's
+# max(id) is read from the (session_id, id) index: turns written by another worker
+# change it and the window is read again.
+
+# Rough size of a token in characters; only used to bound the prompt.
+CHARS_PER_TOKEN = 4
+
+class SessionHistoryCache:
+    def __init__(self, max_sessions=HISTORY_CACHED_SESSIONS, window=HISTORY_MAX_MESSAGES):
+        self.lock = threading.Lock()
+        # session_id -> (deque of (message, role), id of the newest message)
+        self.sessions = OrderedDict()
+        self.max_sessions = max_sessions
+        self.window = window
+        # Bumped on every append, so a window read from the database while another
+        # request was writing is not cached over the newer messages.
+        self.writes = 0
+
+    def get(self, session_id: str):
+        # Returns (rows, last_id), or None when the session is not cached.
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                return None
+            self.sessions.move_to_end(session_id)
+            return list(entry[0]), entry[1]
+
+    def load(self, session_id: str, rows, last_id, writes_before: int):
+        if self.max_sessions <= 0:
+            return
+        with self.lock:
+            if self.writes != writes_before:
+                return
+            self.sessions[session_id] = (deque(rows, maxlen=self.window), last_id)
+            self.sessions.move_to_end(session_id)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+
+    def extend(self, session_id: str, rows, last_id, previous_last_id):
+        # previous_last_id: the newest id the cached window must end at for rows to
+        # follow it directly; otherwise the window is dropped and read again.
+        with self.lock:
+            self.writes += 1
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                return
+            if previous_last_id is None or entry[1] != previous_last_id:
+                del self.sessions[session_id]
+                return
+            entry[0].extend(rows)
+            self.sessions[session_id] = (entry[0], last_id)
+
+history_cache = SessionHistoryCache()
+
 def parse_output(db_output):
     return [HumanMessage(content=msg) if role == 'human' else AIMessage(content=msg) for msg, role in db_output]
 
-def execute_search_query(stmt, engine):
-    with engine.connect() as conn:
-        output = conn.execute(stmt)
-        results = output.fetchall()
-        return results
+def estimate_tokens(message):
+    return len(message or "") // CHARS_PER_TOKEN + 1
+
+def fit_token_budget(rows, max_tokens: int):
+    # Keeps the newest messages that fit; rows are oldest first.
+    kept = []
+    used = 0
+    for message, role in reversed(rows):
+        used += estimate_tokens(message)
+        if used > max_tokens:
+            break
+        kept.append((message, role))
+    return kept[::-1]
+
+def build_history_stmt(session_id: str, limit: int):
+    # Served backwards from the (session_id, id) index.
+    return (
+        select(MessageHistory.messages, MessageHistory.role, MessageHistory.id)
+        .where(MessageHistory.session_id == session_id)
+        .order_by(MessageHistory.id.desc())
+        .limit(limit)
+    )
+
+def build_last_id_stmt(session_id: str):
+    return select(func.max(MessageHistory.id)).where(MessageHistory.session_id == session_id)
 
-def get_message_history(limit=None):
+def build_newer_count_stmt(session_id: str, last_id):
+    stmt = select(func.count()).where(MessageHistory.session_id == session_id)
+    return stmt.where(MessageHistory.id > last_id) if last_id is not None else stmt
+
+def load_history_window(session_id: str, limit: int):
+    cached = history_cache.get(session_id) if limit <= history_cache.window else None
+    writes_before = history_cache.writes
+    engine, session = connect_to_db()
     try:
-        engine, session = connect_to_db()
-        stmt = select(MessageHistory.messages, MessageHistory.role)
-        if limit:
-            stmt = stmt.limit(limit)
-        results = execute_search_query(stmt, engine)
-        parsed_results = parse_output(results)
-        if results:
-            return True, parsed_results
+        with engine.connect() as conn:
+            if cached is not None:
+                rows, last_id = cached
+                if conn.execute(build_last_id_stmt(session_id)).scalar() == last_id:
+                    return rows[-limit:]
+            fetched = conn.execute(build_history_stmt(session_id, max(limit, history_cache.window))).fetchall()
+    finally:
+        session.close()
+    rows = [(message, role) for message, role, _ in reversed(fetched)]
+    history_cache.load(session_id, rows[-history_cache.window:], fetched[0].id if fetched else None, writes_before)
+    return rows[-limit:]
+
+def get_message_history(session_id: str, limit: int = HISTORY_MAX_MESSAGES, max_tokens: int = HISTORY_TOKEN_BUDGET):
+    try:
+        rows = fit_token_budget(load_history_window(session_id, limit), max_tokens)
+        if rows:
+            return True, parse_output(rows)
         else:
             return False, None
     except Exception as e:
         print(e)
         return False, None
-    finally:
-        session.close()
 
-def append_to_history(message, role):
+def append_to_history(session_id, messages):
+    # messages: (message, role) pairs, written in one statement
     try:
         engine, session = connect_to_db()
-        stmt = insert(MessageHistory).values(
-            messages=message,
-            role=role
-        )
+        rows = [(message, role) for message, role in messages]
+        stmt = insert(MessageHistory).values([
+            {"session_id": session_id, "messages": message, "role": role} for message, role in rows
+        ])
+        cached = history_cache.get(session_id)
+        previous_last_id = None
         with engine.connect() as conn:
-            conn.execute(stmt)
+            ids = conn.execute(stmt.returning(MessageHistory.id)).scalars().all()
+            if cached is not None:
+                # The new rows follow the cached window only if no other worker wrote
+                # to the session since it was cached.
+                newer = conn.execute(build_newer_count_stmt(session_id, cached[1])).scalar()
+                if newer == len(ids):
+                    previous_last_id = cached[1]
             conn.commit()
+        history_cache.extend(session_id, rows, max(ids), previous_last_id)
         return True
     except Exception as e:
         print(e)
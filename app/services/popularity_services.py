@@ -0,0 +1,113 @@
+import threading
+from sqlalchemy import bindparam, text
+from app.config import POPULARITY_PRIOR_VOTES, POPULARITY_LIKE_WEIGHT, POPULARITY_REFRESH_DELAY
+from app.database.connector import connect_to_db
+from app.services.catalog_events import subscribe, publish, BOOK_DELETED, BOOK_RANKING_UPDATED
+
+# popularity_score = Bayesian-average rating + like_weight * ln(1 + likes)
+#
+# The Bayesian average pulls a book's rating towards the catalog mean until it has
+# enough votes: (v / (v + m)) * R + (m / (v + m)) * C, with v = ratings_count,
+# R = rating, C = mean rating and m = POPULARITY_PRIOR_VOTES. A 5.0 from 3 votes
+# therefore lands close to C instead of topping the trending list.
+
+MEAN_RATING = "SELECT coalesce(avg(rating), 0) FROM books WHERE rating IS NOT NULL"
+
+REFRESH_POPULARITY_SCORES = """
+WITH likes AS (
+    SELECT book_id, count(*) AS like_count FROM liked_books {like_filter} GROUP BY book_id
+),
+scores AS (
+    SELECT
+        b.book_id,
+        (
+            (coalesce(b.ratings_count, 0) * coalesce(b.rating, :mean_rating) + :prior_votes * :mean_rating)
+            / (coalesce(b.ratings_count, 0) + :prior_votes)
+        )::double precision
+        + :like_weight * ln(1 + coalesce(l.like_count, 0)) AS score
+    FROM books b
+    LEFT JOIN likes l ON l.book_id = b.book_id
+    {book_filter}
+)
+UPDATE books
+SET popularity_score = scores.score
+FROM scores
+WHERE books.book_id = scores.book_id
+AND books.popularity_score IS DISTINCT FROM scores.score
+RETURNING books.book_id
+"""
+
+_refresh_lock = threading.Lock()
+_pending_timer = None
+_pending_book_ids = set()
+_pending_full = False
+_timer_lock = threading.Lock()
+# Catalog mean rating from the last full refresh. A like or a single book write barely
+# moves it, so partial refreshes reuse it and the cron's full refresh updates it.
+_mean_rating = None
+
+def build_refresh_stmt(book_ids=None):
+    if book_ids is None:
+        return text(REFRESH_POPULARITY_SCORES.format(like_filter="", book_filter=""))
+    stmt = text(REFRESH_POPULARITY_SCORES.format(
+        like_filter="WHERE book_id IN :book_ids", book_filter="WHERE b.book_id IN :book_ids"
+    ))
+    return stmt.bindparams(bindparam("book_ids", expanding=True))
+
+def refresh_popularity_scores(book_ids=None):
+    # One set-based UPDATE over the given books, or the whole catalog when book_ids is
+    # None; rows whose score did not change are not rewritten.
+    global _mean_rating
+    if book_ids is not None:
+        book_ids = list(book_ids)
+        if not book_ids:
+            return 0
+    with _refresh_lock:
+        engine, session = connect_to_db()
+        try:
+            with engine.begin() as conn:
+                if book_ids is None or _mean_rating is None:
+                    _mean_rating = float(conn.execute(text(MEAN_RATING)).scalar())
+                params = {"prior_votes": POPULARITY_PRIOR_VOTES, "like_weight": POPULARITY_LIKE_WEIGHT, "mean_rating": _mean_rating}
+                if book_ids is not None:
+                    params["book_ids"] = book_ids
+                changed = conn.execute(build_refresh_stmt(book_ids), params).scalars().all()
+        finally:
+            session.close()
+    if changed:
+        publish(BOOK_RANKING_UPDATED, changed)
+    return len(changed)
+
+def _run_scheduled_refresh():
+    global _pending_timer, _pending_book_ids, _pending_full
+    with _timer_lock:
+        _pending_timer = None
+        book_ids = None if _pending_full else _pending_book_ids
+        _pending_book_ids, _pending_full = set(), False
+    try:
+        refresh_popularity_scores(book_ids)
+    except Exception as e:
+        print(e)
+
+def schedule_popularity_refresh(book_ids=None, delay: float = POPULARITY_REFRESH_DELAY):
+    # Writes arrive in bursts (bulk likes, import chunks), so refreshes are debounced:
+    # the first write starts a timer and later writes add their books to it. Without
+    # book_ids the whole catalog is refreshed.
+    global _pending_timer, _pending_full
+    with _timer_lock:
+        if book_ids is None:
+            _pending_full = True
+        else:
+            _pending_book_ids.update(book_ids)
+        if _pending_timer is not None:
+            return False
+        _pending_timer = threading.Timer(delay, _run_scheduled_refresh)
+        _pending_timer.daemon = True
+        _pending_timer.start()
+        return True
+
+@subscribe
+def refresh_after_catalog_write(action, book_ids):
+    # Deleted books have no score left to update.
+    if action not in (BOOK_RANKING_UPDATED, BOOK_DELETED) and book_ids:
+        schedule_popularity_refresh(book_ids)
@@ -0,0 +1,122 @@
+import os
+import threading
+import numpy as np
+from sqlalchemy import select
+from app.config import RECOMMENDER_MODEL_PATH, RECOMMENDER_NEIGHBOURS
+from app.database.connector import connect_to_db
+from app.database.schemas.liked_books import LikedBooks
+
+# Item-to-item collaborative filtering over liked_books. The batch job
+# (app.utils.build_recommendations) stores, for every liked book, its
+# RECOMMENDER_NEIGHBOURS most similar books by cosine similarity of their like
+# vectors. Requests only read the rows of the books a user liked and add them up.
+
+LIKES_FETCH_SIZE = 50000
+SIMILARITY_BLOCK_SIZE = 1024
+
+def load_likes(conn):
+    emails, book_ids = [], []
+    result = conn.execution_options(stream_results=True).execute(select(LikedBooks.email, LikedBooks.book_id))
+    for rows in result.partitions(LIKES_FETCH_SIZE):
+        for email, book_id in rows:
+            emails.append(email)
+            book_ids.append(book_id)
+    return emails, book_ids
+
+def build_like_matrix(emails, book_ids):
+    # users x books, 1 where the user liked the book. SciPy is only needed by the batch
+    # job, so the API does not import it.
+    from scipy import sparse
+    users, user_rows = np.unique(np.asarray(emails, dtype=str), return_inverse=True)
+    books, book_columns = np.unique(np.asarray(book_ids, dtype=str), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(book_columns), dtype=np.float32), (user_rows, book_columns)),
+        shape=(len(users), len(books))
+    )
+    return books, matrix
+
+def compute_item_neighbours(matrix, k=RECOMMENDER_NEIGHBOURS, block_size=SIMILARITY_BLOCK_SIZE):
+    # Columns are scaled to unit length, so each block of the item x item product
+    # holds cosine similarities. Blocks keep the dense-ish product bounded in memory.
+    from scipy import sparse
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1
+    normalized = (matrix @ sparse.diags(1 / norms)).tocsc()
+    item_vectors = normalized.T.tocsr()
+    item_count = item_vectors.shape[0]
+    neighbours = np.full((item_count, k), -1, dtype=np.int32)
+    similarities = np.zeros((item_count, k), dtype=np.float32)
+    for start in range(0, item_count, block_size):
+        block = (item_vectors[start:start + block_size] @ normalized).tocsr()
+        for row in range(block.shape[0]):
+            columns = block.indices[block.indptr[row]:block.indptr[row + 1]]
+            values = block.data[block.indptr[row]:block.indptr[row + 1]]
+            keep = (columns != start + row) & (values > 0)
+            columns, values = columns[keep], values[keep]
+            if len(columns) > k:
+                top = np.argpartition(-values, k - 1)[:k]
+                columns, values = columns[top], values[top]
+            order = np.lexsort((columns, -values))
+            neighbours[start + row, :len(order)] = columns[order]
+            similarities[start + row, :len(order)] = values[order]
+    return neighbours, similarities
+
+def save_item_neighbours(path, book_ids, neighbours, similarities):
+    # Written next to the target and swapped in, so a running API never loads half a file.
+    temporary_path = f"{path}.tmp.npz"
+    np.savez(temporary_path, book_ids=book_ids, neighbours=neighbours, similarities=similarities)
+    os.replace(temporary_path, path)
+
+def build_item_neighbours(path=RECOMMENDER_MODEL_PATH, k=RECOMMENDER_NEIGHBOURS):
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            emails, book_ids = load_likes(conn)
+    finally:
+        session.close()
+    books, matrix = build_like_matrix(emails, book_ids)
+    neighbours, similarities = compute_item_neighbours(matrix, k)
+    save_item_neighbours(path, books, neighbours, similarities)
+    return matrix.shape[0], matrix.shape[1], matrix.nnz
+
+class ItemNeighbours:
+    def __init__(self, book_ids, neighbours, similarities):
+        self.book_ids = book_ids
+        self.neighbours = neighbours
+        self.similarities = similarities
+        self.positions = {book_id: i for i, book_id in enumerate(book_ids.tolist())}
+
+    def recommend(self, liked_book_ids, limit: int):
+        # Score every neighbour of the liked books by its summed similarity to them.
+        rows = [self.positions[book_id] for book_id in liked_book_ids if book_id in self.positions]
+        if not rows:
+            return []
+        candidates = self.neighbours[rows].ravel()
+        weights = self.similarities[rows].ravel()
+        keep = (candidates >= 0) & ~np.isin(candidates, rows)
+        candidates, inverse = np.unique(candidates[keep], return_inverse=True)
+        scores = np.bincount(inverse, weights=weights[keep])
+        if len(candidates) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            candidates, scores = candidates[top], scores[top]
+        order = np.lexsort((candidates, -scores))
+        return [(self.book_ids[i].item(), float(score)) for i, score in zip(candidates[order], scores[order])]
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+def get_item_neighbours(path=RECOMMENDER_MODEL_PATH):
+    # Loaded on first use and reloaded when the batch job replaces the file.
+    global _model, _model_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _model is None or mtime != _model_mtime:
+        with _model_lock:
+            if _model is None or mtime != _model_mtime:
+                with np.load(path, allow_pickle=False) as data:
+                    _model = ItemNeighbours(data["book_ids"], data["neighbours"], data["similarities"])
+                _model_mtime = mtime
+    return _model
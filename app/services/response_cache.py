@@ -0,0 +1,241 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from starlette.concurrency import run_in_threadpool
+from app.config import CACHE_BACKEND, CACHE_URL, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES
+from app.services.catalog_events import BOOK_RANKING_UPDATED
+from app.services.catalog_version import get_catalog_version_tag, peek_catalog_version_tag, bump_catalog_version
+
+# Responses are stored under keys that embed the catalog version. Every catalog write
+# bumps the version through catalog_events, so pages cached before the write can no
+# longer be looked up and simply age out of the backend. The version is shared by all
+# processes (the database row in catalog_version, or a Redis key with the redis
+# backend); each process that writes the catalog subscribes invalidate_response_cache.
+# Popularity refreshes only bump a separate ranking version, which is part of the
+# version tag of trending pages alone, so likes do not flush every other page.
+
+CATALOG_VERSION_KEY = "catalog_version"
+RANKING_VERSION_KEY = "catalog_ranking_version"
+CATALOG_EPOCH_KEY = "catalog_epoch"
+CACHE_RESPONSES = CACHE_BACKEND != "none"
+
+class CacheStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def increment(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+class MemoryCache:
+    # Per-process LRU with a TTL. Each worker keeps its own entries, but the version
+    # in their keys is read from the database, so a write in any process reaches all.
+    name = "memory"
+    # Entries live in this process; only a stale version tag needs the database.
+    blocking = False
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.stats.increment("evictions")
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats.increment("evictions")
+
+    def get_version_tag(self, ranking=False):
+        return get_catalog_version_tag(ranking)
+
+    def peek_version_tag(self, ranking=False):
+        return peek_catalog_version_tag(ranking)
+
+    def bump_version(self, ranking=False):
+        bump_catalog_version(ranking)
+        if ranking:
+            # Trending entries are keyed on the ranking version and become unreachable;
+            # everything else stays valid.
+            return
+        with self.lock:
+            # Entries under the old version are unreachable now; drop this worker's right
+            # away, other workers' age out.
+            self.entries.clear()
+
+    def size(self):
+        return len(self.entries)
+
+def encode_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+class RedisCache:
+    # Any server speaking the Redis protocol works, e.g. a local redis-server or
+    # Valkey container during development.
+    name = "redis"
+    blocking = True
+
+    def __init__(self, url=CACHE_URL, ttl=CACHE_TTL_SECONDS):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package") from e
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        try:
+            self.client.set(CATALOG_EPOCH_KEY, uuid.uuid4().hex[:8], nx=True)
+        except Exception as e:
+            print(e)
+        self.stats = CacheStats()
+
+    def get(self, key):
+        value = self.client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(key, json.dumps(value, default=encode_value), ex=self.ttl)
+
+    def peek_version_tag(self, ranking=False):
+        return None
+
+    def get_version_tag(self, ranking=False):
+        epoch, version, ranking_version = self.client.mget(CATALOG_EPOCH_KEY, CATALOG_VERSION_KEY, RANKING_VERSION_KEY)
+        tag = f"{(epoch or b'').decode()}.{int(version or 0)}"
+        return f"{tag}.{int(ranking_version or 0)}" if ranking else tag
+
+    def bump_version(self, ranking=False):
+        self.client.incr(RANKING_VERSION_KEY if ranking else CATALOG_VERSION_KEY)
+
+    def size(self):
+        return self.client.dbsize()
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_cache():
+    # With CACHE_BACKEND=none nothing is cached, but the shared catalog version is still
+    # read for ETags.
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = RedisCache() if CACHE_BACKEND == "redis" else MemoryCache()
+    return _backend
+
+def params_digest(params: dict):
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def build_cache_key(namespace: str, version, params: dict):
+    return f"{namespace}:v{version}:{params_digest(params)}"
+
+def get_catalog_version(ranking=False):
+    # ranking=True for pages ordered by popularity_score.
+    try:
+        return get_cache().get_version_tag(ranking)
+    except Exception as e:
+        print(e)
+        return None
+
+async def get_catalog_version_async(ranking=False):
+    # A fresh memoised tag is returned without a thread-pool hop.
+    tag = get_cache().peek_version_tag(ranking)
+    if tag is not None:
+        return tag
+    return await run_in_threadpool(get_catalog_version, ranking)
+
+def get_cached_response(namespace: str, params: dict, version=None):
+    cache = get_cache()
+    try:
+        version = version if version is not None else cache.get_version_tag()
+        key = build_cache_key(namespace, version, params)
+        value = cache.get(key)
+    except Exception as e:
+        # A cache outage degrades to uncached responses instead of failing requests.
+        print(e)
+        return None, None
+    cache.stats.increment("hits" if value is not None else "misses")
+    return key, value
+
+def set_cached_response(key, value):
+    cache = get_cache()
+    if key is None:
+        return
+    try:
+        cache.set(key, value)
+    except Exception as e:
+        print(e)
+
+async def cached_response(namespace: str, params: dict, compute, version=None):
+    # compute is awaited on a miss and returns (success, response); only successful
+    # responses are stored. Returns (success, response) either way.
+    if not CACHE_RESPONSES:
+        return await compute()
+    cache = get_cache()
+    if version is None:
+        version = await get_catalog_version_async()
+        if version is None:
+            return await compute()
+    if cache.blocking:
+        key, value = await run_in_threadpool(get_cached_response, namespace, params, version)
+    else:
+        key, value = get_cached_response(namespace, params, version)
+    if value is not None:
+        return True, value
+    success, response = await compute()
+    if success:
+        if cache.blocking:
+            await run_in_threadpool(set_cached_response, key, response)
+        else:
+            set_cached_response(key, response)
+    return success, response
+
+def invalidate_response_cache(action=None, book_ids=None):
+    cache = get_cache()
+    cache.bump_version(ranking=action == BOOK_RANKING_UPDATED)
+    cache.stats.increment("invalidations")
+
+def get_cache_stats():
+    cache = get_cache()
+    try:
+        version, size = cache.get_version_tag(), cache.size()
+    except Exception as e:
+        print(e)
+        version, size = None, None
+    return {"backend": CACHE_BACKEND, "catalog_version": version, "entries": size, **cache.stats.snapshot()}
@@ -0,0 +1,156 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sqlalchemy import select, desc, func, literal_column
+from app.config import SEMANTIC_SEARCH_CANDIDATES
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book
+from app.llm_workflow.retrieval_cache import cached_retriever
+from app.llm_workflow.vector_store import get_vectorstore
+from app.services.book_services import build_prefix_tsquery, fetch_books_in_order, parse_fields
+from app.services.genre_rankings import ensure_genre_rankings, normalise_genres
+from app.services.similarity_services import get_book_embeddings
+
+# Hybrid search without the LLM: a full-text pass over books.search_vector and a kNN
+# pass over the Chroma embeddings run side by side with the same filters, and their
+# rankings are merged with reciprocal rank fusion. An optional MMR pass trades some
+# relevance for variety among the results.
+
+# Standard RRF constant; dampens the difference between the first few ranks.
+RANK_FUSION_K = 60
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="semantic-search")
+
+def build_filters(engine, genre=None, year_from=None, year_to=None, min_rating=None):
+    # Genres match on the raw values that normalise to the requested one, so both
+    # passes can filter with a plain IN on the stored value.
+    genres = None
+    if genre:
+        rankings = ensure_genre_rankings(engine)
+        genres = sorted({value for name in normalise_genres(genre) for value in rankings.raw_values(name)})
+    return {"genres": genres, "year_from": year_from, "year_to": year_to, "min_rating": min_rating}
+
+def filter_conditions(filters):
+    conditions = []
+    if filters["genres"] is not None:
+        conditions.append(Book.genre.in_(filters["genres"]))
+    if filters["year_from"] is not None:
+        conditions.append(Book.year >= filters["year_from"])
+    if filters["year_to"] is not None:
+        conditions.append(Book.year <= filters["year_to"])
+    if filters["min_rating"] is not None:
+        conditions.append(Book.rating >= filters["min_rating"])
+    return conditions
+
+def chroma_where(filters):
+    # Same filters over the metadata written by app/services/vector_index.py. Chroma
+    # compares ints and floats separately, hence the casts.
+    clauses = []
+    if filters["genres"] is not None:
+        clauses.append({"categories": {"$in": filters["genres"]}})
+    if filters["year_from"] is not None:
+        clauses.append({"published_year": {"$gte": int(filters["year_from"])}})
+    if filters["year_to"] is not None:
+        clauses.append({"published_year": {"$lte": int(filters["year_to"])}})
+    if filters["min_rating"] is not None:
+        clauses.append({"average_rating": {"$gte": float(filters["min_rating"])}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def build_lexical_stmt(search_input: str, filters, limit: int):
+    # Terms are OR-ed: ts_rank already favours books matching more of them, and
+    # natural-language queries rarely match every word.
+    tsquery = func.to_tsquery(literal_column("'english'"), build_prefix_tsquery(search_input, "|"))
+    return (
+        select(Book.book_id)
+        .where(Book.search_vector.bool_op("@@")(tsquery), *filter_conditions(filters))
+        .order_by(desc(func.ts_rank(Book.search_vector, tsquery)), Book.book_id)
+        .limit(limit)
+    )
+
+def rank_lexical(conn, search_input: str, filters, limit: int):
+    if not build_prefix_tsquery(search_input):
+        return []
+    return conn.execute(build_lexical_stmt(search_input, filters, limit)).scalars().all()
+
+def rank_semantic(search_input: str, filters, limit: int):
+    embedding = cached_retriever.embed(search_input)
+    found = get_vectorstore()._collection.query(
+        query_embeddings=[embedding.tolist()], n_results=limit, where=chroma_where(filters), include=["metadatas"]
+    )
+    # Documents written before they carried a book_id are skipped; rebuilding the
+    # index with app.utils.build_vector_index adds it.
+    book_ids = [(metadata or {}).get("book_id") for metadata in found["metadatas"][0]]
+    return list(dict.fromkeys(book_id for book_id in book_ids if book_id is not None))[:limit]
+
+def reciprocal_rank_fusion(rankings, k: int = RANK_FUSION_K):
+    scores = {}
+    for ranking in rankings:
+        for rank, book_id in enumerate(ranking, 1):
+            scores[book_id] = scores.get(book_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+def mmr_rerank(fused, limit: int, diversity: float, embeddings):
+    # Maximal marginal relevance over the fused list: each pick maximises
+    # (1 - diversity) * relevance - diversity * (similarity to the books already picked).
+    # Books without a stored embedding count as unlike every other book.
+    if embeddings is None or not fused:
+        return fused[:limit]
+    relevance = np.array([score for _, score in fused]) / fused[0][1]
+    vectors = np.zeros((len(fused), embeddings.vectors.shape[1]), dtype=np.float32)
+    for i, (book_id, _) in enumerate(fused):
+        position = embeddings.positions.get(book_id)
+        if position is not None:
+            vectors[i] = embeddings.vectors[position]
+    similarity = vectors @ vectors.T
+    closest = np.zeros(len(fused))
+    available = np.ones(len(fused), dtype=bool)
+    picked = []
+    for _ in range(min(limit, len(fused))):
+        scores = (1 - diversity) * relevance - diversity * closest
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(fused[best])
+        available[best] = False
+        closest = np.maximum(closest, similarity[best])
+    return picked
+
+def search_books_semantically(
+        search_input: str,
+        k: int = 10,
+        genre=None,
+        year_from=None,
+        year_to=None,
+        min_rating=None,
+        diversity: float = 0.0,
+        fields="card"
+    ):
+    engine, session = connect_to_db()
+    try:
+        keys = parse_fields(fields)
+        filters = build_filters(engine, genre, year_from, year_to, min_rating)
+        if filters["genres"] == []:
+            return False, "No books found for this genre", None
+        candidates = max(k, SEMANTIC_SEARCH_CANDIDATES)
+        semantic = _executor.submit(rank_semantic, search_input, filters, candidates)
+        with engine.connect() as conn:
+            lexical_ids = rank_lexical(conn, search_input, filters, candidates)
+            try:
+                semantic_ids = semantic.result()
+            except Exception as e:
+                # No vector store (or no embedding model): serve the full-text matches alone.
+                print(e)
+                semantic_ids = []
+            fused = reciprocal_rank_fusion([lexical_ids, semantic_ids])
+            ranked = mmr_rerank(fused, k, diversity, get_book_embeddings()) if diversity > 0 else fused[:k]
+            scores = dict(ranked)
+            books = fetch_books_in_order(conn, [book_id for book_id, _ in ranked], keys)
+        if len(books) == 0:
+            return False, "No books found", None
+        for book in books:
+            book["score"] = round(scores[book["book_id"]], 6)
+        return True, "Books retrieved successfully", books
+    except Exception as e:
+        return False, str(e), None
+    finally:
+        session.close()
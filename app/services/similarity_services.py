@@ -0,0 +1,171 @@
+import os
+import threading
+import numpy as np
+from sqlalchemy import select
+from app.config import CHROMA_PERSIST_DIRECTORY, CHROMA_COLLECTION_NAME
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book
+from app.services.catalog_events import subscribe, BOOK_DELETED
+
+# "More like this" over the book embeddings the chat assistant already stores in
+# Chroma. The vectors are read once into a normalised float32 matrix, so a lookup is
+# one matrix-vector product and an argpartition; no model is loaded.
+
+EMBEDDING_FETCH_SIZE = 5000
+
+def book_key(title, author):
+    # Documents embedded before they carried a book_id are matched on the
+    # title and first author, cleaned the way the catalog import cleans them.
+    return (str(title or "unknown").lower()[:350], str(author or "unknown").lower().split(";")[0].strip())
+
+def load_book_id_lookup():
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(select(Book.book_id, Book.title, Book.author_name).order_by(Book.book_id)).fetchall()
+    finally:
+        session.close()
+    lookup = {}
+    for book_id, title, author_name in rows:
+        lookup.setdefault(book_key(title, author_name), book_id)
+    return lookup
+
+def load_collection(path=CHROMA_PERSIST_DIRECTORY, name=CHROMA_COLLECTION_NAME):
+    import chromadb
+    collection = chromadb.PersistentClient(path=path).get_collection(name)
+    lookup = None
+    vectors = {}
+    for offset in range(0, collection.count(), EMBEDDING_FETCH_SIZE):
+        batch = collection.get(include=["embeddings", "metadatas"], limit=EMBEDDING_FETCH_SIZE, offset=offset)
+        for embedding, metadata in zip(batch["embeddings"], batch["metadatas"]):
+            metadata = metadata or {}
+            book_id = metadata.get("book_id")
+            if book_id is None:
+                if lookup is None:
+                    lookup = load_book_id_lookup()
+                book_id = lookup.get(book_key(metadata.get("title"), metadata.get("authors")))
+            if book_id is not None:
+                vectors[book_id] = embedding
+    return list(vectors), np.asarray(list(vectors.values()), dtype=np.float32)
+
+class BookEmbeddings:
+    def __init__(self, book_ids, vectors):
+        self.book_ids = np.asarray(book_ids, dtype=str)
+        self.positions = {book_id: i for i, book_id in enumerate(book_ids)}
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.vectors = np.ascontiguousarray(vectors / norms, dtype=np.float32)
+        self.active = np.ones(len(book_ids), dtype=bool)
+
+    def with_changes(self, book_ids, vectors, deleted_ids=()):
+        # Copy with rows replaced or appended, so readers of this one are undisturbed.
+        replaced = set(book_ids)
+        keep = [i for i, book_id in enumerate(self.book_ids.tolist()) if book_id not in replaced]
+        changed = BookEmbeddings(
+            list(self.book_ids[keep]) + list(book_ids),
+            np.vstack([self.vectors[keep], np.asarray(vectors, dtype=np.float32).reshape(len(book_ids), self.vectors.shape[1])])
+        )
+        changed.active[:len(keep)] = self.active[keep]
+        changed.remove(deleted_ids)
+        return changed
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def remove(self, book_ids):
+        for book_id in book_ids:
+            position = self.positions.get(book_id)
+            if position is not None:
+                self.active[position] = False
+
+    def nearest(self, query, limit: int, exclude_rows=()):
+        scores = self.vectors @ query
+        scores[~self.active] = -np.inf
+        scores[list(exclude_rows)] = -np.inf
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(self.book_ids[i].item(), float(scores[i])) for i in top]
+
+    def similar_to_books(self, book_ids, limit: int, exclude_book_ids=()):
+        # Cosine top-k against the mean of the books' normalised embeddings.
+        # Returns None when none of them has an embedding.
+        rows = [self.positions[book_id] for book_id in book_ids if book_id in self.positions]
+        if not rows:
+            return None
+        query = self.vectors[rows].mean(axis=0)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        exclude_rows = set(rows) | {self.positions[book_id] for book_id in exclude_book_ids if book_id in self.positions}
+        return self.nearest(query, limit, exclude_rows)
+
+_embeddings = None
+_embeddings_mtime = None
+_embeddings_lock = threading.Lock()
+_load_lock = threading.Lock()
+_reload_thread = None
+
+def collection_mtime(path=CHROMA_PERSIST_DIRECTORY):
+    try:
+        return os.path.getmtime(os.path.join(path, "chroma.sqlite3"))
+    except OSError:
+        return None
+
+def reload_book_embeddings(mtime):
+    global _embeddings, _embeddings_mtime, _reload_thread
+    with _load_lock:
+        try:
+            if mtime == _embeddings_mtime:
+                # Loaded by another caller meanwhile.
+                return
+            try:
+                embeddings = BookEmbeddings(*load_collection())
+            except Exception as e:
+                print(e)
+                embeddings = None
+            with _embeddings_lock:
+                # A failed reload keeps serving the previous matrix.
+                if embeddings is not None:
+                    _embeddings = embeddings
+                _embeddings_mtime = mtime
+        finally:
+            _reload_thread = None
+
+def get_book_embeddings():
+    # Loaded on first use and reloaded when the Chroma store changes on disk. Only the
+    # first load runs on the caller; later reloads run in a background thread while the
+    # previous matrix keeps being served. Writes made by this process patch the matrix
+    # through apply_embedding_changes and do not trigger a reload.
+    # Returns None when there is no store (or chromadb is not installed).
+    global _reload_thread
+    mtime = collection_mtime()
+    if mtime is None:
+        return None
+    if mtime == _embeddings_mtime:
+        return _embeddings
+    if _embeddings is None:
+        reload_book_embeddings(mtime)
+        return _embeddings
+    with _embeddings_lock:
+        if _reload_thread is None:
+            _reload_thread = threading.Thread(target=reload_book_embeddings, args=(mtime,), daemon=True)
+            _reload_thread.start()
+    return _embeddings
+
+@subscribe
+def drop_deleted_book_embeddings(action, book_ids):
+    if action == BOOK_DELETED and _embeddings is not None:
+        _embeddings.remove(book_ids)
+
+def apply_embedding_changes(book_ids, vectors, deleted_ids, mtime_before):
+    # Called after this process wrote to Chroma: patch the loaded matrix instead of
+    # reloading it, unless someone else changed the store since it was loaded.
+    global _embeddings, _embeddings_mtime
+    with _embeddings_lock:
+        if _embeddings is None or _embeddings_mtime != mtime_before:
+            return
+        _embeddings = _embeddings.with_changes(book_ids, vectors, deleted_ids)
+        _embeddings_mtime = collection_mtime()
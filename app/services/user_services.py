@@ -7,18 +7,12 @@ from app.utils.hash import deterministic_hash
 def retrieve_all_users():
     try:
         engine, session = connect_to_db()
-        stmt = select(User)
+        stmt = select(User.email, User.fname, User.lname, User.role, User.hashed_pw)
         with engine.connect() as conn:
             results = conn.execute(stmt)
             outputs = results.fetchall()
             if outputs is not None:
-                users = [{
-                    "email": output[0],
-                    "fname": output[1],
-                    "lname": output[2],
-                    "role": output[3],
-                    "password": output[4]
-                } for output in outputs]
+                users = [parse_user(output) for output in outputs]
                 return True, "Users retrieved sucessfully", users
             else:
                 return False, "Users not found", None
@@ -27,21 +21,27 @@ def retrieve_all_users():
     finally:
         session.close()
 
+def build_single_user_stmt(id):
+    return select(User.email, User.fname, User.lname, User.role, User.hashed_pw).where(User.email == id)
+
+def parse_user(output):
+    return {
+        "email": output[0],
+        "fname": output[1],
+        "lname": output[2],
+        "role": output[3],
+        "password": output[4]
+    }
+
 def retrieve_single_user(id):
     try:
         engine, session = connect_to_db()
-        stmt = select(User.email, User.fname, User.lname, User.role, User.hashed_pw).where(User.email == id)
+        stmt = build_single_user_stmt(id)
         with engine.connect() as conn:
             results = conn.execute(stmt)
             output = results.fetchone()
             if output is not None:
-                user = {
-                    "email": output[0],
-                    "fname": output[1],
-                    "lname": output[2],
-                    "role": output[3],
-                    "password": output[4]
-                }
+                user = parse_user(output)
                 return True, "User retrieved sucessfully", user
             else:
                 return False, "User not found", None
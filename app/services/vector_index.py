@@ -0,0 +1,184 @@
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select, cast, Float
+from app.config import CHROMA_PERSIST_DIRECTORY, CHROMA_COLLECTION_NAME, EMBEDDING_MODEL_NAME, VECTOR_INDEX_WORKERS
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book
+from app.services.import_services import read_checkpoint, write_checkpoint
+
+# Builds the Chroma collection the assistant's retriever and the similar-books lookups
+# read, from the books table. Documents are keyed by book_id and carry a hash of
+# their content, so a re-run only embeds books whose document changed and deletes
+# the ones whose book is gone. Embedding runs in worker processes; Chroma is only
+# written from this one.
+
+DEFAULT_BATCH_SIZE = 256
+BOOK_FETCH_SIZE = 5000
+COLLECTION_FETCH_SIZE = 5000
+
+index_columns = [
+    Book.book_id,
+    Book.title,
+    Book.subtitle,
+    Book.author_name,
+    Book.genre,
+    Book.description,
+    Book.year,
+    cast(Book.rating, Float).label("rating"),
+    cast(Book.num_pages, Float).label("num_pages"),
+    cast(Book.ratings_count, Float).label("ratings_count"),
+]
+
+def build_document(row):
+    # Chroma metadata values cannot be None; the keys are the ones parse_db_output reads.
+    metadata = {
+        "book_id": row.book_id,
+        "title": row.title or "Unknown",
+        "subtitle": row.subtitle or "Unknown",
+        "authors": row.author_name or "Unknown",
+        "categories": row.genre or "Unknown",
+        "description": row.description or "Unknown",
+        "published_year": row.year or 0,
+        "average_rating": row.rating or 0.0,
+        "num_pages": row.num_pages or 0.0,
+        "ratings_count": row.ratings_count or 0.0,
+    }
+    text = (
+        f"The book's title is {metadata['title']}, and the subtitle is {metadata['subtitle']}. "
+        f"It is written by {metadata['authors']} in {metadata['published_year']}. "
+        f"The category of the book is {metadata['categories']} and it is described as {metadata['description']}, "
+        f"and has a rating of {metadata['average_rating']} based on {metadata['ratings_count']} ratings. "
+        f"It is also {metadata['num_pages']} long."
+    )
+    # The text holds every metadata field; the model name is hashed too so switching
+    # models re-embeds everything.
+    metadata["content_hash"] = hashlib.sha1(f"{EMBEDDING_MODEL_NAME}\n{text}".encode("utf-8")).hexdigest()
+    return text, metadata
+
+_model = None
+
+def load_embedding_model(model_name=EMBEDDING_MODEL_NAME, workers=1):
+    global _model
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if workers > 1:
+        # Worker processes share the cores instead of each starting one thread per core.
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    _model = SentenceTransformer(model_name)
+
+def embed_texts(texts):
+    # Same preprocessing as HuggingFaceEmbeddings.embed_documents, so vectors match the
+    # ones the retriever compares queries against.
+    return _model.encode([text.replace("\n", " ") for text in texts]).tolist()
+
+def embedded_batches(batches, workers: int = VECTOR_INDEX_WORKERS):
+    # Yields (batch, embeddings) in input order with at most 2 * workers batches in flight.
+    if workers <= 1:
+        if _model is None:
+            load_embedding_model()
+        for batch in batches:
+            yield batch, embed_texts([text for _, text, _ in batch])
+        return
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=load_embedding_model, initargs=(EMBEDDING_MODEL_NAME, workers)) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, executor.submit(embed_texts, [text for _, text, _ in batch])))
+            if len(pending) >= 2 * workers:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, future.result()
+
+def get_collection(path=CHROMA_PERSIST_DIRECTORY, name=CHROMA_COLLECTION_NAME):
+    import chromadb
+    return chromadb.PersistentClient(path=path).get_or_create_collection(name)
+
+def load_indexed_hashes(collection):
+    hashes = {}
+    for offset in range(0, collection.count(), COLLECTION_FETCH_SIZE):
+        batch = collection.get(include=["metadatas"], limit=COLLECTION_FETCH_SIZE, offset=offset)
+        for document_id, metadata in zip(batch["ids"], batch["metadatas"]):
+            hashes[document_id] = (metadata or {}).get("content_hash")
+    return hashes
+
+def changed_document_batches(conn, hashes, after, batch_size: int, report: dict):
+    stmt = select(*index_columns).order_by(Book.book_id)
+    if after is not None:
+        stmt = stmt.where(Book.book_id > after)
+    batch = []
+    for row in conn.execution_options(stream_results=True, yield_per=BOOK_FETCH_SIZE).execute(stmt):
+        report["scanned"] += 1
+        text, metadata = build_document(row)
+        if hashes.get(row.book_id) == metadata["content_hash"]:
+            report["unchanged"] += 1
+            continue
+        batch.append((row.book_id, text, metadata))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def upsert_documents(collection, batch, embeddings):
+    collection.upsert(
+        ids=[book_id for book_id, _, _ in batch],
+        embeddings=embeddings,
+        documents=[text for _, text, _ in batch],
+        metadatas=[metadata for _, _, metadata in batch],
+    )
+
+def delete_documents(collection, document_ids):
+    for start in range(0, len(document_ids), COLLECTION_FETCH_SIZE):
+        collection.delete(ids=document_ids[start:start + COLLECTION_FETCH_SIZE])
+
+def build_vector_index(
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: int = VECTOR_INDEX_WORKERS,
+        resume: bool = True,
+        checkpoint_path=None,
+        progress=print
+    ):
+    checkpoint_path = checkpoint_path or os.path.join(CHROMA_PERSIST_DIRECTORY, "index-checkpoint.json")
+    signature = {"collection": CHROMA_COLLECTION_NAME, "model": EMBEDDING_MODEL_NAME}
+    checkpoint = read_checkpoint(checkpoint_path, signature) if resume else None
+    if checkpoint is None:
+        checkpoint = {**signature, "last_book_id": None, "documents_done": 0}
+
+    report = {"resumed_after": checkpoint["last_book_id"], "scanned": 0, "unchanged": 0, "embedded": 0, "deleted": 0}
+    started = time.perf_counter()
+    collection = get_collection()
+    hashes = load_indexed_hashes(collection)
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            batches = changed_document_batches(conn, hashes, checkpoint["last_book_id"], batch_size, report)
+            for batch, embeddings in embedded_batches(batches, workers):
+                upsert_documents(collection, batch, embeddings)
+                checkpoint["last_book_id"] = batch[-1][0]
+                checkpoint["documents_done"] += len(batch)
+                write_checkpoint(checkpoint_path, checkpoint)
+
+                report["embedded"] += len(batch)
+                elapsed = time.perf_counter() - started
+                if progress:
+                    progress(f"{report['embedded']} documents embedded, {report['scanned']} books scanned, {round(report['embedded'] / elapsed, 1)} docs/sec")
+            book_ids = set(conn.execute(select(Book.book_id)).scalars())
+    finally:
+        session.close()
+
+    # Books deleted since the last run, and documents stored before they were keyed by book_id.
+    stale_ids = [document_id for document_id in hashes if document_id not in book_ids]
+    delete_documents(collection, stale_ids)
+    report["deleted"] = len(stale_ids)
+
+    # A finished build starts from scratch next time.
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,119 @@
+import itertools
+import threading
+import time
+from sqlalchemy import select
+from app.config import VECTOR_SYNC_DELAY, VECTOR_SYNC_BATCH_SIZE, VECTOR_SYNC_MAX_EVENT_BOOKS
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book
+from app.services.catalog_events import subscribe, BOOK_RANKING_UPDATED
+from app.services.similarity_services import apply_embedding_changes, collection_mtime
+from app.services.vector_index import (
+    index_columns,
+    build_document,
+    get_collection,
+    embedded_batches,
+    upsert_documents,
+    delete_documents,
+)
+
+# Keeps the Chroma collection in step with book writes. Write paths publish catalog
+# events; the ids are queued here and a background thread reconciles them with the
+# books table in batches, re-embedding changed documents and deleting missing books,
+# so writes never wait on embedding. The queue lives in this process: changes made
+# while no API process runs are picked up by the next build_vector_index run, and so
+# are bulk events above VECTOR_SYNC_MAX_EVENT_BOOKS, which the queue skips.
+
+RETRY_DELAY = 30
+
+def sync_documents(book_ids):
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(select(*index_columns).where(Book.book_id.in_(book_ids))).fetchall()
+    finally:
+        session.close()
+    collection = get_collection()
+    indexed = collection.get(ids=list(book_ids), include=["metadatas"])
+    hashes = {document_id: (metadata or {}).get("content_hash") for document_id, metadata in zip(indexed["ids"], indexed["metadatas"])}
+
+    documents = [(row.book_id, *build_document(row)) for row in rows]
+    changed = [document for document in documents if hashes.get(document[0]) != document[2]["content_hash"]]
+    existing = {row.book_id for row in rows}
+    deleted = [document_id for document_id in hashes if document_id not in existing]
+
+    mtime_before = collection_mtime()
+    embeddings = []
+    for batch, batch_embeddings in embedded_batches([changed] if changed else [], workers=1):
+        upsert_documents(collection, batch, batch_embeddings)
+        embeddings.extend(batch_embeddings)
+    delete_documents(collection, deleted)
+    apply_embedding_changes([book_id for book_id, _, _ in changed], embeddings, deleted, mtime_before)
+    return len(changed), len(deleted)
+
+class VectorSyncQueue:
+    def __init__(self, delay=VECTOR_SYNC_DELAY, batch_size=VECTOR_SYNC_BATCH_SIZE):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.delay = delay
+        self.batch_size = batch_size
+        self.stats = {"upserted": 0, "deleted": 0, "skipped": 0, "failed_batches": 0, "last_error": None, "last_sync": None}
+
+    def put(self, book_ids):
+        with self.lock:
+            # A dict keeps arrival order and collapses repeated writes to one entry.
+            self.pending.update(dict.fromkeys(book_ids))
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="vector-sync", daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+
+    def take(self):
+        with self.lock:
+            book_ids = list(itertools.islice(self.pending, self.batch_size))
+            for book_id in book_ids:
+                del self.pending[book_id]
+            if not self.pending:
+                self.wakeup.clear()
+            return book_ids
+
+    def run(self):
+        while True:
+            self.wakeup.wait()
+            # Let a burst of writes (an import chunk, a bulk edit) land in one batch.
+            time.sleep(self.delay)
+            while book_ids := self.take():
+                try:
+                    upserted, deleted = sync_documents(book_ids)
+                    self.stats["upserted"] += upserted
+                    self.stats["deleted"] += deleted
+                    self.stats["last_sync"] = time.time()
+                except Exception as e:
+                    print(e)
+                    self.stats["failed_batches"] += 1
+                    self.stats["last_error"] = str(e)
+                    self.put(book_ids)
+                    time.sleep(RETRY_DELAY)
+                    break
+
+    def snapshot(self):
+        with self.lock:
+            pending = len(self.pending)
+        return {"pending": pending, **self.stats}
+
+vector_sync_queue = VectorSyncQueue()
+
+@subscribe
+def enqueue_vector_changes(action, book_ids, max_books=VECTOR_SYNC_MAX_EVENT_BOOKS):
+    # Popularity scores are not part of the documents.
+    if action == BOOK_RANKING_UPDATED or not book_ids:
+        return
+    if len(book_ids) > max_books:
+        vector_sync_queue.stats["skipped"] += len(book_ids)
+        print(f"Skipped vector sync for {len(book_ids)} books; run python -m app.utils.build_vector_index")
+        return
+    vector_sync_queue.put(book_ids)
+
+def get_vector_sync_stats():
+    return vector_sync_queue.snapshot()
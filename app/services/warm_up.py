@@ -0,0 +1,121 @@
+import sys
+import threading
+import time
+from sqlalchemy import text
+from app.config import WARM_UP
+from app.database.connector import connect_to_db
+from app.llm_workflow import vector_store
+from app.llm_workflow.assistant import get_assistant, assistant_loaded
+from app.services import genre_rankings, recommendation_services, similarity_services
+
+# Everything heavy (models, Chroma, in-process indexes) loads on first use. A warm-up
+# loads the subsystems named in WARM_UP in a background thread at startup, or on
+# demand, and /readiness reports what is loaded so traffic can wait for it.
+
+def ping_database():
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    finally:
+        session.close()
+
+def warm_embeddings():
+    # Embedding one query pages the model weights in, not just its config.
+    vector_store.get_embeddings().embed_query("warm up")
+
+def warm_llm():
+    from app.llm_workflow.llm import get_chain
+    get_chain()
+
+def llm_loaded():
+    # Checked without importing LangChain.
+    module = sys.modules.get("app.llm_workflow.llm")
+    return module is not None and module.chain_loaded()
+
+def warm_genre_rankings():
+    engine, session = connect_to_db()
+    try:
+        genre_rankings.ensure_genre_rankings(engine)
+    finally:
+        session.close()
+
+# name -> (loader, is_loaded), in warm-up order
+subsystems = {
+    "embeddings": (warm_embeddings, vector_store.embeddings_loaded),
+    "vector_store": (vector_store.get_vectorstore, vector_store.vectorstore_loaded),
+    "llm": (warm_llm, llm_loaded),
+    "assistant": (get_assistant, assistant_loaded),
+    "book_embeddings": (similarity_services.get_book_embeddings, lambda: similarity_services._embeddings is not None),
+    "item_neighbours": (recommendation_services.get_item_neighbours, lambda: recommendation_services._model is not None),
+    "genre_rankings": (warm_genre_rankings, lambda: genre_rankings._built),
+}
+
+def parse_subsystems(names):
+    if not names:
+        return []
+    if names.strip() == "all":
+        return list(subsystems)
+    selected = [name.strip() for name in names.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in subsystems]
+    if unknown:
+        raise ValueError(f"Unknown subsystem {unknown[0]!r}, expected all or any of {', '.join(subsystems)}")
+    return [name for name in subsystems if name in selected]
+
+required_subsystems = parse_subsystems(WARM_UP)
+
+warm_up_lock = threading.Lock()
+warm_up_status = {"status": "idle"}
+
+def warm_up(names):
+    if not warm_up_lock.acquire(blocking=False):
+        return False, "A warm-up is already running", None
+    try:
+        results = {}
+        warm_up_status.clear()
+        warm_up_status.update({"status": "running", "subsystems": results})
+        started = time.perf_counter()
+        for name in names:
+            loader, _ = subsystems[name]
+            step_started = time.perf_counter()
+            try:
+                loader()
+                results[name] = {"seconds": round(time.perf_counter() - step_started, 3)}
+            except Exception as e:
+                print(e)
+                results[name] = {"error": str(e)}
+        failed = any("error" in result for result in results.values())
+        warm_up_status.update({"status": "failed" if failed else "finished", "elapsed_seconds": round(time.perf_counter() - started, 3)})
+        if failed:
+            return False, "Some subsystems failed to load", dict(warm_up_status)
+        return True, "Warm-up finished", dict(warm_up_status)
+    finally:
+        warm_up_lock.release()
+
+def start_warm_up(names):
+    thread = threading.Thread(target=warm_up, args=(names,), name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def get_warm_up_status():
+    return {**warm_up_status, "subsystems": dict(warm_up_status.get("subsystems", {}))}
+
+def get_readiness():
+    try:
+        ping_database()
+        database = True
+    except Exception as e:
+        print(e)
+        database = False
+    loaded = {name: bool(is_loaded()) for name, (_, is_loaded) in subsystems.items()}
+    # A required subsystem counts once the warm-up has tried it: a failed load is
+    # reported in warm_up instead of keeping the worker out of rotation for good.
+    attempted = warm_up_status.get("subsystems", {})
+    ready = database and all(loaded[name] or name in attempted for name in required_subsystems)
+    return ready, {
+        "ready": ready,
+        "database": database,
+        "subsystems": loaded,
+        "required": required_subsystems,
+        "warm_up": get_warm_up_status(),
+    }
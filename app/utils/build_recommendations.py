@@ -0,0 +1,20 @@
+import argparse
+import time
+from app.config import RECOMMENDER_MODEL_PATH, RECOMMENDER_NEIGHBOURS
+from app.services.recommendation_services import build_item_neighbours
+
+# Rebuilds the item neighbour table behind /recommendations from liked_books. Run it
+# from cron; the API picks up the new file on the next request.
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the item-to-item recommendation table")
+    parser.add_argument("--output", default=RECOMMENDER_MODEL_PATH)
+    parser.add_argument("--neighbours", type=int, default=RECOMMENDER_NEIGHBOURS)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    users, books, likes = build_item_neighbours(args.output, args.neighbours)
+    print(f"{likes} likes from {users} users over {books} books -> {args.output} in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import argparse
+from app.config import VECTOR_INDEX_WORKERS
+from app.services.vector_index import build_vector_index, DEFAULT_BATCH_SIZE
+
+# python -m app.utils.build_vector_index --workers 4
+# Re-runs only embed books whose document changed since the last build.
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the Chroma book collection from the books table.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=VECTOR_INDEX_WORKERS, help="embedding processes, 1 embeds in this process")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file, defaults to <CHROMA_PERSIST_DIRECTORY>/index-checkpoint.json")
+    parser.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint and scan every book")
+    args = parser.parse_args()
+
+    report = build_vector_index(
+        batch_size=args.batch_size,
+        workers=args.workers,
+        resume=not args.no_resume,
+        checkpoint_path=args.checkpoint,
+    )
+    print(
+        f"Embedded {report['embedded']} documents, {report['unchanged']} of {report['scanned']} scanned books unchanged, "
+        f"deleted {report['deleted']} in {report['elapsed_seconds']}s"
+    )
+
+if __name__ == "__main__":
+    main()
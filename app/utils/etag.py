@@ -0,0 +1,28 @@
+import hashlib
+from fastapi import Response
+
+# Strong ETags are built from a version that is cheaper to read than the resource:
+# a row's updated_at for single books/authors, the shared catalog version (see
+# app/services/catalog_version.py) for listing pages, so every worker issues the same tag.
+
+def make_etag(*parts):
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def row_etag(kind: str, key, updated_at):
+    return make_etag(kind, key, updated_at.isoformat())
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match or etag is None:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses the weak comparison, so a W/ prefix is ignored.
+        if candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def not_modified(etag):
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,15 @@
+from decimal import Decimal
+import orjson
+from fastapi.responses import ORJSONResponse
+
+def encode_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class FastJSONResponse(ORJSONResponse):
+    # Set as the app's default response class. Routes on hot paths return it directly,
+    # which also skips FastAPI's jsonable_encoder pass over the payload; response_model
+    # is then only used for the OpenAPI schema.
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,11 @@
+from app.services.catalog_events import subscribe
+from app.services.popularity_services import refresh_popularity_scores
+from app.services.response_cache import invalidate_response_cache
+
+# For cron: the API refreshes scores after writes, this covers likes and imports made
+# by other processes.
+
+if __name__ == "__main__":
+    # Trending pages the API cached are keyed by the shared catalog version.
+    subscribe(invalidate_response_cache)
+    print("Refreshed popularity scores for", refresh_popularity_scores(), "books")
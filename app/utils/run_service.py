@@ -0,0 +1,9 @@
+from fastapi.concurrency import run_in_threadpool
+from app.config import DB_ASYNC_MODE
+
+async def run_service(sync_service, async_service, *args, **kwargs):
+    # With DB_ASYNC_MODE the route awaits the asyncpg-backed service on the event loop;
+    # otherwise the psycopg2 service runs in Starlette's threadpool as before.
+    if DB_ASYNC_MODE:
+        return await async_service(*args, **kwargs)
+    return await run_in_threadpool(sync_service, *args, **kwargs)
@@ -0,0 +1,49 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from app.database.connector import connect_to_db
+from app.database.schemas.base import Base
+from app.database.schemas.user import User
+from app.database.schemas.author import Author
+from app.database.schemas.books import Book
+from app.database.schemas.preferences import Preferences
+from app.database.schemas.book_author import BookAuthor
+from app.database.schemas.llm_message_hist import MessageHistory
+from app.database.schemas.liked_books import LikedBooks
+from app.database.schemas.catalog_version import CatalogVersion
+from app.database.schemas.logs import RequestLog
+from app.services.popularity_services import refresh_popularity_scores
+
+# populate_database.py rebuilds everything with drop_all/create_all. This script instead
+# adds the columns and indexes declared on the models to an existing database without
+# touching data.
+
+# Indexes replaced by later schema changes.
+OBSOLETE_INDEXES = ["ix_books_trending"]
+
+def add_missing_columns(engine):
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+                print("Added column", f"{table.name}.{column.name}")
+
+def upgrade_database(engine):
+    Base.metadata.create_all(engine)
+    add_missing_columns(engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+            print("Ensured index", index.name)
+    with engine.begin() as conn:
+        for index_name in OBSOLETE_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+    print("Refreshed popularity scores for", refresh_popularity_scores(), "books")
+
+if __name__ == "__main__":
+    engine, session = connect_to_db()
+    upgrade_database(engine)
+    session.close()
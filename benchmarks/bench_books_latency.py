@@ -0,0 +1,93 @@
+"""Compare /books latency with the sync (psycopg2 + threadpool) and async (asyncpg) data-access modes.
+
+Starts one uvicorn worker per mode against the configured database and hits
+/books from many concurrent clients:
+
+    python benchmarks/bench_books_latency.py --clients 500 --requests-per-client 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def start_server(port, async_mode):
+    env = dict(os.environ, DB_ASYNC_MODE="true" if async_mode else "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/healthcheck", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("server did not become healthy")
+
+async def run_client(client, url, params, requests_per_client, latencies, errors):
+    for _ in range(requests_per_client):
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, params=params)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+async def run_load(port, clients, requests_per_client, params):
+    url = f"http://127.0.0.1:{port}/books"
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        await client.get(url, params=params)
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            run_client(client, url, params, requests_per_client, latencies, errors) for _ in range(clients)
+        ])
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests-per-client", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+    params = {"start": 0, "end": 12, "order_by": "trending"}
+
+    print(f"{'mode':<6} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for mode in args.modes.split(","):
+        process = start_server(args.port, async_mode=(mode == "async"))
+        try:
+            latencies, errors, elapsed = asyncio.run(
+                run_load(args.port, args.clients, args.requests_per_client, params)
+            )
+        finally:
+            process.terminate()
+            process.wait()
+        print(
+            f"{mode:<6} {len(latencies):>8} {len(errors):>6} {len(latencies) / elapsed:>8.1f} "
+            f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} "
+            f"{statistics.mean(latencies) * 1000:>8.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare the old and new serialization paths for a 100-row /books page.
+
+old: Numeric columns as Decimal, a hand-built dict per row, jsonable_encoder, stdlib json
+new: Numeric cast to float in SQL, dict(zip(...)) per row, orjson via FastJSONResponse
+
+    python benchmarks/bench_serialization.py --rows 100 --iterations 2000
+    python benchmarks/bench_serialization.py --from-db   # time the page fetch too
+"""
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.book_services import book_output_keys, parse_output
+from app.utils.json_response import FastJSONResponse
+
+Row = namedtuple("Row", [
+    "book_id", "title", "author_name", "subtitle", "thumbnail", "genre", "description",
+    "year", "rating", "num_pages", "ratings_count", "liked"
+])
+
+def synthetic_rows(count, numeric):
+    rows = []
+    for i in range(count):
+        rating, num_pages, ratings_count = 3.5 + (i % 15) / 10, 200.0 + i, 1000.0 + 7 * i
+        if numeric:
+            rating, num_pages, ratings_count = Decimal(str(rating)), Decimal(str(num_pages)), Decimal(str(ratings_count))
+        rows.append(Row(
+            f"{i:010d}", f"title {i}", f"author {i}", "unknown", f"http://books.example/{i}.jpg",
+            "fiction", "a long description " * 40, 1990 + i % 30, rating, num_pages, ratings_count, i % 2
+        ))
+    return rows
+
+def database_rows(count, numeric):
+    from sqlalchemy import select
+    from app.database.connector import connect_to_db
+    from app.database.schemas.books import Book
+    from app.services.book_services import book_columns, liked_column
+
+    columns = [Book.__table__.c[key] for key in ("book_id", "title", "author_name", "subtitle", "thumbnail",
+                                                 "genre", "description", "year", "rating", "num_pages", "ratings_count")]
+    stmt = select(*(columns if numeric else book_columns), liked_column()).order_by(Book.book_id).limit(count)
+    engine, session = connect_to_db()
+    session.close()
+
+    def fetch():
+        with engine.connect() as conn:
+            return conn.execute(stmt).fetchall()
+    return fetch(), fetch
+
+def old_parse_output(db_output):
+    return [{
+                "book_id": result[0],
+                "title": result[1],
+                "author_name": result[2],
+                "subtitle": result[3],
+                "thumbnail": result[4],
+                "genre": result[5],
+                "description": result[6],
+                "year": result[7],
+                "average_rating": result[8],
+                "num_pages": result[9],
+                "ratings_count": result[10],
+                "liked": result.liked
+            } for result in db_output]
+
+def old_path(rows):
+    content = {"message": "Books retrieved successfully", "books": old_parse_output(rows), "count": 6810}
+    return JSONResponse(jsonable_encoder(content)).body
+
+def new_path(rows):
+    content = {"message": "Books retrieved successfully", "books": parse_output(rows), "count": 6810}
+    return FastJSONResponse(content).body
+
+def timed(function, rows, iterations):
+    function(rows)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function(rows)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--from-db", action="store_true", help="serialize (and fetch) a real page from the configured database")
+    args = parser.parse_args()
+
+    if args.from_db:
+        old_rows, fetch_old = database_rows(args.rows, numeric=True)
+        new_rows, fetch_new = database_rows(args.rows, numeric=False)
+        fetch_iterations = max(1, args.iterations // 20)
+        print(f"fetch  old {timed(lambda _: fetch_old(), None, fetch_iterations):9.1f} us/page")
+        print(f"fetch  new {timed(lambda _: fetch_new(), None, fetch_iterations):9.1f} us/page")
+    else:
+        old_rows, new_rows = synthetic_rows(args.rows, numeric=True), synthetic_rows(args.rows, numeric=False)
+
+    assert len(new_path(new_rows)) > 0 and list(parse_output(new_rows)[0]) == book_output_keys
+    old_us = timed(old_path, old_rows, args.iterations)
+    new_us = timed(new_path, new_rows, args.iterations)
+    print(f"encode old {old_us:9.1f} us/page ({len(old_rows)} rows)")
+    print(f"encode new {new_us:9.1f} us/page ({len(new_rows)} rows)")
+    print(f"speedup    {old_us / new_us:9.1f}x")
+
+if __name__ == "__main__":
+    main()
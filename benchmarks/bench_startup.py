@@ -0,0 +1,83 @@
+"""Cold-start cost of an API worker: `import api` and the first /healthcheck, each run in
+a fresh interpreter, plus peak RSS and which heavy libraries the import pulled in.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --warm-up all     # also time the warm-up
+    python benchmarks/bench_startup.py --importtime 15   # slowest modules under `import api`
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["torch", "sentence_transformers", "chromadb", "langchain_core", "langchain_ollama", "langgraph"]
+
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import api
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(api.app)
+assert client.get("/healthcheck").status_code == 200
+first_request = time.perf_counter()
+report = {
+    "import_seconds": imported - started,
+    "first_request_seconds": first_request - started,
+    "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+}
+if WARM_UP:
+    from app.services.warm_up import parse_subsystems, warm_up
+    success, message, status = warm_up(parse_subsystems(WARM_UP))
+    report["warm_up_seconds"] = time.perf_counter() - first_request
+    report["warm_up"] = status
+report["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(report))
+"""
+
+def run_child(warm_up):
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nWARM_UP = {warm_up!r}\n{CHILD}"
+    # WARM_UP is cleared so the startup hook does not load anything behind the timing.
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "WARM_UP": ""}
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def slowest_imports(count):
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import api"], cwd=ROOT, capture_output=True, text=True)
+    timings = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings.append((int(cumulative), name.strip()))
+    return sorted(timings, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm-up", default="", help='subsystems to warm after the first request, e.g. "all"')
+    parser.add_argument("--importtime", type=int, default=0, help="list the N slowest modules by cumulative import time")
+    args = parser.parse_args()
+
+    reports = [run_child(args.warm_up) for _ in range(args.runs)]
+    for key in ("import_seconds", "first_request_seconds", "warm_up_seconds", "max_rss_mb"):
+        values = [report[key] for report in reports if key in report]
+        if values:
+            print(f"{key:22} median {statistics.median(values):8.3f}  min {min(values):8.3f}  max {max(values):8.3f}")
+    print(f"{'heavy modules':22} {', '.join(reports[-1]['heavy_modules']) or 'none'}")
+    if args.warm_up:
+        for name, result in reports[-1]["warm_up"]["subsystems"].items():
+            print(f"  warm {name:18} {result}")
+    if args.importtime:
+        print("slowest imports (cumulative):")
+        for microseconds, name in slowest_imports(args.importtime):
+            print(f"  {microseconds / 1e6:8.3f}s  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,15 @@ def test_get_author(auth_headers):
     assert response.status_code == 200
     assert "author" in response.json()
 
+def test_get_author_not_modified():
+    response = client.get("/authors/1")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get("/authors/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
 def test_add_author(admin_auth_headers):
     new_author = {"name": "New Author", "biography": "Bio of new author"}
     response = client.post("/authors", json=new_author, headers=admin_auth_headers)
@@ -0,0 +1,64 @@
+import itertools
+from app.services.fuzzy_index import NGramIndex, trigrams
+
+BOOKS = {
+    "1": {"title": "Murder on the Orient Express", "author_name": "agatha christie"},
+    "2": {"title": "The Murder of Roger Ackroyd", "author_name": "agatha christie"},
+    "3": {"title": "Dune", "author_name": "frank herbert"},
+    "4": {"title": "Emma", "author_name": "jane austen"},
+    "5": {"title": "Murderous Maths", "author_name": "kjartan poskitt"},
+}
+
+def build_index():
+    index = NGramIndex()
+    for book_id, fields in BOOKS.items():
+        index.add(book_id, **fields)
+    return index
+
+def brute_force(index, term, threshold):
+    # Scores every indexed field without the candidate filter.
+    query_grams = trigrams(term)
+    scores = {}
+    for (book_id, _), grams in index.field_grams.items():
+        score = len(query_grams & grams) / len(query_grams)
+        if score >= threshold:
+            scores[book_id] = max(score, scores.get(book_id, 0))
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+def test_trigrams_are_padded_like_pg_trgm():
+    assert trigrams("Ab") == {"  a", " ab", "ab "}
+    assert trigrams("a-b") == {"  a", " a ", "  b", " b "}
+    assert trigrams("") == set()
+
+def test_candidate_filter_loses_no_match():
+    index = build_index()
+    terms = ["murder", "mruder", "agatha christy", "dune", "emma", "xyz", "murderous mats"]
+    for term, threshold in itertools.product(terms, (0.3, 0.5, 0.8, 1.0)):
+        assert index.search(term, threshold) == brute_force(index, term, threshold), (term, threshold)
+
+def test_threshold_and_typos():
+    index = build_index()
+    # one transposition still shares most trigrams
+    assert [book_id for book_id, _ in index.search("agatha christy", 0.5)] == ["1", "2"]
+    assert index.search("agatha christy", 1.0) == []
+    assert index.search("dune", 1.0) == [("3", 1.0)]
+    assert index.search("zzzz", 0.1) == []
+    assert index.search("!!", 0.1) == []
+
+def test_ordering_by_score_then_book_id():
+    index = build_index()
+    results = index.search("murder", 0.5)
+    # exact word matches tie at 1.0 and are ordered by book_id; "murderous" scores lower
+    assert results[:2] == [("1", 1.0), ("2", 1.0)]
+    assert results[2][0] == "5" and results[2][1] < 1.0
+    assert index.search("murder", 0.5, limit=1) == [("1", 1.0)]
+
+def test_remove_and_re_add():
+    index = build_index()
+    index.remove("1")
+    assert [book_id for book_id, _ in index.search("orient express", 0.5)] == []
+    assert len(index) == 4
+    index.add("2", title="Orient Express", author_name=None)
+    assert [book_id for book_id, _ in index.search("orient express", 0.5)] == ["2"]
+    # the old title's trigrams are gone
+    assert index.search("ackroyd", 0.5) == []
@@ -0,0 +1,95 @@
+from sqlalchemy import select
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book
+from app.services import genre_rankings
+from app.services.catalog_events import BOOK_UPDATED, BOOK_RANKING_UPDATED
+from app.services.genre_rankings import GenreRankings, normalise_genres
+
+def test_normalise_genres():
+    assert normalise_genres("Fiction; Fantasy / fiction.") == ["fiction", "fantasy"]
+    assert normalise_genres("  Unknown ") == []
+    assert normalise_genres(None) == []
+
+def test_add_keeps_best_books_per_genre():
+    rankings = GenreRankings(size=2)
+    rankings.add("a", "Fiction", 3.0)
+    rankings.add("b", "Fiction; Fantasy", 4.0)
+    rankings.add("c", "fiction", 1.0)
+    assert rankings.merge(["fiction"], limit=5) == ["b", "a"]
+    assert rankings.merge(["fantasy"], limit=5) == ["b"]
+    # c did not fit, so the fiction list no longer holds every fiction book
+    assert rankings.overflowing == {"fiction"}
+    assert set(rankings.raw_values("fiction")) == {"Fiction", "Fiction; Fantasy", "fiction"}
+
+def test_merge_skips_duplicates_and_excluded_books():
+    rankings = GenreRankings(size=5)
+    rankings.add("a", "Fiction", 3.0)
+    rankings.add("b", "Fiction; Fantasy", 4.0)
+    rankings.add("c", "Fantasy", 2.0)
+    rankings.add("d", "History", 5.0)
+    assert rankings.merge(["fiction", "fantasy"], limit=5) == ["b", "a", "c"]
+    assert rankings.merge(["fiction", "fantasy"], limit=5, exclude=["b"]) == ["a", "c"]
+    assert rankings.merge(["fiction", "fantasy", "history"], limit=2) == ["d", "b"]
+
+def test_remove_and_refill():
+    rankings = GenreRankings(size=2)
+    rankings.add("a", "Fiction", 3.0)
+    rankings.add("b", "Fiction; Fantasy", 4.0)
+    rankings.add("c", "Fiction", 1.0)
+    # fiction was full, so removing b reports it as needing a refill; fantasy was not
+    assert rankings.remove("b") == ["fiction"]
+    assert rankings.merge(["fiction", "fantasy"], limit=5) == ["a"]
+    assert rankings.remove("unknown") == []
+
+    rankings.replace("fiction", [("a", 3.0), ("c", 1.0)])
+    assert rankings.merge(["fiction"], limit=5) == ["a", "c"]
+    assert "fiction" in rankings.overflowing
+    rankings.replace("fiction", [("c", 1.0)])
+    assert rankings.merge(["fiction"], limit=5) == ["c"]
+    assert "fiction" not in rankings.overflowing
+    # a dropped out of every list, so removing it again is a no-op
+    assert rankings.remove("a") == []
+
+def test_lists_follow_the_shared_version(monkeypatch):
+    version = ["e.1.1"]
+    rebuilds = []
+    rebuild = genre_rankings._rebuild
+    def counting_rebuild(conn):
+        rebuilds.append(version[0])
+        rebuild(conn)
+    monkeypatch.setattr(genre_rankings, "get_catalog_version", lambda ranking=False: version[0])
+    monkeypatch.setattr(genre_rankings, "_rebuild", counting_rebuild)
+    monkeypatch.setattr(genre_rankings, "_built", False)
+    monkeypatch.setattr(genre_rankings, "_built_version", None)
+    monkeypatch.setattr(genre_rankings, "genre_rankings", genre_rankings.genre_rankings)
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            book_id = conn.execute(select(Book.book_id).limit(1)).scalar()
+        genre_rankings.ensure_genre_rankings(engine)
+        genre_rankings.ensure_genre_rankings(engine)
+        assert rebuilds == ["e.1.1"]
+
+        # Events of this process update the lists, and the bumps that follow them
+        # (book writes, then a score refresh) do not trigger a rebuild.
+        genre_rankings.update_genre_rankings(BOOK_UPDATED, [book_id])
+        version[0] = "e.2.1"
+        genre_rankings.ensure_genre_rankings(engine)
+        genre_rankings.update_genre_rankings(BOOK_RANKING_UPDATED, [book_id])
+        version[0] = "e.2.2"
+        genre_rankings.ensure_genre_rankings(engine)
+        assert rebuilds == ["e.1.1"]
+
+        # A write by another process moves the version with no event here.
+        version[0] = "e.3.2"
+        genre_rankings.ensure_genre_rankings(engine)
+        assert rebuilds == ["e.1.1", "e.3.2"]
+
+        # An event that arrives after such a write leaves the lists to the next rebuild.
+        version[0] = "e.4.2"
+        genre_rankings.update_genre_rankings(BOOK_UPDATED, [book_id])
+        version[0] = "e.5.2"
+        genre_rankings.ensure_genre_rankings(engine)
+        assert rebuilds == ["e.1.1", "e.3.2", "e.5.2"]
+    finally:
+        session.close()
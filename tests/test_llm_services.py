@@ -0,0 +1,62 @@
+import uuid
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+import api
+from api import app
+from app.database.connector import connect_to_db
+from app.database.schemas.llm_message_hist import MessageHistory
+from app.services import llm_services
+from app.services.llm_services import append_to_history, get_message_history
+
+client = TestClient(app)
+
+def contents(session_id):
+    success, history = get_message_history(session_id)
+    return [message.content for message in history] if success else []
+
+def test_history_follows_writes_from_other_workers():
+    session_id = uuid.uuid4().hex
+    assert contents(session_id) == []
+    assert append_to_history(session_id, [("hello", "human"), ("hi", "ai")])
+    assert contents(session_id) == ["hello", "hi"]
+    assert llm_services.history_cache.get(session_id) is not None
+
+    # A turn written by another process never touches this process's buffer.
+    engine, session = connect_to_db()
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(MessageHistory).values(session_id=session_id, messages="elsewhere", role="human"))
+    finally:
+        session.close()
+    assert contents(session_id) == ["hello", "hi", "elsewhere"]
+
+    # The cached window was reloaded with that turn, so this one extends it in place.
+    assert append_to_history(session_id, [("again", "human")])
+    rows, _ = llm_services.history_cache.get(session_id)
+    assert [message for message, _ in rows] == ["hello", "hi", "elsewhere", "again"]
+    assert contents(session_id) == ["hello", "hi", "elsewhere", "again"]
+
+def test_sessions_do_not_share_history():
+    first, second = uuid.uuid4().hex, uuid.uuid4().hex
+    append_to_history(first, [("only in first", "human")])
+    assert contents(second) == []
+
+def test_missing_session_id_starts_a_new_conversation(monkeypatch):
+    class EchoAssistant:
+        def __init__(self):
+            self.session_ids = []
+
+        def invoke(self, inputs):
+            self.session_ids.append(inputs["session_id"])
+            return {"response": "hello"}
+
+    assistant = EchoAssistant()
+    monkeypatch.setattr(api, "get_assistant", lambda: assistant)
+    first = client.post("/llm_recommendation", json={"user_message": "hi"}).json()
+    second = client.post("/llm_recommendation", json={"user_message": "hi"}).json()
+    # Each request without a session gets its own id and is told which one it was.
+    assert first["session_id"] != second["session_id"]
+    assert assistant.session_ids == [first["session_id"], second["session_id"]]
+    continued = client.post("/llm_recommendation", json={"user_message": "more", "session_id": first["session_id"]}).json()
+    assert continued == {"llm_response": "hello", "session_id": first["session_id"]}
+    assert client.post("/llm_recommendation/stream", json={"user_message": "hi", "session_id": ""}).status_code == 422
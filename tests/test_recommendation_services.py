@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from app.services.recommendation_services import build_like_matrix, compute_item_neighbours, ItemNeighbours
+
+# Three users: a and b are always liked together, c shares one user with a and b
+# and one with d, d has a single like.
+LIKES = [
+    ("user_1", "a"), ("user_1", "b"),
+    ("user_2", "a"), ("user_2", "b"), ("user_2", "c"),
+    ("user_3", "c"), ("user_3", "d"),
+]
+
+@pytest.fixture
+def model():
+    emails, book_ids = zip(*LIKES)
+    books, matrix = build_like_matrix(emails, book_ids)
+    neighbours, similarities = compute_item_neighbours(matrix, k=2, block_size=3)
+    return ItemNeighbours(books, neighbours, similarities)
+
+def test_compute_item_neighbours(model):
+    assert model.book_ids.tolist() == ["a", "b", "c", "d"]
+    # a: b (same two users, cosine 1), then c (one shared user, 1 / (sqrt(2) * sqrt(2)))
+    assert model.neighbours[0].tolist() == [1, 2]
+    assert model.similarities[0] == pytest.approx([1.0, 0.5])
+    # d shares no user with a or b, so its second slot stays empty
+    assert model.neighbours[3].tolist() == [2, -1]
+    assert model.similarities[3] == pytest.approx([1 / np.sqrt(2), 0.0])
+    # no book is its own neighbour
+    assert all(i not in row for i, row in enumerate(model.neighbours.tolist()))
+
+def test_recommend_sums_similarities(model):
+    recommendations = model.recommend(["a"], limit=5)
+    assert [book_id for book_id, _ in recommendations] == ["b", "c"]
+    assert [score for _, score in recommendations] == pytest.approx([1.0, 0.5])
+    assert model.recommend(["a"], limit=1) == [("b", pytest.approx(1.0))]
+
+def test_recommend_excludes_liked_books(model):
+    # c is a neighbour of both a and b, so its similarities add up
+    recommendations = model.recommend(["a", "b"], limit=5)
+    assert recommendations == [("c", pytest.approx(1.0))]
+    assert model.recommend(["unknown"], limit=5) == []
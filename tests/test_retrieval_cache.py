@@ -0,0 +1,104 @@
+import numpy as np
+from app.llm_workflow import retrieval_cache
+from app.llm_workflow.retrieval_cache import CachedRetriever, SizedLRU, normalise_query
+
+def test_normalise_query():
+    assert normalise_query("  Who wrote  'Dune'?! ") == "who wrote 'dune'"
+    assert normalise_query("WHO wrote dune") == normalise_query("who, wrote... dune")
+    # NFKC folds compatibility characters such as full-width letters
+    assert normalise_query("Ｄｕｎｅ") == "dune"
+    assert normalise_query(None) == ""
+
+def test_sized_lru_evicts_least_recently_used():
+    cache = SizedLRU(max_bytes=10)
+    cache.set("a", 1, 4)
+    cache.set("b", 2, 4)
+    assert cache.get("a") == 1
+    # over budget: b is the least recently used entry
+    cache.set("c", 3, 4)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.size == 8
+
+    # replacing an entry frees its old size first
+    cache.set("a", 4, 6)
+    assert cache.size == 10
+    # an entry larger than the budget evicts everything, itself included
+    cache.set("d", 5, 11)
+    assert (len(cache.entries), cache.size) == (0, 0)
+    snapshot = cache.snapshot()
+    assert (snapshot["hits"], snapshot["misses"], snapshot["evictions"]) == (3, 1, 4)
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, query):
+        self.calls += 1
+        return [float(len(query)), 1.0]
+
+def test_query_embeddings_are_cached_by_normalised_query():
+    embeddings = CountingEmbeddings()
+    retriever = CachedRetriever(lambda: embeddings, lambda: None, max_bytes=1024 * 1024)
+    first = retriever.embed("Who wrote Dune?")
+    second = retriever.embed("who wrote dune")
+    assert embeddings.calls == 1
+    assert np.array_equal(first, second)
+    retriever.embed("who wrote emma")
+    assert embeddings.calls == 2
+
+class StubCollection:
+    def __init__(self, documents):
+        # id -> (text, metadata), in ranking order
+        self.documents = documents
+        self.queries = 0
+        self.gets = []
+
+    def query(self, query_embeddings, n_results, include):
+        self.queries += 1
+        ids = list(self.documents)[:n_results]
+        return {
+            "ids": [ids],
+            "documents": [[self.documents[document_id][0] for document_id in ids]],
+            "metadatas": [[self.documents[document_id][1] for document_id in ids]],
+        }
+
+    def get(self, ids, include):
+        self.gets.append(ids)
+        # Chroma does not promise the requested order.
+        found = [document_id for document_id in reversed(ids) if document_id in self.documents]
+        return {
+            "ids": found,
+            "documents": [self.documents[document_id][0] for document_id in found],
+            "metadatas": [self.documents[document_id][1] for document_id in found],
+        }
+
+class StubStore:
+    def __init__(self, collection):
+        self._collection = collection
+
+def test_invoke_caches_document_ids_until_the_collection_changes(monkeypatch):
+    mtime = [1.0]
+    monkeypatch.setattr(retrieval_cache, "collection_mtime", lambda: mtime[0])
+    collection = StubCollection({"b1": ("Dune", {"book_id": "b1"}), "b2": ("Emma", None), "b3": ("Ulysses", {})})
+    retriever = CachedRetriever(CountingEmbeddings, lambda: StubStore(collection), max_bytes=1024 * 1024)
+
+    # A miss runs the vector search.
+    documents = retriever.invoke("Who wrote Dune?", k=2)
+    assert [document.page_content for document in documents] == ["Dune", "Emma"]
+    assert [document.metadata for document in documents] == [{"book_id": "b1"}, {}]
+    assert (collection.queries, collection.gets) == (1, [])
+
+    # A hit fetches the cached ids and keeps their ranking.
+    documents = retriever.invoke("who wrote dune", k=2)
+    assert [document.page_content for document in documents] == ["Dune", "Emma"]
+    assert (collection.queries, collection.gets) == (1, [["b1", "b2"]])
+    assert retriever.snapshot()["results"]["hits"] == 1
+
+    # A change on disk drops the cached ids, so the next lookup searches again.
+    mtime[0] = 2.0
+    del collection.documents["b1"]
+    documents = retriever.invoke("who wrote dune", k=2)
+    assert [document.page_content for document in documents] == ["Emma", "Ulysses"]
+    assert collection.queries == 2
+    assert retriever.snapshot()["results"]["invalidations"] == 1
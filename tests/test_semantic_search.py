@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from app.services.semantic_search import reciprocal_rank_fusion, mmr_rerank
+from app.services.similarity_services import BookEmbeddings
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert [book_id for book_id, _ in fused] == ["b", "a", "d", "c"]
+    assert dict(fused)["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert dict(fused)["a"] == pytest.approx(1 / 61)
+    # ties are broken by book_id
+    assert reciprocal_rank_fusion([["y"], ["x"]]) == [("x", pytest.approx(1 / 61)), ("y", pytest.approx(1 / 61))]
+    assert reciprocal_rank_fusion([]) == []
+
+@pytest.fixture
+def embeddings():
+    # a and b are near-duplicates, c points elsewhere
+    return BookEmbeddings(["a", "b", "c"], np.array([[1.0, 0.0], [0.99, 0.1], [0.0, 1.0]]))
+
+def test_mmr_rerank_prefers_different_books(embeddings):
+    fused = [("a", 0.03), ("b", 0.029), ("c", 0.02)]
+    assert [book_id for book_id, _ in mmr_rerank(fused, 2, 0.0, embeddings)] == ["a", "b"]
+    assert [book_id for book_id, _ in mmr_rerank(fused, 2, 0.5, embeddings)] == ["a", "c"]
+    # scores are passed through unchanged
+    assert mmr_rerank(fused, 3, 0.5, embeddings)[1] == ("c", 0.02)
+
+def test_mmr_rerank_without_embeddings(embeddings):
+    fused = [("a", 0.03), ("x", 0.029), ("b", 0.02)]
+    assert mmr_rerank(fused, 2, 0.5, None) == fused[:2]
+    # x has no stored vector, so it counts as unlike a and keeps its place
+    assert [book_id for book_id, _ in mmr_rerank(fused, 2, 0.5, embeddings)] == ["a", "x"]
+    assert mmr_rerank([], 2, 0.5, embeddings) == []
@@ -0,0 +1,72 @@
+import threading
+import numpy as np
+import pytest
+from app.services import similarity_services
+from app.services.similarity_services import BookEmbeddings
+
+@pytest.fixture
+def embeddings():
+    # Unnormalised on purpose: BookEmbeddings scales rows to unit length.
+    return BookEmbeddings(["a", "b", "c", "d"], np.array([
+        [2.0, 0.0, 0.0],
+        [1.0, 1.0, 0.0],
+        [0.0, 3.0, 0.0],
+        [0.0, 0.0, 1.0],
+    ]))
+
+def test_similar_to_books(embeddings):
+    similar = embeddings.similar_to_books(["a"], limit=3)
+    assert [book_id for book_id, _ in similar] == ["b", "c", "d"]
+    assert [score for _, score in similar] == pytest.approx([1 / np.sqrt(2), 0.0, 0.0])
+    assert embeddings.similar_to_books(["unknown"], limit=3) is None
+
+def test_similar_to_books_excludes_liked(embeddings):
+    # The query is the mean of a and c, so b (between them) ranks first.
+    similar = embeddings.similar_to_books(["a", "c"], limit=5, exclude_book_ids=["d"])
+    assert similar == [("b", pytest.approx(1.0))]
+
+def test_removed_and_changed_rows(embeddings):
+    embeddings.remove(["b"])
+    assert len(embeddings) == 3
+    assert [book_id for book_id, _ in embeddings.similar_to_books(["a"], limit=1)] != ["b"]
+
+    changed = embeddings.with_changes(["d", "e"], [[1.0, 0.0, 0.1], [0.0, 1.0, 1.0]], deleted_ids=["c"])
+    assert len(changed) == 3
+    assert changed.similar_to_books(["a"], limit=5)[0] == ("d", pytest.approx(1 / np.sqrt(1.01)))
+    # the original is untouched for readers still holding it
+    assert embeddings.similar_to_books(["a"], limit=1)[0][0] != "d"
+
+def test_reload_runs_in_the_background(monkeypatch):
+    mtime = [1.0]
+    release = threading.Event()
+    def load_collection():
+        if similarity_services._embeddings is not None:
+            release.wait(5)
+        return [f"v{mtime[0]}"], np.array([[1.0, 0.0]])
+    monkeypatch.setattr(similarity_services, "collection_mtime", lambda: mtime[0])
+    monkeypatch.setattr(similarity_services, "load_collection", load_collection)
+    monkeypatch.setattr(similarity_services, "_embeddings", None)
+    monkeypatch.setattr(similarity_services, "_embeddings_mtime", None)
+
+    # The first load has nothing to fall back on and runs on the caller.
+    first = similarity_services.get_book_embeddings()
+    assert first.book_ids.tolist() == ["v1.0"]
+
+    # Once the store changes, callers keep the old matrix until the reload is done.
+    mtime[0] = 2.0
+    assert similarity_services.get_book_embeddings() is first
+    reload_thread = similarity_services._reload_thread
+    assert similarity_services.get_book_embeddings() is first
+    assert similarity_services._reload_thread is reload_thread
+    release.set()
+    reload_thread.join(5)
+    assert similarity_services.get_book_embeddings().book_ids.tolist() == ["v2.0"]
+
+    # Writes by this process patch the matrix and record the new mtime: no reload.
+    current = similarity_services.get_book_embeddings()
+    before = mtime[0]
+    mtime[0] = 3.0
+    similarity_services.apply_embedding_changes(["x"], [[0.0, 1.0]], [], before)
+    assert similarity_services._reload_thread is None
+    assert sorted(similarity_services.get_book_embeddings().book_ids.tolist()) == ["v2.0", "x"]
+    assert current.book_ids.tolist() == ["v2.0"]
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import threading
+import uuid
+from fastapi.testclient import TestClient
+from api import app
+from app.llm_workflow import streaming
+
+client = TestClient(app)
+
+class FakeAssistant:
+    # Drives the callbacks the way the graph does: an internal intent-classification
+    # run first, then the answer token by token.
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def invoke(self, inputs, config):
+        handler = config["callbacks"][0]
+        intent_run, answer_run = uuid.uuid4(), uuid.uuid4()
+        handler.on_llm_start({}, [inputs["query"]], run_id=intent_run, tags=[streaming.INTERNAL_TAG])
+        handler.on_llm_new_token("recommendation", run_id=intent_run)
+        handler.on_llm_start({}, [inputs["query"]], run_id=answer_run, tags=[])
+        for token in self.tokens:
+            handler.on_llm_new_token(token, run_id=answer_run)
+        return {"response": "".join(self.tokens), "intent": "recommendation"}
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+def test_stream_tokens_and_done(monkeypatch):
+    monkeypatch.setattr(streaming, "get_assistant", lambda: FakeAssistant(["Try ", "Dune", "."]))
+    response = client.post("/llm_recommendation/stream", json={"user_message": "a sci-fi book?", "session_id": "stream-test"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    # the internal intent token is not streamed
+    assert parse_events(response.text) == [
+        ("token", {"token": "Try "}),
+        ("token", {"token": "Dune"}),
+        ("token", {"token": "."}),
+        ("done", {"response": "Try Dune.", "intent": "recommendation", "session_id": "stream-test"}),
+    ]
+
+def test_stream_error_event(monkeypatch):
+    class FailingAssistant:
+        def invoke(self, inputs, config):
+            raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(streaming, "get_assistant", lambda: FailingAssistant())
+    response = client.post("/llm_recommendation/stream", json={"user_message": "hi", "session_id": "stream-test"})
+    assert parse_events(response.text) == [("error", {"detail": "model unavailable"})]
+
+def test_closing_the_stream_aborts_the_run(monkeypatch):
+    aborted = threading.Event()
+
+    class EndlessAssistant:
+        def invoke(self, inputs, config):
+            handler = config["callbacks"][0]
+            run_id = uuid.uuid4()
+            handler.on_llm_start({}, [inputs["query"]], run_id=run_id)
+            try:
+                while True:
+                    handler.on_llm_new_token("token ", run_id=run_id)
+            except streaming.StreamCancelled:
+                aborted.set()
+                raise
+
+    monkeypatch.setattr(streaming, "get_assistant", lambda: EndlessAssistant())
+
+    async def read_first_event():
+        stream = streaming.stream_assistant({"query": "hi", "session_id": "stream-test"})
+        first = await stream.__anext__()
+        # What Starlette does when the client disconnects.
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(read_first_event()).startswith(b"event: token\n")
+    assert aborted.wait(5)
@@ -66,4 +66,11 @@ def test_update_current_user(admin_auth_headers):
 def test_health_check():
     response = client.get("/healthcheck")
     assert response.status_code == 200
-    assert response.json() is True
\ No newline at end of file
+    assert response.json() is True
+
+def test_readiness():
+    response = client.get("/readiness")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["database"] is True
+    assert "embeddings" in body["subsystems"]
@@ -0,0 +1,98 @@
+import time
+import chromadb
+import pytest
+from sqlalchemy import select, desc
+from app.config import CHROMA_COLLECTION_NAME, EMBEDDING_MODEL_NAME
+from app.database.connector import connect_to_db
+from app.database.schemas.books import Book
+from app.services import vector_index, vector_sync
+from app.services.import_services import write_checkpoint
+
+def fake_embedded_batches(batches, workers):
+    # Deterministic vectors instead of loading the sentence-transformers model.
+    for batch in batches:
+        yield batch, [[float(len(text)), 1.0] for _, text, _ in batch]
+
+@pytest.fixture
+def collection(tmp_path, monkeypatch):
+    collection = chromadb.PersistentClient(path=str(tmp_path / "chroma")).get_or_create_collection(CHROMA_COLLECTION_NAME)
+    monkeypatch.setattr(vector_index, "get_collection", lambda: collection)
+    monkeypatch.setattr(vector_index, "embedded_batches", fake_embedded_batches)
+    return collection
+
+def last_book_ids(count):
+    engine, session = connect_to_db()
+    try:
+        with engine.connect() as conn:
+            return list(reversed(conn.execute(select(Book.book_id).order_by(desc(Book.book_id)).limit(count)).scalars().all()))
+    finally:
+        session.close()
+
+def test_build_vector_index_skips_unchanged_books(collection, tmp_path):
+    # A checkpoint just before the last five books keeps each run to five rows.
+    book_ids = last_book_ids(6)
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    checkpoint = {"collection": CHROMA_COLLECTION_NAME, "model": EMBEDDING_MODEL_NAME, "last_book_id": book_ids[0], "documents_done": 0}
+
+    def build():
+        write_checkpoint(checkpoint_path, checkpoint)
+        return vector_index.build_vector_index(batch_size=2, workers=1, checkpoint_path=checkpoint_path, progress=None)
+
+    report = build()
+    assert (report["resumed_after"], report["scanned"], report["embedded"], report["deleted"]) == (book_ids[0], 5, 5, 0)
+    assert sorted(collection.get()["ids"]) == book_ids[1:]
+
+    report = build()
+    assert (report["scanned"], report["unchanged"], report["embedded"]) == (5, 5, 0)
+
+    # A document whose content changed is re-embedded, one whose book is gone is deleted.
+    stored = collection.get(ids=[book_ids[1]])
+    collection.update(ids=[book_ids[1]], metadatas=[{**stored["metadatas"][0], "content_hash": "stale"}])
+    collection.add(ids=["deleted-book"], embeddings=[[0.0, 1.0]], documents=["gone"], metadatas=[{"content_hash": "gone"}])
+    report = build()
+    assert (report["unchanged"], report["embedded"], report["deleted"]) == (4, 1, 1)
+    assert collection.get(ids=[book_ids[1]])["metadatas"][0]["content_hash"] != "stale"
+    assert collection.get(ids=["deleted-book"])["ids"] == []
+
+def test_sync_documents_reconciles_book_ids(collection, monkeypatch):
+    monkeypatch.setattr(vector_sync, "get_collection", lambda: collection)
+    monkeypatch.setattr(vector_sync, "embedded_batches", fake_embedded_batches)
+    applied = []
+    monkeypatch.setattr(vector_sync, "apply_embedding_changes", lambda book_ids, vectors, deleted_ids, mtime_before: applied.append((book_ids, deleted_ids)))
+    book_ids = last_book_ids(3)
+    collection.add(ids=["deleted-book"], embeddings=[[0.0, 1.0]], documents=["gone"], metadatas=[{"content_hash": "gone"}])
+
+    # New documents are upserted and ids with no book left are deleted.
+    assert vector_sync.sync_documents(book_ids + ["deleted-book"]) == (3, 1)
+    assert sorted(collection.get()["ids"]) == book_ids
+    assert applied[-1] == (book_ids, ["deleted-book"])
+
+    # Unchanged content hashes are not re-embedded.
+    assert vector_sync.sync_documents(book_ids) == (0, 0)
+    stored = collection.get(ids=[book_ids[0]])
+    collection.update(ids=[book_ids[0]], metadatas=[{**stored["metadatas"][0], "content_hash": "stale"}])
+    assert vector_sync.sync_documents(book_ids) == (1, 0)
+    assert collection.get(ids=[book_ids[0]])["metadatas"][0]["content_hash"] != "stale"
+    assert applied[-1] == ([book_ids[0]], [])
+
+def test_vector_sync_queue_requeues_failed_batches(monkeypatch):
+    batches = []
+    def sync_documents(book_ids):
+        batches.append(book_ids)
+        if len(batches) == 1:
+            raise RuntimeError("chroma unavailable")
+        return len(book_ids), 0
+    monkeypatch.setattr(vector_sync, "sync_documents", sync_documents)
+    monkeypatch.setattr(vector_sync, "RETRY_DELAY", 0)
+    queue = vector_sync.VectorSyncQueue(delay=0, batch_size=2)
+    queue.put(["a", "b", "c"])
+    deadline = time.monotonic() + 5
+    while queue.snapshot()["upserted"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    stats = queue.snapshot()
+    assert (stats["pending"], stats["upserted"], stats["failed_batches"]) == (0, 3, 1)
+    assert stats["last_error"] == "chroma unavailable"
+    # The failed batch went back to the queue and was synced on the retry.
+    assert batches[0] == ["a", "b"]
+    assert sorted(book_id for batch in batches[1:] for book_id in batch) == ["a", "b", "c"]